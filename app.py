@@ -1,27 +1,61 @@
 #!/usr/bin/env python3
 """
 Web interface for Provider Network Checker
+
+Plan IDs come from a local store of the CMS Marketplace PUFs when one
+exists. Build or rebuild it (at PUF_STORE_PATH) with:
+
+    python app.py --ingest-puf
+    python app.py --ingest-puf <plan-attributes> <service-area> <network>
+
+Without arguments the PUF_PLAN_YEAR files are downloaded from
+CMS_PUF_DOWNLOAD_BASE_URL; otherwise each argument is a path or URL to a
+PUF ZIP or CSV. Set PUF_AUTO_INGEST=1 to rebuild an existing store
+whenever the source freshness check sees the Plan Attributes PUF file's
+ETag or Last-Modified change. It is off by default because the rebuild
+downloads every PUF file inside a web worker's freshness refresh.
 """
 
-from collections import Counter
+from bisect import bisect_left
+from collections import Counter, OrderedDict, deque
+from contextlib import closing, contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from functools import lru_cache
-from io import BytesIO
+from io import BufferedReader, BytesIO, TextIOWrapper
+import csv
+import gzip
 import hashlib
 import json
+import mmap
+import multiprocessing
 import os
 import re
+import sqlite3
+import struct
 import sys
+import tempfile
+import threading
+import time
+import weakref
+import zipfile
 
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, make_response, render_template_string, request, jsonify
 import requests
-from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote, urljoin, urlparse
+from urllib3.util.retry import Retry
 
 try:
     from pypdf import PdfReader
 except ImportError:
     PdfReader = None
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 app = Flask(__name__)
 
 # NPI Registry API
@@ -32,12 +66,79 @@ CMS_MARKETPLACE_API_KEY = os.environ.get(
     "d687412e7b53146b2631dc01974ad0a4",
 )
 NETWORK_LOOKUP_TIMEOUT = 8
+NPI_LOOKUP_TIMEOUT = 15
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "8"))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "16"))
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF", "0.25"))
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "2"))
+HTTP_PER_HOST_CONCURRENCY = int(os.environ.get("HTTP_PER_HOST_CONCURRENCY", "6"))
+NETWORK_CHECK_WORKERS = int(os.environ.get("NETWORK_CHECK_WORKERS", "5"))
+NPI_CACHE_SIZE = int(os.environ.get("NPI_CACHE_SIZE", "1024"))
+NPI_CACHE_TTL_SECONDS = int(os.environ.get("NPI_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+NPI_CACHE_NEGATIVE_TTL_SECONDS = int(os.environ.get("NPI_CACHE_NEGATIVE_TTL_SECONDS", str(10 * 60)))
+NPI_QUERY_WORKERS = int(os.environ.get("NPI_QUERY_WORKERS", "4"))
+# Spacing between NPI Registry request starts; cache hits never wait.
+NPI_MIN_INTERVAL_SECONDS = float(os.environ.get("NPI_MIN_INTERVAL_SECONDS", "0.05"))
+PLAN_SEARCH_WORKERS = int(os.environ.get("PLAN_SEARCH_WORKERS", "4"))
+INDEX_CACHE_MAX_AGE = int(os.environ.get("INDEX_CACHE_MAX_AGE", "300"))
+SEARCH_WORKERS = int(os.environ.get("SEARCH_WORKERS", "8"))
+SEARCH_DEADLINE_SECONDS = float(os.environ.get("SEARCH_DEADLINE_SECONDS", "25"))
 SOURCE_FRESHNESS_TIMEOUT = 5
 SOURCE_FRESHNESS_TTL_SECONDS = 12 * 60 * 60
+SOURCE_FRESHNESS_WORKERS = int(os.environ.get("SOURCE_FRESHNESS_WORKERS", "8"))
+SOURCE_FRESHNESS_AUTO_REFRESH = os.environ.get("SOURCE_FRESHNESS_AUTO_REFRESH", "1") == "1"
+SOURCE_FRESHNESS_RETRY_SECONDS = int(os.environ.get("SOURCE_FRESHNESS_RETRY_SECONDS", "600"))
 SOURCE_FRESHNESS_CACHE_PATH = os.environ.get(
     "SOURCE_FRESHNESS_CACHE_PATH",
     os.path.join(os.path.dirname(__file__), "source_freshness.json"),
 )
+PLAN_ID_CACHE_PATH = os.environ.get(
+    "PLAN_ID_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "provider-network-checker", "plan_ids.sqlite3"),
+)
+PLAN_ID_CACHE_TTL_SECONDS = int(os.environ.get("PLAN_ID_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+PUF_STORE_PATH = os.environ.get(
+    "PUF_STORE_PATH",
+    os.path.join(tempfile.gettempdir(), "provider-network-checker", "cms_puf.sqlite3"),
+)
+PUF_PLAN_YEAR = int(os.environ.get("PUF_PLAN_YEAR", "2026"))
+PUF_STATES = tuple(
+    state.strip().upper()
+    for state in os.environ.get("PUF_STATES", "TX").split(",")
+    if state.strip()
+)
+# Opt-in: a rebuild downloads the full Plan Attributes, Service Area and Network
+# PUFs from inside the freshness refresh of a web worker, and the first build is
+# an operator step (--ingest-puf), so only an existing store is ever rebuilt.
+PUF_AUTO_INGEST = os.environ.get("PUF_AUTO_INGEST", "0") == "1"
+CMS_PUF_DOWNLOAD_BASE_URL = os.environ.get(
+    "CMS_PUF_DOWNLOAD_BASE_URL", "https://download.cms.gov/marketplace-puf/{year}/"
+)
+MR_DIRECTORY_INDEX_PATH = os.environ.get(
+    "MR_DIRECTORY_INDEX_PATH",
+    os.path.join(tempfile.gettempdir(), "provider-network-checker", "mr_directory.sqlite3"),
+)
+# Read issuer files from <dir>/<host>/<path> instead of the issuer hosts.
+MR_DIRECTORY_MIRROR_DIR = os.environ.get("MR_DIRECTORY_MIRROR_DIR", "")
+MR_DIRECTORY_CHUNK_SIZE = int(os.environ.get("MR_DIRECTORY_CHUNK_SIZE", str(256 * 1024)))
+MR_DIRECTORY_INSERT_BATCH = 1000
+FORMULARY_INDEX_DIR = os.environ.get(
+    "FORMULARY_INDEX_DIR",
+    os.path.join(os.path.dirname(__file__), "formulary_index"),
+)
+ZIP_COUNTY_INDEX_PATH = os.environ.get(
+    "ZIP_COUNTY_INDEX_PATH",
+    os.path.join(os.path.dirname(__file__), "zip_county_index.bin"),
+)
+TEXAS_PLACE_CENTROIDS_PATH = os.environ.get(
+    "TEXAS_PLACE_CENTROIDS_PATH",
+    os.path.join(os.path.dirname(__file__), "texas_place_centroids.csv"),
+)
+FORMULARY_PDF_STREAMING = os.environ.get("FORMULARY_PDF_STREAMING", "0") == "1"
+FORMULARY_PDF_WORKERS = int(os.environ.get("FORMULARY_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+FORMULARY_PDF_PAGES_PER_WORKER = int(os.environ.get("FORMULARY_PDF_PAGES_PER_WORKER", "8"))
 CMS_PUF_PAGE_URL = "https://www.cms.gov/marketplace/resources/data/public-use-files"
 CMS_PUF_LABELS = (
     "Plan Attributes PUF",
@@ -45,6 +146,12 @@ CMS_PUF_LABELS = (
     "Network PUF",
     "Machine-readable URL PUF",
 )
+CMS_PUF_FILES = {
+    "plan_attributes": "plan-attributes-puf.zip",
+    "service_area": "service-area-puf.zip",
+    "network": "network-puf.zip",
+    "machine_readable_url": "machine-readable-url-puf.zip",
+}
 CARRIER_OPTIONS = (
     {
         "value": "bcbstx",
@@ -156,6 +263,17 @@ TEXAS_MARKETPLACE_PLACES = {
     "corpus christi": {"zipcode": "78418", "countyfips": "48355", "state": "TX"},
 }
 
+STATE_POSTAL_BY_FIPS = {
+    "01": "AL", "02": "AK", "04": "AZ", "05": "AR", "06": "CA", "08": "CO", "09": "CT",
+    "10": "DE", "11": "DC", "12": "FL", "13": "GA", "15": "HI", "16": "ID", "17": "IL",
+    "18": "IN", "19": "IA", "20": "KS", "21": "KY", "22": "LA", "23": "ME", "24": "MD",
+    "25": "MA", "26": "MI", "27": "MN", "28": "MS", "29": "MO", "30": "MT", "31": "NE",
+    "32": "NV", "33": "NH", "34": "NJ", "35": "NM", "36": "NY", "37": "NC", "38": "ND",
+    "39": "OH", "40": "OK", "41": "OR", "42": "PA", "44": "RI", "45": "SC", "46": "SD",
+    "47": "TN", "48": "TX", "49": "UT", "50": "VT", "51": "VA", "53": "WA", "54": "WV",
+    "55": "WI", "56": "WY", "72": "PR",
+}
+
 SOURCE_CHECK_DATE = "2026-05-13"
 PROVIDER_DIRECTORY = "Provider directory"
 FORMULARY = "Formulary"
@@ -460,6 +578,201 @@ KNOWN_PROVIDER_NETWORK_CONFIRMATIONS = [
 ]
 
 
+_http_session = None
+_http_session_lock = threading.Lock()
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def http_retry_policy():
+    # Read timeouts are not retried. Failed connects and 429/5xx replies are
+    # retried up to HTTP_MAX_RETRIES times with sub-second backoff; each connect
+    # attempt is capped at HTTP_CONNECT_TIMEOUT (see http_timeout), so an
+    # unreachable host costs (HTTP_MAX_RETRIES + 1) x HTTP_CONNECT_TIMEOUT rather
+    # than that many full timeouts. A retried 5xx gets a fresh read timeout, so a
+    # call is only bounded by the caller's timeout per attempt, not overall.
+    return Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=0,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+
+
+def build_http_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=http_retry_policy(),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def http_session():
+    """Return the shared keep-alive session used for every outbound call."""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                _http_session = build_http_session()
+    return _http_session
+
+
+def host_semaphore(url):
+    """Cap in-flight requests per upstream host across all worker threads."""
+    host = urlparse(url).netloc.lower()
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(max(1, HTTP_PER_HOST_CONCURRENCY))
+            _host_semaphores[host] = semaphore
+    return semaphore
+
+
+def http_timeout(kwargs):
+    """Split a scalar timeout into (connect, read) so retried connects stay short."""
+    timeout = kwargs.get("timeout")
+    if isinstance(timeout, (int, float)):
+        kwargs["timeout"] = (min(HTTP_CONNECT_TIMEOUT, timeout), timeout)
+    return kwargs
+
+
+def http_get(url, **kwargs):
+    with host_semaphore(url):
+        return http_session().get(url, **http_timeout(kwargs))
+
+
+def http_post(url, **kwargs):
+    with host_semaphore(url):
+        return http_session().post(url, **http_timeout(kwargs))
+
+
+def http_head(url, **kwargs):
+    with host_semaphore(url):
+        return http_session().head(url, **http_timeout(kwargs))
+
+
+def map_concurrently(func, items, max_workers):
+    """Apply func to each item on a bounded thread pool, keeping input order."""
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def iter_concurrently(func, items, max_workers, window=None):
+    """Yield func(item) in input order while later items run ahead.
+
+    Items are pulled lazily, at most `window` (default 2 x max_workers)
+    ahead of the caller, so an unbounded iterator streams in bounded
+    memory. Closing the generator early cancels work that has not started
+    yet and returns without waiting for calls still in flight.
+    """
+    if isinstance(items, (list, tuple)) and len(items) <= 1:
+        max_workers = 1
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    if isinstance(items, (list, tuple)):
+        max_workers = min(max_workers, len(items))
+    window = max(window or 2 * max_workers, max_workers)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL."""
+
+    MISSING = object()
+
+    def __init__(self, maxsize, ttl_seconds, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return self.MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl_seconds=None):
+        if self.maxsize <= 0:
+            return
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+NPI_RESPONSE_CACHE = TTLCache(NPI_CACHE_SIZE, NPI_CACHE_TTL_SECONDS)
+
+
+class HostRateLimiter:
+    """Space request starts to the same host by a minimum interval, across threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url, min_interval):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+HOST_RATE_LIMITER = HostRateLimiter()
+
+
 def utc_now_iso():
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
@@ -504,8 +817,22 @@ def save_source_freshness_cache(cache):
     directory = os.path.dirname(SOURCE_FRESHNESS_CACHE_PATH)
     if directory:
         os.makedirs(directory, exist_ok=True)
-    with open(SOURCE_FRESHNESS_CACHE_PATH, "w", encoding="utf-8") as handle:
-        json.dump(cache, handle, indent=2, sort_keys=True)
+    # Readers never see a partial file: write beside the cache, then swap it in.
+    handle = tempfile.NamedTemporaryFile(
+        "w",
+        encoding="utf-8",
+        dir=directory or ".",
+        prefix=".source_freshness.",
+        suffix=".tmp",
+        delete=False,
+    )
+    try:
+        with handle:
+            json.dump(cache, handle, indent=2, sort_keys=True)
+        os.replace(handle.name, SOURCE_FRESHNESS_CACHE_PATH)
+    except BaseException:
+        remove_file_quietly(handle.name)
+        raise
 
 
 def extract_cms_puf_updates(html):
@@ -552,13 +879,52 @@ def metadata_changed(previous, current):
     return False
 
 
-def check_url_metadata(url):
+SOURCE_HASH_SAMPLE_BYTES = 128 * 1024
+
+
+def conditional_request_headers(previous):
+    headers = {}
+    if previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    if previous.get("last_modified"):
+        headers["If-Modified-Since"] = previous["last_modified"]
+    return headers
+
+
+def not_modified_metadata(response, method, url, previous):
+    """Carry the cached validators forward for a 304 Not Modified answer."""
+    metadata = response_metadata(response, method, content_hash=previous.get("content_hash", ""))
+    metadata["url"] = metadata["url"] or previous.get("url") or url
+    for key in ("etag", "last_modified", "content_length", "content_type"):
+        metadata[key] = metadata[key] or previous.get(key, "")
+    metadata["ok"] = True
+    metadata["not_modified"] = True
+    return metadata
+
+
+def content_range_total(response):
+    total = response_header(response, "Content-Range").rpartition("/")[2].strip()
+    return total if total.isdigit() else ""
+
+
+def check_url_metadata(url, previous=None):
+    """Fetch freshness metadata for url, revalidating against a cached entry.
+
+    The cached ETag/Last-Modified are sent as conditional headers and a 304
+    keeps the cached entry. Without validators, the hash sample is fetched
+    with a byte-range GET so servers that honour Range send only the sample.
+    """
+    previous = previous or {}
+    conditional_headers = conditional_request_headers(previous)
     try:
-        response = requests.head(
+        response = http_head(
             url,
             allow_redirects=True,
+            headers=conditional_headers,
             timeout=SOURCE_FRESHNESS_TIMEOUT,
         )
+        if getattr(response, "status_code", 0) == 304:
+            return not_modified_metadata(response, "HEAD", url, previous)
         if response_ok(response):
             metadata = response_metadata(response, "HEAD")
             if metadata["etag"] or metadata["last_modified"] or metadata["content_length"]:
@@ -567,24 +933,35 @@ def check_url_metadata(url):
         pass
 
     try:
-        response = requests.get(
+        response = http_get(
             url,
             allow_redirects=True,
             stream=True,
+            headers={
+                **conditional_headers,
+                "Range": f"bytes=0-{SOURCE_HASH_SAMPLE_BYTES - 1}",
+                "Accept-Encoding": "identity",
+            },
             timeout=SOURCE_FRESHNESS_TIMEOUT,
         )
+        if getattr(response, "status_code", 0) == 304:
+            return not_modified_metadata(response, "GET", url, previous)
         hasher = hashlib.sha256()
         bytes_read = 0
         for chunk in response.iter_content(chunk_size=8192):
             if not chunk:
                 continue
-            remaining = 128 * 1024 - bytes_read
+            remaining = SOURCE_HASH_SAMPLE_BYTES - bytes_read
             if remaining <= 0:
                 break
             sample = chunk[:remaining]
             hasher.update(sample)
             bytes_read += len(sample)
-        return response_metadata(response, "GET", content_hash=hasher.hexdigest())
+        metadata = response_metadata(response, "GET", content_hash=hasher.hexdigest())
+        if getattr(response, "status_code", 0) == 206:
+            # Content-Length is the sample size; report the full size from Content-Range.
+            metadata["content_length"] = content_range_total(response)
+        return metadata
     except requests.RequestException as error:
         return {
             "method": "GET",
@@ -613,7 +990,7 @@ def source_status_from_metadata(previous, metadata):
 def check_cms_puf_page(previous_cache):
     previous_puf = previous_cache.get("puf", {})
     try:
-        response = requests.get(CMS_PUF_PAGE_URL, timeout=SOURCE_FRESHNESS_TIMEOUT)
+        response = http_get(CMS_PUF_PAGE_URL, timeout=SOURCE_FRESHNESS_TIMEOUT)
         response.raise_for_status()
         html = response.text
         page_hash = hashlib.sha256(html.encode("utf-8")).hexdigest()
@@ -639,17 +1016,43 @@ def check_cms_puf_page(previous_cache):
         }
 
 
-def check_source_freshness(previous_cache=None):
+def check_source_freshness(previous_cache=None, save=True):
     previous_cache = previous_cache if previous_cache is not None else load_source_freshness_cache()
     previous_sources = {
         source.get("id"): source
         for source in previous_cache.get("sources", [])
     }
     checked_at = utc_now_iso()
-    source_entries = []
+    sources = flatten_carrier_sources()
+    previous_by_url = {}
+    for source in sources:
+        previous_by_url.setdefault(source["url"], previous_sources.get(source["id"], {}))
+    urls = list(previous_by_url)
+
+    def url_metadata(url):
+        previous = previous_by_url[url]
+        return check_url_metadata(url, previous if previous.get("ok") else None)
+
+    # Only a store that auto-ingest may rebuild needs the Plan Attributes file's validators.
+    puf_files = default_puf_sources()
+    auto_ingest = PUF_AUTO_INGEST and os.path.exists(PUF_STORE_PATH)
+    previous_plan_attributes_file = previous_cache.get("puf", {}).get("plan_attributes_file", {})
+
+    # The PUF page and file are independent of the source URLs, so they are fetched alongside them.
+    with ThreadPoolExecutor(max_workers=2) as puf_executor:
+        puf_future = puf_executor.submit(check_cms_puf_page, previous_cache)
+        plan_attributes_future = puf_executor.submit(
+            check_url_metadata,
+            puf_files["plan_attributes"],
+            previous_plan_attributes_file if previous_plan_attributes_file.get("ok") else None,
+        ) if auto_ingest else None
+        metadata_by_url = dict(zip(urls, map_concurrently(url_metadata, urls, SOURCE_FRESHNESS_WORKERS)))
+        puf = puf_future.result()
+        plan_attributes_file = plan_attributes_future.result() if plan_attributes_future else {}
 
-    for source in flatten_carrier_sources():
-        metadata = check_url_metadata(source["url"])
+    source_entries = []
+    for source in sources:
+        metadata = metadata_by_url[source["url"]]
         previous = previous_sources.get(source["id"], {})
         status = source_status_from_metadata(previous, metadata)
         source_entries.append({
@@ -659,13 +1062,38 @@ def check_source_freshness(previous_cache=None):
             "checked_at": checked_at,
         })
 
+    previous_plan_attributes = previous_cache.get("puf", {}).get("updates", {}).get("Plan Attributes PUF")
+    if previous_plan_attributes and puf.get("updates", {}).get("Plan Attributes PUF") != previous_plan_attributes:
+        clear_plan_id_store()
+        get_marketplace_plan_ids.cache_clear()
+    # The PUF page's wording can change without a new file, so the rebuild is keyed
+    # on the Plan Attributes file's own ETag/Last-Modified. A failed check keeps the
+    # previous validators so the next check still compares against them.
+    if plan_attributes_file.get("ok"):
+        puf["plan_attributes_file"] = plan_attributes_file
+    elif previous_plan_attributes_file:
+        puf["plan_attributes_file"] = previous_plan_attributes_file
+    if (
+        auto_ingest
+        and plan_attributes_file.get("ok")
+        and metadata_changed(previous_plan_attributes_file, plan_attributes_file)
+    ):
+        try:
+            ingest_puf_files(
+                puf_files["plan_attributes"], puf_files["service_area"], puf_files["network"],
+                puf_marker=puf.get("updates", {}).get("Plan Attributes PUF", ""),
+            )
+        except (requests.RequestException, OSError, sqlite3.Error, csv.Error, KeyError, ValueError) as error:
+            print(f"PUF re-ingestion failed: {error}", file=sys.stderr)
+
     cache = {
         "last_checked": checked_at,
         "ttl_seconds": SOURCE_FRESHNESS_TTL_SECONDS,
-        "puf": check_cms_puf_page(previous_cache),
+        "puf": puf,
         "sources": source_entries,
     }
-    save_source_freshness_cache(cache)
+    if save:
+        save_source_freshness_cache(cache)
     return cache
 
 
@@ -676,7 +1104,118 @@ def source_freshness_age_seconds(cache):
     return max(0, int((datetime.now(timezone.utc) - checked_at).total_seconds()))
 
 
-def source_freshness_summary(cache=None):
+_source_freshness_lock = threading.Lock()
+_source_freshness_snapshot = {"key": None, "cache": None, "summary": None}
+_source_freshness_refresh = {"thread": None, "failed_at": None}
+
+
+def source_freshness_file_key(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def source_freshness_snapshot():
+    """Return the parsed freshness cache and its summary, held in memory.
+
+    The file is re-read only when its mtime or size changes (for example
+    after a --refresh-sources run in another process); a background refresh
+    installs its result directly.
+    """
+    key = source_freshness_file_key(SOURCE_FRESHNESS_CACHE_PATH)
+    with _source_freshness_lock:
+        if _source_freshness_snapshot["key"] == key:
+            return dict(_source_freshness_snapshot)
+    cache = load_source_freshness_cache()
+    return install_source_freshness_snapshot(key, cache)
+
+
+def install_source_freshness_snapshot(key, cache):
+    snapshot = {"key": key, "cache": cache, "summary": source_freshness_summary(cache)}
+    with _source_freshness_lock:
+        _source_freshness_snapshot.update(snapshot)
+    return snapshot
+
+
+def source_freshness_is_stale(cache):
+    age_seconds = source_freshness_age_seconds(cache) if cache else None
+    if age_seconds is None:
+        return True
+    return age_seconds >= cache.get("ttl_seconds", SOURCE_FRESHNESS_TTL_SECONDS)
+
+
+def source_freshness_refresh_in_progress():
+    thread = _source_freshness_refresh["thread"]
+    return thread is not None and thread.is_alive()
+
+
+def run_source_freshness_refresh(path, previous_cache):
+    """Refresh the sources and serve the result from memory, persisting it when the path is writable."""
+    try:
+        cache = check_source_freshness(previous_cache, save=False)
+    except Exception as error:  # a failed background refresh must not take the worker down
+        print(f"Source freshness refresh failed: {error}", file=sys.stderr)
+        with _source_freshness_lock:
+            _source_freshness_refresh["failed_at"] = time.monotonic()
+        return
+    with _source_freshness_lock:
+        _source_freshness_refresh["failed_at"] = None
+    install_source_freshness_snapshot(source_freshness_file_key(path), cache)
+    try:
+        save_source_freshness_cache(cache)
+    except OSError as error:
+        # A read-only deploy keeps serving the in-memory snapshot.
+        print(f"Warning: could not write {path}: {error}", file=sys.stderr)
+        return
+    with _source_freshness_lock:
+        if _source_freshness_snapshot["cache"] is cache:
+            _source_freshness_snapshot["key"] = source_freshness_file_key(path)
+
+
+def start_source_freshness_refresh(previous_cache):
+    """Start one background refresh unless one is running or recently failed."""
+    with _source_freshness_lock:
+        if source_freshness_refresh_in_progress():
+            return False
+        failed_at = _source_freshness_refresh["failed_at"]
+        if failed_at is not None and time.monotonic() - failed_at < SOURCE_FRESHNESS_RETRY_SECONDS:
+            return False
+        thread = threading.Thread(
+            target=run_source_freshness_refresh,
+            args=(SOURCE_FRESHNESS_CACHE_PATH, previous_cache),
+            name="source-freshness-refresh",
+            daemon=True,
+        )
+        _source_freshness_refresh["thread"] = thread
+        thread.start()
+        return True
+
+
+def source_freshness_status():
+    """Serve the cached summary and revalidate it in the background once stale.
+
+    Returns the summary and a weak ETag for it. The tag follows the snapshot
+    file and in_progress; age_seconds is recomputed per call and left out,
+    so bodies sharing a tag are equivalent but not byte-identical.
+    """
+    snapshot = source_freshness_snapshot()
+    cache = snapshot["cache"]
+    if SOURCE_FRESHNESS_AUTO_REFRESH and source_freshness_is_stale(cache):
+        start_source_freshness_refresh(cache)
+    in_progress = source_freshness_refresh_in_progress()
+    summary = {
+        **snapshot["summary"],
+        "age_seconds": source_freshness_age_seconds(cache) if cache else None,
+        "in_progress": in_progress,
+    }
+    _, mtime_ns, size = snapshot["key"]
+    version = f"{mtime_ns}-{size}-{summary['last_checked']}-{int(in_progress)}"
+    return summary, hashlib.sha256(version.encode("utf-8")).hexdigest()[:32]
+
+
+def source_freshness_summary(cache=None, in_progress=False):
     cache = cache if cache is not None else load_source_freshness_cache()
     if not cache:
         return {
@@ -684,7 +1223,7 @@ def source_freshness_summary(cache=None):
             "last_checked": "",
             "age_seconds": None,
             "ttl_seconds": SOURCE_FRESHNESS_TTL_SECONDS,
-            "in_progress": False,
+            "in_progress": in_progress,
             "counts": {"total": len(flatten_carrier_sources()), "ok": 0, "changed": 0, "suspect": 0, "missing": 0},
             "puf": {},
             "sources": [],
@@ -704,7 +1243,7 @@ def source_freshness_summary(cache=None):
         "last_checked": cache.get("last_checked", ""),
         "age_seconds": age_seconds,
         "ttl_seconds": cache.get("ttl_seconds", SOURCE_FRESHNESS_TTL_SECONDS),
-        "in_progress": False,
+        "in_progress": in_progress,
         "counts": {
             "total": len(cache.get("sources", [])),
             "ok": counts.get("ok", 0),
@@ -1503,6 +2042,10 @@ HTML_TEMPLATE = """
             background: #fee2e2;
             color: #991b1b;
         }
+        .provider-tag.lookup-error {
+            background: #fef3c7;
+            color: #92400e;
+        }
         .network-status {
             align-items: center;
             display: inline-flex;
@@ -2201,6 +2744,12 @@ HTML_TEMPLATE = """
                     </select>
                 </div>
 
+                <div class="form-group">
+                    <label for="zipcode">Texas ZIP</label>
+                    <input type="text" id="zipcode" name="zipcode" inputmode="numeric" maxlength="10"
+                           placeholder="e.g., 79901 (overrides Location)">
+                </div>
+
                 <div class="form-group">
                     <label for="radius">Radius (miles)</label>
                     <select id="radius" name="radius">
@@ -2391,6 +2940,9 @@ HTML_TEMPLATE = """
             try {
                 const response = await fetch('/search?' + params.toString());
                 const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.error || 'HTTP ' + response.status);
+                }
 
                 const providerResults = Array.isArray(data) ? data : data.providers;
                 const prescriptionResults = Array.isArray(data) ? [] : data.prescriptions;
@@ -2581,6 +3133,7 @@ HTML_TEMPLATE = """
             setSelectedFacilitiesFromText(scenario.facilities || '');
             setSelectedPrescriptionsFromText(scenario.prescriptions || '');
             document.getElementById('location').value = scenario.location;
+            document.getElementById('zipcode').value = scenario.zipcode || '';
             document.getElementById('radius').value = scenario.radius;
             document.getElementById('city').value = scenario.city;
             searchForm.requestSubmit();
@@ -2829,6 +3382,7 @@ HTML_TEMPLATE = """
                     q: query,
                     formulary_only: 'true',
                     location: document.getElementById('location').value || 'dallas',
+                    zipcode: document.getElementById('zipcode').value.trim(),
                 });
                 selectedCarrierValues().forEach(carrier => params.append('carriers', carrier));
                 const response = await fetch('/drugs/search?' + params.toString(), {
@@ -2838,7 +3392,7 @@ HTML_TEMPLATE = """
                 if (sequence !== drugSearchSequence) {
                     return;
                 }
-                renderDrugSearchResults(data.drugs || [], data.message || '');
+                renderDrugSearchResults(data.drugs || [], data.error || data.message || '');
             } catch (error) {
                 if (error.name === 'AbortError') {
                     return;
@@ -2888,10 +3442,16 @@ HTML_TEMPLATE = """
             if (providerType === 'not_found') {
                 return 'Not found';
             }
+            if (providerType === 'lookup_error') {
+                return 'Lookup timed out';
+            }
             return providerType.charAt(0).toUpperCase() + providerType.slice(1);
         }
 
         function providerTagClass(providerType) {
+            if (providerType === 'lookup_error') {
+                return 'lookup-error';
+            }
             return providerType === 'not_found' ? 'not-found' : providerType;
         }
 
@@ -3017,7 +3577,8 @@ HTML_TEMPLATE = """
             const pufCopy = pufUpdates.length
                 ? ` CMS PUF dates: ${pufUpdates.map(([name, date]) => `${name} ${date}`).join('; ')}.`
                 : '';
-            const changedCopy = `${counts.changed || 0} changed, ${counts.suspect || 0} suspect, ${counts.missing || 0} missing.`;
+            const changedCopy = `${counts.changed || 0} changed, ${counts.suspect || 0} suspect, ${counts.missing || 0} missing.`
+                + (status.in_progress ? ' Checking sources now.' : '');
 
             let html = '<div class="source-freshness" aria-label="Last updated">';
             html += '<div>';
@@ -3033,6 +3594,9 @@ HTML_TEMPLATE = """
                 const response = await fetch('/sources/status');
                 const status = await response.json();
                 renderSourceStatus(status);
+                if (status.in_progress) {
+                    setTimeout(loadSourceStatus, 5000);
+                }
             } catch (error) {
                 renderSourceStatus({
                     status: 'suspect',
@@ -3752,6 +4316,8 @@ HTML_TEMPLATE = """
                 } else if (result.source === 'Carrier directory') {
                     html += '<span class="badge badge-success">Carrier directory</span>';
                     html += '<span class="badge badge-error">NPI unresolved</span>';
+                } else if (result.provider_type === 'lookup_error') {
+                    html += '<span class="badge badge-error">Timed out</span>';
                 } else {
                     html += '<span class="badge badge-error">Not found</span>';
                 }
@@ -3773,6 +4339,11 @@ HTML_TEMPLATE = """
                     html += `<div class="npi-detail">${escapeHtml(result.address || result.location || '')}</div>`;
                     html += `<div class="npi-detail">${escapeHtml(result.source_detail || 'NPI identity still needs confirmation before CMS coverage can be trusted.')}</div>`;
                     html += '</div>';
+                } else if (result.provider_type === 'lookup_error') {
+                    html += '<div class="npi-item">';
+                    html += '<div class="npi-name">NPI Registry lookup did not finish</div>';
+                    html += '<div class="npi-detail">The search deadline passed before the NPI Registry answered. Run the search again.</div>';
+                    html += '</div>';
                 } else {
                     html += '<div class="npi-item not-found">';
                     html += '<div class="npi-name">No matches in NPI Registry</div>';
@@ -3997,23 +4568,28 @@ def confirmed_carrier_network_ids_for_provider(provider_name, provider_type, npi
     return confirmed_ids
 
 
-def search_provider_npi(name, state="TX", city=None, specialty=None, limit=10, provider_type="doctor"):
+def search_provider_npi(name, state="TX", city=None, specialty=None, limit=10, provider_type="doctor", on_error=None):
     results = []
     seen_npis = set()
-    for query in provider_search_queries(name, provider_type):
-        query_results = search_npi(
+    query_results_in_order = iter_concurrently(
+        lambda query: search_npi(
             query, state=state, city=city, specialty=specialty,
-            limit=limit, provider_type=provider_type
-        )
-        for result in query_results:
-            npi = result.get("npi")
-            if npi and npi in seen_npis:
-                continue
-            if npi:
-                seen_npis.add(npi)
-            results.append(result)
-            if len(results) >= limit:
-                return results
+            limit=limit, provider_type=provider_type, on_error=on_error
+        ),
+        provider_search_queries(name, provider_type),
+        NPI_QUERY_WORKERS,
+    )
+    with closing(query_results_in_order):
+        for query_results in query_results_in_order:
+            for result in query_results:
+                npi = result.get("npi")
+                if npi and npi in seen_npis:
+                    continue
+                if npi:
+                    seen_npis.add(npi)
+                results.append(result)
+                if len(results) >= limit:
+                    return results
     return results
 
 
@@ -4049,8 +4625,33 @@ def serialize_directory_facility_candidate(provider):
     }
 
 
-def search_npi(name, state="TX", city=None, specialty=None, limit=10, provider_type="doctor"):
-    """Search the NPI Registry for providers."""
+def npi_cache_key(params):
+    return tuple(sorted(
+        (key, " ".join(str(value).lower().split()))
+        for key, value in params.items()
+    ))
+
+
+def fetch_npi_registry(params):
+    """Return the NPI Registry payload for params, served from NPI_RESPONSE_CACHE when fresh."""
+    key = npi_cache_key(params)
+    data = NPI_RESPONSE_CACHE.get(key)
+    if data is not TTLCache.MISSING:
+        return data
+    HOST_RATE_LIMITER.wait(NPI_API, NPI_MIN_INTERVAL_SECONDS)
+    resp = http_get(NPI_API, params=params, timeout=NPI_LOOKUP_TIMEOUT)
+    resp.raise_for_status()
+    data = resp.json()
+    ttl_seconds = NPI_CACHE_TTL_SECONDS if data.get("results") else NPI_CACHE_NEGATIVE_TTL_SECONDS
+    NPI_RESPONSE_CACHE.set(key, data, ttl_seconds=ttl_seconds)
+    return data
+
+
+NPI_RESULT_KEYS = ("npi", "name", "credential", "specialty", "address", "location", "phone")
+
+
+def npi_search_params(name, state="TX", city=None, limit=10, provider_type="doctor"):
+    """Build NPI Registry query parameters for a provider name."""
     provider_type = "facility" if provider_type == "facility" else "doctor"
 
     params = {
@@ -4082,86 +4683,106 @@ def search_npi(name, state="TX", city=None, specialty=None, limit=10, provider_t
             params["last_name"] = last
     if city:
         params["city"] = city
+    return params
 
-    try:
-        resp = requests.get(NPI_API, params=params, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
 
-        results = []
-        for r in data.get("results", []):
-            basic = r.get("basic", {})
-            addresses = r.get("addresses", [])
-            taxonomies = r.get("taxonomies", [])
+def npi_record_fields(record, provider_type="doctor"):
+    """Flatten one NPI Registry record using its practice address and primary taxonomy."""
+    basic = record.get("basic", {})
+    addresses = record.get("addresses", [])
+    taxonomies = record.get("taxonomies", [])
 
-            practice_addr = next(
-                (a for a in addresses if a.get("address_purpose") == "LOCATION"),
-                addresses[0] if addresses else {},
-            )
+    practice_addr = next(
+        (a for a in addresses if a.get("address_purpose") == "LOCATION"),
+        addresses[0] if addresses else {},
+    )
 
-            primary_tax = next(
-                (t for t in taxonomies if t.get("primary")),
-                taxonomies[0] if taxonomies else {},
-            )
+    primary_tax = next(
+        (t for t in taxonomies if t.get("primary")),
+        taxonomies[0] if taxonomies else {},
+    )
 
-            specialty_name = primary_tax.get("desc", "Unknown")
+    result_name = basic.get("organization_name", "").strip()
+    if provider_type != "facility":
+        result_name = f"{basic.get('first_name', '')} {basic.get('last_name', '')}".strip()
 
-            if specialty and specialty.lower() not in specialty_name.lower():
-                continue
+    address_parts = [
+        practice_addr.get("address_1", ""),
+        practice_addr.get("address_2", ""),
+    ]
+    street_address = " ".join(part for part in address_parts if part).strip()
+    location = f"{practice_addr.get('city', '')}, {practice_addr.get('state', '')} {practice_addr.get('postal_code', '')[:5]}"
+    full_address = ", ".join(part for part in [street_address, location] if part.strip(" ,"))
 
-            result_name = basic.get("organization_name", "").strip()
-            if provider_type == "doctor":
-                result_name = f"{basic.get('first_name', '')} {basic.get('last_name', '')}".strip()
+    return {
+        "npi": record.get("number", ""),
+        "name": result_name,
+        "credential": basic.get("credential", ""),
+        "specialty": primary_tax.get("desc", "Unknown"),
+        "address_1": practice_addr.get("address_1", ""),
+        "address": full_address,
+        "city": practice_addr.get("city", ""),
+        "state": practice_addr.get("state", ""),
+        "zip_code": practice_addr.get("postal_code", "")[:5],
+        "location": location,
+        "phone": practice_addr.get("telephone_number", ""),
+    }
 
-            address_parts = [
-                practice_addr.get("address_1", ""),
-                practice_addr.get("address_2", ""),
-            ]
-            street_address = " ".join(part for part in address_parts if part).strip()
-            location = f"{practice_addr.get('city', '')}, {practice_addr.get('state', '')} {practice_addr.get('postal_code', '')[:5]}"
-            full_address = ", ".join(part for part in [street_address, location] if part.strip(" ,"))
-
-            results.append({
-                "npi": r.get("number", ""),
-                "name": result_name,
-                "credential": basic.get("credential", ""),
-                "specialty": specialty_name,
-                "address": full_address,
-                "location": location,
-                "phone": practice_addr.get("telephone_number", ""),
-            })
+
+def search_npi(name, state="TX", city=None, specialty=None, limit=10, provider_type="doctor", on_error=None):
+    """Search the NPI Registry for providers.
+
+    A failed lookup returns no results; on_error, when given, is called with
+    the exception so callers can tell a registry failure from a miss.
+    """
+    provider_type = "facility" if provider_type == "facility" else "doctor"
+    params = npi_search_params(name, state=state, city=city, limit=limit, provider_type=provider_type)
+
+    try:
+        data = fetch_npi_registry(params)
+
+        results = []
+        for r in data.get("results", []):
+            fields = npi_record_fields(r, provider_type)
+            if specialty and specialty.lower() not in fields["specialty"].lower():
+                continue
+            results.append({key: fields[key] for key in NPI_RESULT_KEYS})
 
         return results
-    except Exception:
+    except Exception as error:
+        if on_error:
+            on_error(error)
         return []
 
 
-def resolve_provider_npi(name, state="TX", city=None, specialty=None, limit=10, provider_type="auto"):
+def resolve_provider_npi(name, state="TX", city=None, specialty=None, limit=10, provider_type="auto", on_error=None):
     provider_type = normalize_provider_type(provider_type)
 
     if provider_type in {"doctor", "facility"}:
         results = search_provider_npi(
             name, state=state, city=city, specialty=specialty,
-            limit=limit, provider_type=provider_type
+            limit=limit, provider_type=provider_type, on_error=on_error
         )
         return results, provider_type if results else "not_found"
 
-    doctor_results = search_provider_npi(
-        name, state=state, city=city, specialty=specialty,
-        limit=limit, provider_type="doctor"
-    )
-    facility_results = search_provider_npi(
-        name, state=state, city=city, specialty=specialty,
-        limit=limit, provider_type="facility"
+    # Both enumeration types are queried at once; whichever result the
+    # preference rules need first decides, and the other is abandoned.
+    if provider_query_has_facility_hint(name):
+        order = ("facility", "doctor")
+    else:
+        order = ("doctor", "facility")
+    type_results = iter_concurrently(
+        lambda search_type: search_provider_npi(
+            name, state=state, city=city, specialty=specialty,
+            limit=limit, provider_type=search_type, on_error=on_error
+        ),
+        order,
+        NPI_QUERY_WORKERS,
     )
-    if facility_results and provider_query_has_facility_hint(name):
-        return facility_results, "facility"
-
-    if doctor_results:
-        return doctor_results, "doctor"
-
-    if facility_results:
-        return facility_results, "facility"
+    with closing(type_results):
+        for search_type, results in zip(order, type_results):
+            if results:
+                return results, search_type
 
     return [], "not_found"
 
@@ -4250,7 +4871,7 @@ def drug_is_combination_match(query, drug):
 def search_drugs(name, limit=10):
     """Search the CMS Marketplace drug endpoint for RxCUI matches."""
     try:
-        response = requests.get(
+        response = http_get(
             f"{CMS_MARKETPLACE_API}/drugs/autocomplete",
             params={"apikey": CMS_MARKETPLACE_API_KEY, "q": name},
             timeout=NETWORK_LOOKUP_TIMEOUT,
@@ -4326,6 +4947,223 @@ def resolve_selected_prescription(selection):
     }
 
 
+# Fixed-width records sorted by ZIP: zipcode, county FIPS, state, lat/lon in 1e-6 degrees.
+ZIP_COUNTY_MAGIC = b"ZIPCNTY1"
+ZIP_COUNTY_HEADER = struct.Struct("<8sI")
+ZIP_COUNTY_RECORD = struct.Struct("<5s5s2sii")
+
+
+class ZipCountyIndex:
+    """Memory-mapped ZIP -> county lookup, binary searched in place."""
+
+    def __init__(self, path):
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = ZIP_COUNTY_HEADER.unpack_from(self._map, 0)
+        expected_size = ZIP_COUNTY_HEADER.size + self.count * ZIP_COUNTY_RECORD.size
+        if magic != ZIP_COUNTY_MAGIC or len(self._map) != expected_size:
+            self._map.close()
+            raise ValueError(f"{path} is not a ZIP county index")
+
+    def _record(self, position):
+        return ZIP_COUNTY_RECORD.unpack_from(
+            self._map, ZIP_COUNTY_HEADER.size + position * ZIP_COUNTY_RECORD.size
+        )
+
+    def lookup(self, zipcode):
+        key = zipcode.encode("ascii")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.count:
+            return None
+        record_zip, countyfips, state, lat, lon = self._record(low)
+        if record_zip != key:
+            return None
+        return {
+            "zipcode": zipcode,
+            "countyfips": countyfips.decode("ascii"),
+            "state": state.decode("ascii"),
+            "lat": lat / 1e6,
+            "lon": lon / 1e6,
+        }
+
+
+def write_zip_county_index(rows, path):
+    """Write {zipcode, countyfips, state, lat, lon} rows as a ZIP county index."""
+    rows = sorted(rows, key=lambda row: row["zipcode"])
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as handle:
+        handle.write(ZIP_COUNTY_HEADER.pack(ZIP_COUNTY_MAGIC, len(rows)))
+        for row in rows:
+            handle.write(ZIP_COUNTY_RECORD.pack(
+                row["zipcode"].encode("ascii"),
+                row["countyfips"].encode("ascii"),
+                row["state"].encode("ascii"),
+                round(float(row["lat"]) * 1e6),
+                round(float(row["lon"]) * 1e6),
+            ))
+    os.replace(temporary_path, path)
+    return len(rows)
+
+
+def zip_county_rows_from_census(relationship_path, gazetteer_path, state_fips=("48",)):
+    """Join the Census ZCTA-county relationship file with the ZCTA gazetteer.
+
+    A ZCTA that spans counties is assigned the county holding most of its
+    land area; coordinates are the gazetteer's internal point.
+    """
+    counties = {}
+    with open(relationship_path, "r", encoding="utf-8-sig", newline="") as handle:
+        for row in csv.DictReader(handle, delimiter="|"):
+            zipcode = (row.get("GEOID_ZCTA5_20") or "").strip()
+            countyfips = (row.get("GEOID_COUNTY_20") or "").strip()
+            if len(zipcode) != 5 or len(countyfips) != 5 or countyfips[:2] not in state_fips:
+                continue
+            land_area = int(row.get("AREALAND_PART") or 0)
+            if zipcode not in counties or land_area > counties[zipcode][1]:
+                counties[zipcode] = (countyfips, land_area)
+
+    rows = []
+    with open(gazetteer_path, "r", encoding="utf-8-sig", newline="") as handle:
+        reader = csv.reader(handle, delimiter="\t")
+        header = [column.strip() for column in next(reader)]
+        for values in reader:
+            row = dict(zip(header, (value.strip() for value in values)))
+            zipcode = row.get("GEOID", "")
+            if zipcode not in counties:
+                continue
+            countyfips = counties[zipcode][0]
+            rows.append({
+                "zipcode": zipcode,
+                "countyfips": countyfips,
+                "state": STATE_POSTAL_BY_FIPS.get(countyfips[:2], ""),
+                "lat": row["INTPTLAT"],
+                "lon": row["INTPTLONG"],
+            })
+    return rows
+
+
+_zip_county_index = {"path": None, "index": None}
+_zip_county_index_lock = threading.Lock()
+
+
+def zip_county_index():
+    """Open the bundled ZIP county index on first use; None if it is missing."""
+    with _zip_county_index_lock:
+        if _zip_county_index["path"] != ZIP_COUNTY_INDEX_PATH:
+            try:
+                index = ZipCountyIndex(ZIP_COUNTY_INDEX_PATH)
+            except (OSError, ValueError, struct.error):
+                index = None
+            _zip_county_index.update(path=ZIP_COUNTY_INDEX_PATH, index=index)
+        return _zip_county_index["index"]
+
+
+def lookup_zip_county(zipcode):
+    match = re.fullmatch(r"(\d{5})(?:-\d{4})?", (zipcode or "").strip())
+    index = zip_county_index() if match else None
+    return index.lookup(match.group(1)) if index else None
+
+
+CENSUS_PLACE_SUFFIXES = (" city", " town", " village", " CDP")
+
+
+def place_centroid_rows_from_census(gazetteer_path, state="TX"):
+    """Read {place, lat, lon} rows for one state from the Census place gazetteer.
+
+    Names drop the legal/statistical area suffix ("Dallas city" -> "dallas").
+    """
+    rows = []
+    with open(gazetteer_path, "r", encoding="utf-8-sig", newline="") as handle:
+        reader = csv.reader(handle, delimiter="\t")
+        header = [column.strip() for column in next(reader)]
+        for values in reader:
+            row = dict(zip(header, (value.strip() for value in values)))
+            if row.get("USPS") != state:
+                continue
+            name = row.get("NAME", "")
+            for suffix in CENSUS_PLACE_SUFFIXES:
+                if name.endswith(suffix):
+                    name = name[:-len(suffix)]
+                    break
+            rows.append({"place": name.lower(), "lat": row["INTPTLAT"], "lon": row["INTPTLONG"]})
+    return rows
+
+
+def write_place_centroids(rows, path):
+    """Write {place, lat, lon} rows as the place centroid table."""
+    centroids = {row["place"]: row for row in rows}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle, lineterminator="\n")
+        writer.writerow(["place", "lat", "lon"])
+        for place in sorted(centroids):
+            row = centroids[place]
+            writer.writerow([place, f"{float(row['lat']):.4f}", f"{float(row['lon']):.4f}"])
+    os.replace(temporary_path, path)
+    return len(centroids)
+
+
+_texas_place_centroids = {"path": None, "centroids": {}}
+_texas_place_centroids_lock = threading.Lock()
+
+
+def texas_place_centroids():
+    """Load the bundled place centroid table on first use; empty if it is missing."""
+    with _texas_place_centroids_lock:
+        if _texas_place_centroids["path"] != TEXAS_PLACE_CENTROIDS_PATH:
+            centroids = {}
+            try:
+                with open(TEXAS_PLACE_CENTROIDS_PATH, "r", encoding="utf-8", newline="") as handle:
+                    for row in csv.DictReader(handle):
+                        centroids[row["place"]] = (float(row["lat"]), float(row["lon"]))
+            except (OSError, csv.Error, KeyError, ValueError):
+                centroids = {}
+            _texas_place_centroids.update(path=TEXAS_PLACE_CENTROIDS_PATH, centroids=centroids)
+        return _texas_place_centroids["centroids"]
+
+
+def lookup_texas_place(place):
+    """Return (lat, lon) for a Texas city or town name, or None."""
+    return texas_place_centroids().get(" ".join((place or "").lower().split()))
+
+
+def resolve_texas_location(location):
+    """Return (lat, lon, marketplace place) for a city key or any Texas ZIP.
+
+    Unknown locations keep the historical Dallas default.
+    """
+    location = (location or "").strip().lower()
+    if location in TEXAS_LOCATIONS and location in TEXAS_MARKETPLACE_PLACES:
+        lat, lon = TEXAS_LOCATIONS[location]
+        return lat, lon, TEXAS_MARKETPLACE_PLACES[location]
+    zip_county = lookup_zip_county(location)
+    if zip_county and zip_county["state"] == "TX":
+        place = {
+            "zipcode": zip_county["zipcode"],
+            "countyfips": zip_county["countyfips"],
+            "state": zip_county["state"],
+        }
+        return zip_county["lat"], zip_county["lon"], place
+    lat, lon = TEXAS_LOCATIONS["dallas"]
+    return lat, lon, TEXAS_MARKETPLACE_PLACES["dallas"]
+
+
+def request_location(args):
+    return args.get("zipcode", "").strip() or args.get("location", "dallas")
+
+
 def generate_bcbstx_urls(name, lat, lon, radius):
     """Generate BCBSTX provider finder URLs."""
     urls = {}
@@ -4378,8 +5216,35 @@ def chunked(items, size):
         yield items[index:index + size]
 
 
-@lru_cache(maxsize=128)
-def get_marketplace_plan_ids(
+MARKETPLACE_PLAN_PAGE_SIZE = 10
+
+
+def marketplace_plan_search_page(issuer, plan_year, place, offset):
+    payload = {
+        "market": "Individual",
+        "place": place,
+        "year": plan_year,
+        "offset": offset,
+        "filter": {"issuer": issuer},
+    }
+    response = http_post(
+        f"{CMS_MARKETPLACE_API}/plans/search",
+        params={"apikey": CMS_MARKETPLACE_API_KEY},
+        json=payload,
+        timeout=NETWORK_LOOKUP_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def marketplace_plan_search_total(page):
+    try:
+        return int(page.get("total"))
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_marketplace_plan_ids(
     issuer,
     plan_year,
     zipcode,
@@ -4388,113 +5253,802 @@ def get_marketplace_plan_ids(
     plan_name_contains,
     network_url_contains,
 ):
-    plan_ids = []
-    offset = 0
+    """Crawl /plans/search for an issuer and keep plans matching the network filters.
+
+    When the first page reports a total, the remaining offsets are fetched
+    concurrently; otherwise (or if the total was stale) pages are walked
+    one at a time until a short page comes back.
+    """
+    place = {
+        "zipcode": zipcode,
+        "countyfips": countyfips,
+        "state": state,
+    }
     network = {
         "marketplace_plan_name_contains": plan_name_contains,
         "marketplace_network_url_contains": network_url_contains,
     }
 
-    while True:
-        payload = {
-            "market": "Individual",
-            "place": {
-                "zipcode": zipcode,
-                "countyfips": countyfips,
-                "state": state,
-            },
-            "year": plan_year,
-            "offset": offset,
-            "filter": {"issuer": issuer},
-        }
+    pages = [marketplace_plan_search_page(issuer, plan_year, place, 0)]
+    offset = 0
+    total = marketplace_plan_search_total(pages[0])
+    if total is not None and len(pages[0].get("plans", [])) >= MARKETPLACE_PLAN_PAGE_SIZE:
+        offsets = list(range(MARKETPLACE_PLAN_PAGE_SIZE, total, MARKETPLACE_PLAN_PAGE_SIZE))
+        pages.extend(map_concurrently(
+            lambda page_offset: marketplace_plan_search_page(issuer, plan_year, place, page_offset),
+            offsets,
+            PLAN_SEARCH_WORKERS,
+        ))
+        if offsets:
+            offset = offsets[-1]
+    while len(pages[-1].get("plans", [])) >= MARKETPLACE_PLAN_PAGE_SIZE:
+        offset += MARKETPLACE_PLAN_PAGE_SIZE
+        pages.append(marketplace_plan_search_page(issuer, plan_year, place, offset))
+
+    return tuple(
+        plan["id"]
+        for page in pages
+        for plan in page.get("plans", [])
+        if plan_matches_marketplace_network(plan, network)
+    )
 
-        response = requests.post(
-            f"{CMS_MARKETPLACE_API}/plans/search",
-            params={"apikey": CMS_MARKETPLACE_API_KEY},
-            json=payload,
-            timeout=NETWORK_LOOKUP_TIMEOUT,
-        )
-        response.raise_for_status()
-        data = response.json()
-        plans = data.get("plans", [])
 
-        for plan in plans:
-            if plan_matches_marketplace_network(plan, network):
-                plan_ids.append(plan["id"])
+def plan_attributes_puf_marker():
+    return load_source_freshness_cache().get("puf", {}).get("updates", {}).get("Plan Attributes PUF", "")
 
-        if len(plans) < 10:
-            break
-        offset += 10
 
-    return tuple(plan_ids)
+def plan_id_store_connection():
+    directory = os.path.dirname(PLAN_ID_CACHE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(PLAN_ID_CACHE_PATH, timeout=5)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS plan_ids ("
+        "cache_key TEXT PRIMARY KEY, "
+        "plan_ids TEXT NOT NULL, "
+        "puf_marker TEXT NOT NULL, "
+        "stored_at REAL NOT NULL)"
+    )
+    return connection
 
 
-def get_network_plan_ids(network, place):
-    return get_marketplace_plan_ids(
-        network["marketplace_issuer"],
-        network["plan_year"],
-        place["zipcode"],
-        place["countyfips"],
-        place["state"],
-        tuple(network.get("marketplace_plan_name_contains", [])),
-        network.get("marketplace_network_url_contains", ""),
-    )
+def load_stored_plan_ids(cache_key, puf_marker):
+    try:
+        with closing(plan_id_store_connection()) as connection:
+            row = connection.execute(
+                "SELECT plan_ids, puf_marker, stored_at FROM plan_ids WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+    except (OSError, sqlite3.Error):
+        return None
+    if row is None:
+        return None
+    plan_ids, stored_marker, stored_at = row
+    if stored_marker != puf_marker or time.time() - stored_at > PLAN_ID_CACHE_TTL_SECONDS:
+        return None
+    return tuple(json.loads(plan_ids))
 
 
-def check_marketplace_network_status(provider_name, provider_type, npi_results, network, place):
-    expected_npis = {
-        str(result.get("npi"))
-        for result in npi_results
-        if result.get("npi")
-    }
-    if not expected_npis:
-        return make_network_status(
-            "not_found",
-            "NPI Registry",
-            "Provider was not found in the NPI Registry.",
-        )
+def store_plan_ids(cache_key, plan_ids, puf_marker):
+    try:
+        with closing(plan_id_store_connection()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO plan_ids (cache_key, plan_ids, puf_marker, stored_at) "
+                "VALUES (?, ?, ?, ?)",
+                (cache_key, json.dumps(list(plan_ids)), puf_marker, time.time()),
+            )
+    except (OSError, sqlite3.Error):
+        pass
 
+
+def clear_plan_id_store():
     try:
-        plan_ids = get_network_plan_ids(network, place)
-    except (requests.RequestException, ValueError) as error:
-        return make_network_status(
-            "lookup_error",
-            "CMS Marketplace API",
-            f"Marketplace plan lookup failed: {error}",
-        )
+        with closing(plan_id_store_connection()) as connection, connection:
+            connection.execute("DELETE FROM plan_ids")
+    except (OSError, sqlite3.Error):
+        pass
+
+
+@contextmanager
+def open_puf_csv(source):
+    """Yield a csv.DictReader over a PUF given as a URL, ZIP or CSV path.
+
+    URLs are streamed to a temporary file first; a ZIP is read through its
+    first CSV member without being extracted.
+    """
+    path = source
+    downloaded = source.startswith(("http://", "https://"))
+    if downloaded:
+        path = download_to_temporary_file(source, suffix=os.path.splitext(urlparse(source).path)[1])
+    try:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                member = next((name for name in archive.namelist() if name.lower().endswith(".csv")), None)
+                if member is None:
+                    raise ValueError(f"{source} has no CSV member")
+                with archive.open(member) as raw:
+                    yield csv.DictReader(TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+        else:
+            with open(path, "r", encoding="utf-8-sig", newline="") as handle:
+                yield csv.DictReader(handle)
+    finally:
+        if downloaded:
+            remove_file_quietly(path)
+
+
+def puf_row_applies(row, plan_year, states):
+    """Keep individual-market medical rows for the ingested year and states."""
+    return (
+        (row.get("BusinessYear") or "").strip() == str(plan_year)
+        and (row.get("StateCode") or "").strip().upper() in states
+        and (row.get("MarketCoverage") or "").strip().lower() == "individual"
+        and (row.get("DentalOnlyPlan") or "").strip().lower() != "yes"
+    )
+
+
+def default_puf_sources(plan_year=None):
+    base_url = CMS_PUF_DOWNLOAD_BASE_URL.format(year=plan_year or PUF_PLAN_YEAR)
+    return {kind: base_url + filename for kind, filename in CMS_PUF_FILES.items()}
 
-    if not plan_ids:
-        return make_network_status(
-            "not_offered",
-            "CMS Marketplace API",
-            f"No matching Marketplace plans found for {network['name']} in {place['zipcode']}.",
-        )
 
-    coverage_rows = []
+def ingest_puf_files(plan_attributes, service_area, network, plan_year=None, states=None, puf_marker=""):
+    """Build the PUF plan store from the Plan Attributes, Service Area and Network PUFs.
+
+    Each file is streamed row by row and only the configured year and
+    states are kept. The store is written beside PUF_STORE_PATH and swapped
+    in atomically, so lookups never see a half-built store. Returns the
+    plan and service-area row counts.
+    """
+    plan_year = plan_year or PUF_PLAN_YEAR
+    states = {state.upper() for state in (states or PUF_STATES)}
+
+    network_urls = {}
+    with open_puf_csv(network) as rows:
+        for row in rows:
+            if puf_row_applies(row, plan_year, states):
+                network_urls[(row["IssuerId"].strip(), row["NetworkId"].strip())] = (row.get("NetworkURL") or "").strip()
+
+    directory = os.path.dirname(PUF_STORE_PATH) or "."
+    os.makedirs(directory, exist_ok=True)
+    handle = tempfile.NamedTemporaryFile(dir=directory, suffix=".sqlite3", delete=False)
+    handle.close()
+    counts = {"plans": 0, "service_areas": 0}
     try:
-        for plan_id_group in chunked(plan_ids, 10):
-            response = requests.get(
-                f"{CMS_MARKETPLACE_API}/providers/covered",
-                params={
-                    "apikey": CMS_MARKETPLACE_API_KEY,
-                    "providerids": ",".join(sorted(expected_npis)),
-                    "planids": ",".join(plan_id_group),
-                    "year": network["plan_year"],
-                },
-                timeout=NETWORK_LOOKUP_TIMEOUT,
+        with closing(sqlite3.connect(handle.name)) as connection, connection:
+            connection.executescript(
+                "CREATE TABLE puf_plans ("
+                "plan_year INTEGER NOT NULL, plan_id TEXT NOT NULL, state TEXT NOT NULL, "
+                "issuer_id TEXT NOT NULL, issuer TEXT NOT NULL, name TEXT NOT NULL, "
+                "network_url TEXT NOT NULL, service_area_id TEXT NOT NULL, "
+                "PRIMARY KEY (plan_year, plan_id));"
+                "CREATE INDEX puf_plans_issuer ON puf_plans (plan_year, state, issuer COLLATE NOCASE);"
+                "CREATE TABLE puf_service_areas ("
+                "plan_year INTEGER NOT NULL, issuer_id TEXT NOT NULL, service_area_id TEXT NOT NULL, "
+                "state TEXT NOT NULL, countyfips TEXT NOT NULL, zipcodes TEXT NOT NULL);"
+                "CREATE INDEX puf_service_areas_area ON puf_service_areas (plan_year, issuer_id, service_area_id);"
+                "CREATE TABLE puf_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
             )
-            response.raise_for_status()
-            data = response.json()
-            coverage_rows.extend(
-                row for row in data.get("coverage", [])
-                if str(row.get("npi")) in expected_npis and row.get("plan_id") in plan_ids
+
+            with open_puf_csv(plan_attributes) as rows:
+                for row in rows:
+                    if not puf_row_applies(row, plan_year, states):
+                        continue
+                    issuer_id = row["IssuerId"].strip()
+                    # CSR variants share the 14-character standard component ID the Marketplace API uses.
+                    cursor = connection.execute(
+                        "INSERT OR IGNORE INTO puf_plans VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            plan_year,
+                            row["StandardComponentId"].strip(),
+                            row["StateCode"].strip().upper(),
+                            issuer_id,
+                            (row.get("IssuerMarketPlaceMarketingName") or "").strip(),
+                            (row.get("PlanMarketingName") or "").strip(),
+                            network_urls.get((issuer_id, (row.get("NetworkId") or "").strip()), ""),
+                            (row.get("ServiceAreaId") or "").strip(),
+                        ),
+                    )
+                    counts["plans"] += cursor.rowcount
+
+            with open_puf_csv(service_area) as rows:
+                for row in rows:
+                    if not puf_row_applies(row, plan_year, states):
+                        continue
+                    entire_state = (row.get("CoverEntireState") or "").strip().lower() == "yes"
+                    partial_county = (row.get("PartialCounty") or "").strip().lower() == "yes"
+                    zipcodes = ""
+                    if partial_county:
+                        zipcodes = ",".join(re.findall(r"\d{5}", row.get("ZipCodes") or ""))
+                    connection.execute(
+                        "INSERT INTO puf_service_areas VALUES (?, ?, ?, ?, ?, ?)",
+                        (
+                            plan_year,
+                            row["IssuerId"].strip(),
+                            row["ServiceAreaId"].strip(),
+                            row["StateCode"].strip().upper(),
+                            "" if entire_state else (row.get("County") or "").strip().zfill(5),
+                            zipcodes,
+                        ),
+                    )
+                    counts["service_areas"] += 1
+
+            connection.executemany(
+                "INSERT INTO puf_meta VALUES (?, ?)",
+                [("puf_marker", puf_marker), ("ingested_at", utc_now_iso())],
+            )
+        os.replace(handle.name, PUF_STORE_PATH)
+    except BaseException:
+        remove_file_quietly(handle.name)
+        raise
+
+    clear_plan_id_store()
+    get_marketplace_plan_ids.cache_clear()
+    return counts
+
+
+def puf_store_plan_ids(issuer, plan_year, zipcode, countyfips, state, plan_name_contains, network_url_contains):
+    """Resolve plan IDs from the ingested PUF store.
+
+    Returns None when no store exists or it holds no plans from the
+    issuer for the year and state, so callers can fall back to
+    /plans/search.
+    """
+    if not os.path.exists(PUF_STORE_PATH):
+        return None
+    try:
+        with closing(sqlite3.connect(PUF_STORE_PATH, timeout=5)) as connection:
+            covered = connection.execute(
+                "SELECT 1 FROM puf_plans WHERE plan_year = ? AND state = ? AND issuer = ? COLLATE NOCASE LIMIT 1",
+                (plan_year, state, issuer),
+            ).fetchone()
+            if covered is None:
+                return None
+            rows = connection.execute(
+                "SELECT DISTINCT p.plan_id, p.name, p.network_url FROM puf_plans p "
+                "JOIN puf_service_areas s ON s.plan_year = p.plan_year "
+                "AND s.issuer_id = p.issuer_id AND s.service_area_id = p.service_area_id "
+                "WHERE p.plan_year = ? AND p.state = ? AND p.issuer = ? COLLATE NOCASE AND s.state = ? "
+                "AND (s.countyfips = '' OR (s.countyfips = ? "
+                "AND (s.zipcodes = '' OR instr(',' || s.zipcodes || ',', ',' || ? || ',') > 0))) "
+                "ORDER BY p.plan_id",
+                (plan_year, state, issuer, state, countyfips, zipcode),
+            ).fetchall()
+    except (OSError, sqlite3.Error):
+        return None
+    network = {
+        "marketplace_plan_name_contains": plan_name_contains,
+        "marketplace_network_url_contains": network_url_contains,
+    }
+    return tuple(
+        plan_id
+        for plan_id, name, network_url in rows
+        if plan_matches_marketplace_network({"name": name, "network_url": network_url}, network)
+    )
+
+
+# What a JSONDecodeError points at when a number, literal or \\u escape is cut off by the chunk edge.
+JSON_TRUNCATED_TOKEN = re.compile(r"u[0-9a-fA-F]{0,4}(?:\\u?[0-9a-fA-F]{0,4})?|-?[0-9.eE+-]*|-?[tfnNI][a-zA-Z]*")
+
+
+def json_error_is_truncation(buffer, error):
+    """True when more input could complete the element the decoder failed on."""
+    if error.pos >= len(buffer) or error.msg.startswith("Unterminated string"):
+        return True
+    return JSON_TRUNCATED_TOKEN.fullmatch(buffer, error.pos) is not None
+
+
+def iter_json_array(handle, chunk_size=None):
+    """Yield the elements of a top-level JSON array from a text stream.
+
+    Only the current element and one chunk are held in memory, so a
+    multi-gigabyte providers.json is walked in constant space.
+    """
+    chunk_size = chunk_size or MR_DIRECTORY_CHUNK_SIZE
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = handle.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    separators = " \t\r\n"
+    while True:
+        while position < len(buffer) and buffer[position] in separators:
+            position += 1
+        if position < len(buffer):
+            break
+        if not fill():
+            raise ValueError("Empty JSON document")
+    if buffer[position] != "[":
+        raise ValueError("Expected a top-level JSON array")
+    position += 1
+
+    # Elements must be separated by exactly one comma, as json.loads requires.
+    expect_element = True
+    after_comma = False
+    while True:
+        while position < len(buffer) and buffer[position] in separators:
+            position += 1
+        if position >= len(buffer):
+            if not fill():
+                raise ValueError("Unterminated JSON array")
+            continue
+        if buffer[position] == "]":
+            if after_comma:
+                raise ValueError("Trailing comma in JSON array")
+            return
+        if not expect_element:
+            if buffer[position] != ",":
+                raise ValueError("Expected ',' or ']' in JSON array")
+            position += 1
+            expect_element = after_comma = True
+            continue
+        if buffer[position] == ",":
+            raise ValueError("Missing JSON array element")
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            if not json_error_is_truncation(buffer, error) or not fill():
+                raise
+            continue
+        cut_number = isinstance(item, (int, float)) and JSON_TRUNCATED_TOKEN.fullmatch(buffer, end)
+        if (end == len(buffer) or cut_number) and not eof and fill():
+            # A scalar ending at the chunk edge may continue in the next chunk.
+            continue
+        position = end
+        expect_element = after_comma = False
+        yield item
+
+
+@contextmanager
+def open_directory_stream(url, mirror_dir=None):
+    """Open an issuer machine-readable file as text, gunzipping it when needed."""
+    mirror_dir = MR_DIRECTORY_MIRROR_DIR if mirror_dir is None else mirror_dir
+    parsed = urlparse(url)
+    response = None
+    if parsed.scheme in ("http", "https") and mirror_dir:
+        raw = open(os.path.join(mirror_dir, parsed.netloc, parsed.path.lstrip("/")), "rb")
+    elif parsed.scheme in ("http", "https"):
+        response = http_get(url, stream=True, timeout=NETWORK_LOOKUP_TIMEOUT)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        raw = BufferedReader(response.raw)
+    else:
+        raw = open(parsed.path if parsed.scheme == "file" else url, "rb")
+    try:
+        stream = gzip.GzipFile(fileobj=raw) if raw.peek(2)[:2] == b"\x1f\x8b" else raw
+        with TextIOWrapper(stream, encoding="utf-8-sig") as text:
+            yield text
+    finally:
+        raw.close()
+        if response is not None:
+            response.close()
+
+
+def machine_readable_index_urls(mr_url_puf, states=None):
+    """Group the issuer IDs in the Machine-readable URL PUF by their index.json URL."""
+    states = {state.upper() for state in (states or PUF_STATES)}
+    issuers_by_url = {}
+    with open_puf_csv(mr_url_puf) as rows:
+        for row in rows:
+            row = {re.sub(r"[^a-z]", "", (key or "").lower()): (value or "").strip() for key, value in row.items()}
+            url = row.get("urlsubmitted", "")
+            if row.get("state", "").upper() not in states or not url:
+                continue
+            issuers_by_url.setdefault(url, []).append(row.get("issuerid", ""))
+    return issuers_by_url
+
+
+def directory_years(entry):
+    """Encode plan years as ",2025,2026," so a year is matched with instr/in; "" means any year."""
+    years = entry.get("years") or []
+    return f",{','.join(str(year) for year in years)}," if years else ""
+
+
+def ingest_directory_files(connection, index_url, mirror_dir):
+    """Stream one issuer's plans.json and providers.json files into the index; returns the provider count."""
+    with open_directory_stream(index_url, mirror_dir) as handle:
+        index = json.load(handle)
+
+    for plans_url in index.get("plan_urls", []):
+        with open_directory_stream(urljoin(index_url, plans_url), mirror_dir) as handle:
+            connection.executemany(
+                "INSERT OR REPLACE INTO mr_plans VALUES (?, ?, ?, ?)",
+                (
+                    (
+                        plan.get("plan_id", ""),
+                        plan.get("marketing_name", ""),
+                        json.dumps([network.get("network_tier", "") for network in plan.get("network", [])]),
+                        directory_years(plan),
+                    )
+                    for plan in iter_json_array(handle)
+                    if plan.get("plan_id")
+                ),
+            )
+
+    providers = 0
+    for provider_url in index.get("provider_urls", []):
+        with open_directory_stream(urljoin(index_url, provider_url), mirror_dir) as handle:
+            plan_rows = []
+            address_rows = []
+            for provider in iter_json_array(handle):
+                npi = str(provider.get("npi") or "").strip()
+                if not npi:
+                    continue
+                providers += 1
+                for plan in provider.get("plans", []):
+                    if plan.get("plan_id"):
+                        plan_rows.append((npi, plan["plan_id"], plan.get("network_tier", ""), directory_years(plan)))
+                for address in provider.get("addresses", []):
+                    address_rows.append((
+                        npi,
+                        " ".join(part for part in (address.get("address"), address.get("address_2")) if part),
+                        address.get("city", ""),
+                        address.get("state", ""),
+                        str(address.get("zip", ""))[:5],
+                        address.get("phone", ""),
+                    ))
+                if len(plan_rows) >= MR_DIRECTORY_INSERT_BATCH or len(address_rows) >= MR_DIRECTORY_INSERT_BATCH:
+                    connection.executemany("INSERT OR IGNORE INTO mr_provider_plans VALUES (?, ?, ?, ?)", plan_rows)
+                    connection.executemany("INSERT OR IGNORE INTO mr_provider_addresses VALUES (?, ?, ?, ?, ?, ?)", address_rows)
+                    plan_rows.clear()
+                    address_rows.clear()
+            connection.executemany("INSERT OR IGNORE INTO mr_provider_plans VALUES (?, ?, ?, ?)", plan_rows)
+            connection.executemany("INSERT OR IGNORE INTO mr_provider_addresses VALUES (?, ?, ?, ?, ?, ?)", address_rows)
+    return providers
+
+
+def ingest_provider_directories(mr_url_puf, states=None, mirror_dir=None):
+    """Build the NPI index from the issuer directories listed in the Machine-readable URL PUF.
+
+    Each issuer is loaded in its own transaction; one that fails is
+    recorded as failed and its plans keep using /providers/covered. The
+    index is built beside MR_DIRECTORY_INDEX_PATH and swapped in
+    atomically. Returns counts of indexed and failed issuers and providers.
+    """
+    issuers_by_url = machine_readable_index_urls(mr_url_puf, states)
+
+    directory = os.path.dirname(MR_DIRECTORY_INDEX_PATH) or "."
+    os.makedirs(directory, exist_ok=True)
+    handle = tempfile.NamedTemporaryFile(dir=directory, suffix=".sqlite3", delete=False)
+    handle.close()
+    outcomes = {"indexed": 0, "failed": 0, "providers": 0}
+    try:
+        with closing(sqlite3.connect(handle.name, isolation_level=None)) as connection:
+            connection.executescript(
+                "CREATE TABLE mr_issuers ("
+                "issuer_id TEXT PRIMARY KEY, index_url TEXT NOT NULL, status TEXT NOT NULL, "
+                "detail TEXT NOT NULL, ingested_at TEXT NOT NULL);"
+                "CREATE TABLE mr_plans ("
+                "plan_id TEXT PRIMARY KEY, marketing_name TEXT NOT NULL, "
+                "network_tiers TEXT NOT NULL, years TEXT NOT NULL);"
+                "CREATE TABLE mr_provider_plans ("
+                "npi TEXT NOT NULL, plan_id TEXT NOT NULL, network_tier TEXT NOT NULL, years TEXT NOT NULL, "
+                "PRIMARY KEY (npi, plan_id, network_tier)) WITHOUT ROWID;"
+                "CREATE TABLE mr_provider_addresses ("
+                "npi TEXT NOT NULL, address TEXT NOT NULL, city TEXT NOT NULL, state TEXT NOT NULL, "
+                "zip TEXT NOT NULL, phone TEXT NOT NULL, UNIQUE (npi, address, city, state, zip));"
+            )
+            for index_url, issuer_ids in issuers_by_url.items():
+                connection.execute("BEGIN")
+                try:
+                    providers = ingest_directory_files(connection, index_url, mirror_dir)
+                except (requests.RequestException, OSError, ValueError, AttributeError, EOFError) as error:
+                    connection.execute("ROLLBACK")
+                    status, detail = "failed", str(error)
+                    outcomes["failed"] += 1
+                else:
+                    connection.execute("COMMIT")
+                    status, detail = "ok", f"{providers} providers"
+                    outcomes["indexed"] += 1
+                    outcomes["providers"] += providers
+                connection.executemany(
+                    "INSERT OR REPLACE INTO mr_issuers VALUES (?, ?, ?, ?, ?)",
+                    [(issuer_id, index_url, status, detail, utc_now_iso()) for issuer_id in issuer_ids],
+                )
+        os.replace(handle.name, MR_DIRECTORY_INDEX_PATH)
+    except BaseException:
+        remove_file_quietly(handle.name)
+        raise
+    return outcomes
+
+
+@lru_cache(maxsize=128)
+def get_marketplace_plan_ids(
+    issuer,
+    plan_year,
+    zipcode,
+    countyfips,
+    state,
+    plan_name_contains,
+    network_url_contains,
+):
+    """Resolve plan IDs from the PUF store, then the plan ID store, crawling /plans/search last.
+
+    Stored entries expire after PLAN_ID_CACHE_TTL_SECONDS and whenever the
+    Plan Attributes PUF date in the source freshness cache moves.
+    """
+    plan_ids = puf_store_plan_ids(
+        issuer, plan_year, zipcode, countyfips, state, plan_name_contains, network_url_contains
+    )
+    if plan_ids is not None:
+        return plan_ids
+    cache_key = json.dumps([
+        issuer,
+        plan_year,
+        zipcode,
+        countyfips,
+        state,
+        list(plan_name_contains),
+        network_url_contains,
+    ])
+    puf_marker = plan_attributes_puf_marker()
+    plan_ids = load_stored_plan_ids(cache_key, puf_marker)
+    if plan_ids is not None:
+        return plan_ids
+    plan_ids = fetch_marketplace_plan_ids(
+        issuer,
+        plan_year,
+        zipcode,
+        countyfips,
+        state,
+        plan_name_contains,
+        network_url_contains,
+    )
+    store_plan_ids(cache_key, plan_ids, puf_marker)
+    return plan_ids
+
+
+def get_network_plan_ids(network, place):
+    return get_marketplace_plan_ids(
+        network["marketplace_issuer"],
+        network["plan_year"],
+        place["zipcode"],
+        place["countyfips"],
+        place["state"],
+        tuple(network.get("marketplace_plan_name_contains", [])),
+        network.get("marketplace_network_url_contains", ""),
+    )
+
+
+class CoverageBatch:
+    """Marketplace coverage rows fetched once for many items and networks.
+
+    id_key names the row field that identifies the item ("npi" for
+    /providers/covered, "rxcui" for /drugs/covered).
+    """
+
+    def __init__(self, id_key):
+        self.id_key = id_key
+        self._years = {}
+
+    def add(self, plan_year, item_ids, plan_ids, rows):
+        self._years[plan_year] = (
+            {str(item_id) for item_id in item_ids},
+            set(plan_ids),
+            list(rows),
+        )
+
+    def rows_for(self, item_ids, plan_ids, plan_year):
+        """Return the rows for item_ids x plan_ids, or None when the batch did not cover them."""
+        entry = self._years.get(plan_year)
+        if entry is None:
+            return None
+        batch_item_ids, batch_plan_ids, rows = entry
+        item_ids = {str(item_id) for item_id in item_ids}
+        plan_ids = set(plan_ids)
+        if not item_ids <= batch_item_ids or not plan_ids <= batch_plan_ids:
+            return None
+        return [
+            row for row in rows
+            if str(row.get(self.id_key)) in item_ids and row.get("plan_id") in plan_ids
+        ]
+
+
+def fetch_coverage_batch(id_key, fetch_rows, batch_size, item_ids, networks, place):
+    """Query every item against the union of the networks' plan IDs in as few calls as possible.
+
+    Plan IDs are pooled per plan year and both lists are chunked to
+    batch_size. A plan year whose calls fail is left out, so callers fall
+    back to their own per-network lookup.
+    """
+    batch = CoverageBatch(id_key)
+    item_ids = list(dict.fromkeys(str(item_id) for item_id in item_ids if item_id))
+    marketplace_networks = [network for network in networks if network.get("marketplace_issuer")]
+    if not item_ids or not marketplace_networks:
+        return batch
+
+    def network_plan_ids(network):
+        try:
+            return get_network_plan_ids(network, place)
+        except (requests.RequestException, ValueError):
+            return None
+
+    plan_ids_by_year = {}
+    for network, plan_ids in zip(
+        marketplace_networks,
+        map_concurrently(network_plan_ids, marketplace_networks, NETWORK_CHECK_WORKERS),
+    ):
+        if plan_ids is None:
+            continue
+        year_plan_ids = plan_ids_by_year.setdefault(network["plan_year"], {})
+        year_plan_ids.update(dict.fromkeys(plan_ids))
+
+    for plan_year, plan_ids in plan_ids_by_year.items():
+        plan_ids = list(plan_ids)
+        queries = [
+            (item_group, plan_id_group)
+            for plan_id_group in chunked(plan_ids, batch_size)
+            for item_group in chunked(item_ids, batch_size)
+        ]
+        try:
+            pages = map_concurrently(
+                lambda query: fetch_rows(query[0], query[1], plan_year),
+                queries,
+                NETWORK_CHECK_WORKERS,
+            )
+        except (requests.RequestException, ValueError):
+            continue
+        batch.add(plan_year, item_ids, plan_ids, (row for page in pages for row in page))
+    return batch
+
+
+PROVIDER_COVERAGE_BATCH_SIZE = 10
+
+
+def directory_provider_coverage_rows(npis, plan_ids, plan_year):
+    """Answer /providers/covered from the issuer directory index where it can.
+
+    A plan listed in an indexed issuer's plans.json for plan_year is
+    answered here when every NPI is listed in it, as Covered rows. A
+    provider missing from a directory file is not evidence that it is out
+    of network, so any other plan is left for the API. Returns the rows and
+    the remaining plan IDs.
+    """
+    plan_ids = list(plan_ids)
+    if not os.path.exists(MR_DIRECTORY_INDEX_PATH) or not npis or not plan_ids:
+        return [], plan_ids
+    npis = [str(npi) for npi in npis]
+    issuer_ids = sorted({plan_id[:5] for plan_id in plan_ids})
+    try:
+        with closing(sqlite3.connect(MR_DIRECTORY_INDEX_PATH, timeout=5)) as connection:
+            indexed_issuers = {
+                row[0] for row in connection.execute(
+                    f"SELECT issuer_id FROM mr_issuers WHERE status = 'ok' "
+                    f"AND issuer_id IN ({','.join('?' * len(issuer_ids))})",
+                    issuer_ids,
+                )
+            }
+            candidate_plan_ids = [plan_id for plan_id in plan_ids if plan_id[:5] in indexed_issuers]
+            if not candidate_plan_ids:
+                return [], plan_ids
+            listed_plans = {
+                plan_id for plan_id, years in connection.execute(
+                    f"SELECT plan_id, years FROM mr_plans "
+                    f"WHERE plan_id IN ({','.join('?' * len(candidate_plan_ids))})",
+                    candidate_plan_ids,
+                )
+                if not years or f",{plan_year}," in years
+            }
+            indexed_plan_ids = [plan_id for plan_id in candidate_plan_ids if plan_id in listed_plans]
+            if not indexed_plan_ids:
+                return [], plan_ids
+            listed = connection.execute(
+                f"SELECT npi, plan_id, years FROM mr_provider_plans "
+                f"WHERE npi IN ({','.join('?' * len(npis))}) "
+                f"AND plan_id IN ({','.join('?' * len(indexed_plan_ids))})",
+                [*npis, *indexed_plan_ids],
+            ).fetchall()
+    except (OSError, sqlite3.Error):
+        return [], plan_ids
+    covered = {
+        (npi, plan_id)
+        for npi, plan_id, years in listed
+        if not years or f",{plan_year}," in years
+    }
+    answered = {
+        plan_id for plan_id in indexed_plan_ids
+        if all((npi, plan_id) in covered for npi in npis)
+    }
+    rows = [
+        {"npi": npi, "plan_id": plan_id, "coverage": "Covered", "source": "issuer_directory"}
+        for plan_id in indexed_plan_ids
+        if plan_id in answered
+        for npi in npis
+    ]
+    return rows, [plan_id for plan_id in plan_ids if plan_id not in answered]
+
+
+def fetch_provider_coverage_rows(npis, plan_ids, plan_year):
+    rows, plan_ids = directory_provider_coverage_rows(npis, plan_ids, plan_year)
+    if not plan_ids:
+        return rows
+    response = http_get(
+        f"{CMS_MARKETPLACE_API}/providers/covered",
+        params={
+            "apikey": CMS_MARKETPLACE_API_KEY,
+            "providerids": ",".join(npis),
+            "planids": ",".join(plan_ids),
+            "year": plan_year,
+        },
+        timeout=NETWORK_LOOKUP_TIMEOUT,
+    )
+    response.raise_for_status()
+    return rows + response.json().get("coverage", [])
+
+
+def fetch_provider_coverage_batch(npis, networks, place):
+    return fetch_coverage_batch(
+        "npi", fetch_provider_coverage_rows, PROVIDER_COVERAGE_BATCH_SIZE, npis, networks, place
+    )
+
+
+def coverage_evidence(coverage_rows):
+    """Return the status source label and the sentence subject for coverage rows."""
+    from_directory = sum(1 for row in coverage_rows if row.get("source") == "issuer_directory")
+    if not from_directory:
+        return "CMS Marketplace API", "CMS"
+    if from_directory == len(coverage_rows):
+        return "Issuer provider directory", "The issuer's provider directory"
+    return "CMS Marketplace API + issuer provider directory", "CMS and the issuer's provider directory"
+
+
+def check_marketplace_network_status(provider_name, provider_type, npi_results, network, place, coverage_batch=None):
+    expected_npis = {
+        str(result.get("npi"))
+        for result in npi_results
+        if result.get("npi")
+    }
+    if not expected_npis:
+        return make_network_status(
+            "not_found",
+            "NPI Registry",
+            "Provider was not found in the NPI Registry.",
+        )
+
+    try:
+        plan_ids = get_network_plan_ids(network, place)
+    except (requests.RequestException, ValueError) as error:
+        return make_network_status(
+            "lookup_error",
+            "CMS Marketplace API",
+            f"Marketplace plan lookup failed: {error}",
+        )
+
+    if not plan_ids:
+        return make_network_status(
+            "not_offered",
+            "CMS Marketplace API",
+            f"No matching Marketplace plans found for {network['name']} in {place['zipcode']}.",
+        )
+
+    coverage_rows = None
+    if coverage_batch is not None:
+        coverage_rows = coverage_batch.rows_for(expected_npis, plan_ids, network["plan_year"])
+    if coverage_rows is None:
+        coverage_rows = []
+        try:
+            for plan_id_group in chunked(plan_ids, PROVIDER_COVERAGE_BATCH_SIZE):
+                coverage_rows.extend(
+                    row for row in fetch_provider_coverage_rows(
+                        sorted(expected_npis), plan_id_group, network["plan_year"]
+                    )
+                    if str(row.get("npi")) in expected_npis and row.get("plan_id") in plan_ids
+                )
+        except (requests.RequestException, ValueError) as error:
+            return make_network_status(
+                "lookup_error",
+                "CMS Marketplace API",
+                f"Marketplace coverage lookup failed: {error}",
             )
-    except (requests.RequestException, ValueError) as error:
-        return make_network_status(
-            "lookup_error",
-            "CMS Marketplace API",
-            f"Marketplace coverage lookup failed: {error}",
-        )
 
     if not coverage_rows:
         return make_network_status(
@@ -4503,6 +6057,7 @@ def check_marketplace_network_status(provider_name, provider_type, npi_results,
             "Marketplace coverage returned no record matching the NPI Registry match.",
         )
 
+    source, evidence = coverage_evidence(coverage_rows)
     covered_rows = [
         row for row in coverage_rows
         if str(row.get("coverage", "")).lower() == "covered"
@@ -4513,25 +6068,25 @@ def check_marketplace_network_status(provider_name, provider_type, npi_results,
         if len(covered_plan_ids) < len(plan_ids):
             return make_network_status(
                 "partial_coverage",
-                "CMS Marketplace API",
-                f"CMS shows at least one NPI Registry match covered in {len(covered_plan_ids)} of {len(plan_ids)} matching plan IDs. {len(covered_npis)} of {len(expected_npis)} NPI matches had a Covered row; confirm the exact NPI and plan before treating this as fully in-network.",
+                source,
+                f"{evidence} shows at least one NPI Registry match covered in {len(covered_plan_ids)} of {len(plan_ids)} matching plan IDs. {len(covered_npis)} of {len(expected_npis)} NPI matches had a Covered row; confirm the exact NPI and plan before treating this as fully in-network.",
             )
         if len(covered_npis) < len(expected_npis):
             return make_network_status(
                 "likely_in",
-                "CMS Marketplace API",
-                f"CMS shows at least one NPI Registry match covered in all {len(plan_ids)} matching plan IDs. {len(covered_npis)} of {len(expected_npis)} NPI matches had a Covered row; confirm the exact NPI/location.",
+                source,
+                f"{evidence} shows at least one NPI Registry match covered in all {len(plan_ids)} matching plan IDs. {len(covered_npis)} of {len(expected_npis)} NPI matches had a Covered row; confirm the exact NPI/location.",
             )
         return make_network_status(
             "in",
-            "CMS Marketplace API",
-            f"CMS shows {provider_name} covered in {len(covered_plan_ids)} of {len(plan_ids)} matching plan IDs.",
+            source,
+            f"{evidence} shows {provider_name} covered in {len(covered_plan_ids)} of {len(plan_ids)} matching plan IDs.",
         )
 
     return make_network_status(
         "out",
-        "CMS Marketplace API",
-        f"CMS checked {len(plan_ids)} matching plan IDs and did not mark the NPI covered.",
+        source,
+        f"{evidence} checked {len(plan_ids)} matching plan IDs and did not mark the NPI covered.",
     )
 
 
@@ -4612,14 +6167,146 @@ def formulary_sources_for_network(network):
     return []
 
 
+def formulary_pdf_pages(content):
+    reader = PdfReader(BytesIO(content))
+    return [page.extract_text() or "" for page in reader.pages]
+
+
 @lru_cache(maxsize=16)
 def formulary_pdf_text(url):
     if PdfReader is None:
         return ""
-    response = requests.get(url, timeout=NETWORK_LOOKUP_TIMEOUT)
+    response = http_get(url, timeout=NETWORK_LOOKUP_TIMEOUT)
     response.raise_for_status()
-    reader = PdfReader(BytesIO(response.content))
-    return "\n".join(page.extract_text() or "" for page in reader.pages)
+    return "\n".join(formulary_pdf_pages(response.content))
+
+
+def pdf_page_count(path):
+    return len(PdfReader(path).pages)
+
+
+def extract_pdf_pages(path, start, stop):
+    reader = PdfReader(path)
+    return [reader.pages[number].extract_text() or "" for number in range(start, stop)]
+
+
+_pdf_process_pool = None
+_pdf_process_pool_lock = threading.Lock()
+
+
+def pdf_process_pool():
+    global _pdf_process_pool
+    with _pdf_process_pool_lock:
+        if _pdf_process_pool is None:
+            # forkserver keeps workers from inheriting the request threads' locks.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+            _pdf_process_pool = ProcessPoolExecutor(
+                max_workers=FORMULARY_PDF_WORKERS,
+                mp_context=context,
+            )
+        return _pdf_process_pool
+
+
+def download_to_temporary_file(url, suffix=""):
+    response = http_get(url, timeout=NETWORK_LOOKUP_TIMEOUT, stream=True)
+    with closing(response):
+        response.raise_for_status()
+        handle = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+        try:
+            with handle:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    handle.write(chunk)
+        except BaseException:
+            os.remove(handle.name)
+            raise
+    return handle.name
+
+
+def remove_file_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class FormularyPdfDocument:
+    """A formulary PDF read lazily, a batch of pages at a time, from a temp file.
+
+    The download is streamed to disk so the raw PDF never sits in memory, and
+    pages are extracted across the PDF process pool. Lookups stop reading as
+    soon as the first match is settled, and later lookups resume where the
+    last one stopped. The temp file is removed once every page has been read.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.path = None
+        self.page_count = None
+        self.pages_read = 0
+        self.text_index = FormularyTextIndex()
+        self.lock = threading.Lock()
+
+    @property
+    def complete(self):
+        return self.page_count is not None and self.pages_read >= self.page_count
+
+    def open(self):
+        self.path = download_to_temporary_file(self.url, suffix=".pdf")
+        self._finalizer = weakref.finalize(self, remove_file_quietly, self.path)
+        self.page_count = pdf_page_count(self.path)
+        if not self.page_count:
+            self._finalizer()
+
+    def read_more_pages(self):
+        workers = max(1, FORMULARY_PDF_WORKERS)
+        chunk_size = max(1, FORMULARY_PDF_PAGES_PER_WORKER)
+        start = self.pages_read
+        stop = min(self.page_count, start + workers * chunk_size)
+        ranges = [
+            (chunk_start, min(stop, chunk_start + chunk_size))
+            for chunk_start in range(start, stop, chunk_size)
+        ]
+        if workers == 1 or len(ranges) == 1:
+            chunks = [extract_pdf_pages(self.path, *page_range) for page_range in ranges]
+        else:
+            paths = [self.path] * len(ranges)
+            chunks = pdf_process_pool().map(
+                extract_pdf_pages,
+                paths,
+                [page_range[0] for page_range in ranges],
+                [page_range[1] for page_range in ranges],
+            )
+        for pages in chunks:
+            for page_text in pages:
+                self.text_index.add_text(page_text)
+        self.pages_read = stop
+        if self.complete:
+            self._finalizer()
+
+    def search_for_tier(self, terms):
+        with self.lock:
+            if self.page_count is None:
+                self.open()
+            while True:
+                index, match = first_formulary_tier_match(self.text_index, terms)
+                # A match is final once every earlier line has its full 5-line window.
+                if match and (self.complete or index + 5 <= len(self.text_index.lines)):
+                    return match
+                if self.complete:
+                    return {}
+                self.read_more_pages()
+
+
+@lru_cache(maxsize=16)
+def formulary_pdf_document(url):
+    return FormularyPdfDocument(url)
+
+
+def search_formulary_pdf_for_tier(url, terms):
+    if PdfReader is None:
+        return {}
+    return formulary_pdf_document(url).search_for_tier(terms)
 
 
 def formulary_lookup_terms(prescription):
@@ -4637,57 +6324,281 @@ def formulary_lookup_terms(prescription):
     return terms
 
 
-def formulary_line_tier(line):
-    text = re.sub(r"\([^)]*\)", " ", line)
-    text = re.sub(r"\d+\.\d+", " ", text)
-    requirement_match = re.search(
-        r"(?<![\w.-])([1-6])(?![\w.-])\s+(?:LD,\s*)?(?:PA|ST|QL|AC|LD)\b",
-        text,
-        re.IGNORECASE,
-    )
-    if requirement_match:
-        return requirement_match.group(1)
-    matches = re.findall(r"(?<![\w.-])([1-6])(?![\w.-])", text)
-    return matches[-1] if matches else ""
+FORMULARY_REQUIREMENT_LABELS = ("PA", "ST", "QL", "AC")
+# Parenthesized notes and decimal strengths never hold a tier; blank both in one pass.
+FORMULARY_TIER_NOISE_PATTERN = re.compile(r"\([^)]*\)|\d+\.\d+")
+FORMULARY_TIER_PATTERN = re.compile(
+    r"(?<![\w.-])([1-6])(?![\w.-])(\s+(?:LD,\s*)?(?:PA|ST|QL|AC|LD)\b)?",
+    re.IGNORECASE,
+)
+FORMULARY_REQUIREMENT_PATTERN = re.compile(r"\b(PA|ST|QL|AC)\b", re.IGNORECASE)
 
 
-def formulary_line_requirements(line):
-    requirements = []
-    for label in ("PA", "ST", "QL", "AC"):
-        if re.search(rf"\b{label}\b", line, re.IGNORECASE):
-            requirements.append(label)
-    return " ".join(requirements)
+def formulary_line_tier_and_requirements(line):
+    """Return (tier, requirements) for a formulary line or window.
+
+    A tier followed by a utilization-management code wins; otherwise the
+    last standalone 1-6 on the line is the tier.
+    """
+    tier = ""
+    text = FORMULARY_TIER_NOISE_PATTERN.sub(" ", line) if "(" in line or "." in line else line
+    for match in FORMULARY_TIER_PATTERN.finditer(text):
+        tier = match.group(1)
+        if match.group(2):
+            break
+    found = {label.upper() for label in FORMULARY_REQUIREMENT_PATTERN.findall(line)}
+    requirements = " ".join(label for label in FORMULARY_REQUIREMENT_LABELS if label in found)
+    return tier, requirements
+
+
+class FormularyTextIndex:
+    """Inverted index from normalized tokens to the formulary lines holding them.
+
+    Search terms are matched as substrings of normalized lines, so only the
+    inner tokens of a term must equal line tokens: its last token may be a
+    prefix of one, its first a suffix, and a single-token term may sit
+    anywhere inside one. Exact tokens come straight from the index; prefixes
+    are found by bisecting the sorted vocabulary, and suffix or infix hits by
+    bisecting the sorted token suffixes. Each candidate line is then
+    confirmed with the same substring test as a full scan.
+    """
+
+    UPPER_BOUND = "\U0010ffff"
+
+    def __init__(self, text=""):
+        self.lines = []
+        self.normalized_lines = []
+        self.token_lines = {}
+        self._vocabulary = []
+        self._suffixes = []
+        self._new_tokens = []
+        self._sort_lock = threading.Lock()
+        self.add_text(text)
+
+    def add_text(self, text):
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            offset = len(self.lines)
+            normalized_line = normalize_search_text(line)
+            self.lines.append(line)
+            self.normalized_lines.append(normalized_line)
+            for token in set(normalized_line.split()):
+                token_offsets = self.token_lines.get(token)
+                if token_offsets is None:
+                    token_offsets = self.token_lines[token] = []
+                    self._new_tokens.append(token)
+                token_offsets.append(offset)
+
+    def _sorted_vocabulary(self):
+        """Merge tokens added since the last search into the sorted lists."""
+        with self._sort_lock:
+            if self._new_tokens:
+                new_tokens, self._new_tokens = self._new_tokens, []
+                self._vocabulary = sorted(self._vocabulary + new_tokens)
+                self._suffixes = sorted(self._suffixes + [
+                    (token[start:], token)
+                    for token in new_tokens
+                    for start in range(len(token))
+                ])
+            return self._vocabulary, self._suffixes
+
+    def tokens_with_prefix(self, prefix):
+        vocabulary, _ = self._sorted_vocabulary()
+        start = bisect_left(vocabulary, prefix)
+        end = bisect_left(vocabulary, prefix + self.UPPER_BOUND, start)
+        return vocabulary[start:end]
+
+    def tokens_with_suffix(self, suffix, anywhere=False):
+        """Tokens ending with suffix, or containing it anywhere."""
+        _, suffixes = self._sorted_vocabulary()
+        start = bisect_left(suffixes, (suffix,))
+        end = bisect_left(suffixes, (suffix + (self.UPPER_BOUND if anywhere else "\0"),), start)
+        return {token for _, token in suffixes[start:end]}
+
+    def lines_with_tokens(self, tokens):
+        offsets = set()
+        for token in tokens:
+            offsets.update(self.token_lines.get(token, ()))
+        return offsets
+
+    def matching_offsets(self, normalized_term):
+        term_tokens = normalized_term.split()
+        if len(term_tokens) == 1:
+            token_groups = [self.tokens_with_suffix(term_tokens[0], anywhere=True)]
+        else:
+            # Exact inner tokens narrow the candidates fastest, so they go first.
+            token_groups = [(token,) for token in term_tokens[1:-1]]
+            token_groups.append(self.tokens_with_prefix(term_tokens[-1]))
+            token_groups.append(self.tokens_with_suffix(term_tokens[0]))
+        candidates = None
+        for tokens in token_groups:
+            token_offsets = self.lines_with_tokens(tokens)
+            candidates = token_offsets if candidates is None else candidates & token_offsets
+            if not candidates:
+                return set()
+        return {
+            offset for offset in candidates or ()
+            if normalized_term in self.normalized_lines[offset]
+        }
 
 
-def search_formulary_text_for_tier(text, terms):
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    normalized_terms = [normalize_search_text(term) for term in terms if term]
-    for index, line in enumerate(lines):
-        normalized_line = normalize_search_text(line)
-        if not any(term and term in normalized_line for term in normalized_terms):
-            continue
-        tier = formulary_line_tier(line)
+@lru_cache(maxsize=16)
+def formulary_text_index(text):
+    return FormularyTextIndex(text)
+
+
+def first_formulary_tier_match(text_index, terms):
+    """Return (line offset, tier match) for the first matching line with a tier."""
+    lines = text_index.lines
+    offsets = set()
+    for term in terms:
+        normalized_term = normalize_search_text(term) if term else ""
+        if normalized_term:
+            offsets |= text_index.matching_offsets(normalized_term)
+    for index in sorted(offsets):
+        tier, requirements = formulary_line_tier_and_requirements(lines[index])
+        if not tier:
+            window = " ".join(lines[index:index + 5])
+            tier, requirements = formulary_line_tier_and_requirements(window)
         if tier:
-            return {
+            return index, {
                 "tier_label": f"Tier {tier}",
                 "tier_detail": f"Drug Tier: {tier}",
-                "restriction_label": formulary_line_requirements(line),
+                "restriction_label": requirements,
             }
-        window = " ".join(lines[index:index + 5])
-        tier = formulary_line_tier(window)
-        if tier:
-            return {
-                "tier_label": f"Tier {tier}",
-                "tier_detail": f"Drug Tier: {tier}",
-                "restriction_label": formulary_line_requirements(window),
-            }
-    return {}
+    return None, {}
 
 
-def lookup_formulary_tier(prescription, network):
-    for tier in lookup_formulary_tiers(prescription, network):
-        if tier.get("tier_label"):
-            return tier
+def search_formulary_text_for_tier(text, terms):
+    return first_formulary_tier_match(formulary_text_index(text), terms)[1]
+
+
+def formulary_index_rows(pages):
+    """Precompute the tier match for every formulary line, keeping page numbers.
+
+    Mirrors search_formulary_text_for_tier: a line's own tier wins, else the
+    tier found in the 5-line window starting at it. Lines with neither can
+    never match, so they are dropped.
+    """
+    lines = [
+        (page_number, line.strip())
+        for page_number, page_text in enumerate(pages, start=1)
+        for line in page_text.splitlines()
+        if line.strip()
+    ]
+    rows = []
+    for index, (page_number, line) in enumerate(lines):
+        tier, requirements = formulary_line_tier_and_requirements(line)
+        if not tier:
+            window = " ".join(window_line for _, window_line in lines[index:index + 5])
+            tier, requirements = formulary_line_tier_and_requirements(window)
+        if not tier:
+            continue
+        rows.append({
+            "drug": normalize_search_text(line),
+            "tier": tier,
+            "restrictions": requirements,
+            "page": page_number,
+        })
+    return rows
+
+
+def formulary_index_path(url):
+    return os.path.join(FORMULARY_INDEX_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest()[:24] + ".json")
+
+
+@lru_cache(maxsize=32)
+def read_formulary_index_file(path, mtime_ns):
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def load_formulary_index(url):
+    path = formulary_index_path(url)
+    try:
+        index = read_formulary_index_file(path, os.stat(path).st_mtime_ns)
+    except (OSError, ValueError):
+        return None
+    if index.get("url") != url:
+        return None
+    return index
+
+
+def save_formulary_index(index):
+    path = formulary_index_path(index["url"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as handle:
+        json.dump(index, handle, indent=1, sort_keys=True)
+    os.replace(temporary_path, path)
+
+
+def ingest_formulary_source(url):
+    """Parse a formulary PDF into its stored index unless the stored one is current.
+
+    The index is keyed by URL and records the ETag and content hash it was
+    built from: a 304 or an unchanged ETag skips the download, and an
+    unchanged content hash skips the parse.
+    """
+    previous = load_formulary_index(url) or {}
+    validators = {key: previous[key] for key in ("etag", "last_modified") if previous.get(key)}
+    metadata = check_url_metadata(url, validators)
+    if previous and (
+        metadata.get("not_modified")
+        or (metadata.get("etag") and metadata["etag"] == previous.get("etag"))
+    ):
+        return previous, "unchanged"
+
+    response = http_get(url, timeout=NETWORK_LOOKUP_TIMEOUT)
+    response.raise_for_status()
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    if previous and previous.get("content_hash") == content_hash:
+        rows = previous.get("rows", [])
+        outcome = "unchanged"
+    else:
+        rows = formulary_index_rows(formulary_pdf_pages(response.content))
+        outcome = "indexed"
+    index = {
+        "url": url,
+        "etag": response_header(response, "ETag") or metadata.get("etag", ""),
+        "last_modified": response_header(response, "Last-Modified") or metadata.get("last_modified", ""),
+        "content_hash": content_hash,
+        "indexed_at": utc_now_iso(),
+        "rows": rows,
+    }
+    save_formulary_index(index)
+    return index, outcome
+
+
+def ingest_formulary_sources():
+    outcomes = Counter()
+    if PdfReader is None:
+        print("  pypdf is not installed; formulary PDFs cannot be indexed.", file=sys.stderr)
+        return outcomes
+    for source in flatten_carrier_sources():
+        if source.get("kind") != FORMULARY or source.get("validation") != HTTP_200_PDF:
+            continue
+        try:
+            _, outcome = ingest_formulary_source(source["url"])
+        except (requests.RequestException, ValueError, OSError) as error:
+            print(f"  {source['carrier']} {source['name']}: failed ({error})", file=sys.stderr)
+            outcome = "failed"
+        outcomes[outcome] += 1
+    return outcomes
+
+
+def search_formulary_index_for_tier(index, terms):
+    normalized_terms = [normalize_search_text(term) for term in terms if term]
+    for row in index.get("rows", []):
+        if any(term and term in row["drug"] for term in normalized_terms):
+            return {
+                "tier_label": f"Tier {row['tier']}",
+                "tier_detail": f"Drug Tier: {row['tier']}",
+                "restriction_label": row.get("restrictions", ""),
+                "formulary_page": row.get("page"),
+            }
     return {}
 
 
@@ -4703,13 +6614,19 @@ def lookup_formulary_tiers(prescription, network):
             "tier_detail": "",
             "restriction_label": "",
         }
-        try:
-            text = formulary_pdf_text(source["url"])
-        except (requests.RequestException, ValueError):
-            tier["tier_detail"] = "Formulary unavailable"
-            tiers.append(tier)
-            continue
-        match = search_formulary_text_for_tier(text, terms)
+        index = load_formulary_index(source["url"])
+        if index is not None:
+            match = search_formulary_index_for_tier(index, terms)
+        else:
+            try:
+                if FORMULARY_PDF_STREAMING:
+                    match = search_formulary_pdf_for_tier(source["url"], terms)
+                else:
+                    match = search_formulary_text_for_tier(formulary_pdf_text(source["url"]), terms)
+            except (requests.RequestException, ValueError, OSError):
+                tier["tier_detail"] = "Formulary unavailable"
+                tiers.append(tier)
+                continue
         if match:
             tier.update(match)
         else:
@@ -4849,7 +6766,31 @@ def related_rxcui_coverage_status(prescription, related_rows, plan_ids, selected
     )
 
 
-def check_marketplace_drug_status(prescription, network, place):
+DRUG_COVERAGE_BATCH_SIZE = 10
+
+
+def fetch_drug_coverage_rows(rxcuis, plan_ids, plan_year):
+    response = http_get(
+        f"{CMS_MARKETPLACE_API}/drugs/covered",
+        params={
+            "apikey": CMS_MARKETPLACE_API_KEY,
+            "drugs": ",".join(rxcuis),
+            "planids": ",".join(plan_ids),
+            "year": plan_year,
+        },
+        timeout=NETWORK_LOOKUP_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json().get("coverage", [])
+
+
+def fetch_drug_coverage_batch(rxcuis, networks, place):
+    return fetch_coverage_batch(
+        "rxcui", fetch_drug_coverage_rows, DRUG_COVERAGE_BATCH_SIZE, rxcuis, networks, place
+    )
+
+
+def check_marketplace_drug_status(prescription, network, place, coverage_batch=None):
     if not prescription.get("drug_found") or not prescription.get("rxcui"):
         return make_network_status(
             "not_found",
@@ -4875,31 +6816,23 @@ def check_marketplace_drug_status(prescription, network, place):
 
     rxcui = str(prescription["rxcui"])
     candidate_rxcuis = prescription_candidate_rxcuis(prescription)
-    coverage_rows = []
-    try:
-        for plan_id_group in chunked(plan_ids, 10):
-            response = requests.get(
-                f"{CMS_MARKETPLACE_API}/drugs/covered",
-                params={
-                    "apikey": CMS_MARKETPLACE_API_KEY,
-                    "drugs": ",".join(candidate_rxcuis),
-                    "planids": ",".join(plan_id_group),
-                    "year": network["plan_year"],
-                },
-                timeout=NETWORK_LOOKUP_TIMEOUT,
-            )
-            response.raise_for_status()
-            data = response.json()
-            coverage_rows.extend(
-                row for row in data.get("coverage", [])
-                if str(row.get("rxcui")) in candidate_rxcuis and row.get("plan_id") in plan_ids
+    coverage_rows = None
+    if coverage_batch is not None:
+        coverage_rows = coverage_batch.rows_for(candidate_rxcuis, plan_ids, network["plan_year"])
+    if coverage_rows is None:
+        coverage_rows = []
+        try:
+            for plan_id_group in chunked(plan_ids, DRUG_COVERAGE_BATCH_SIZE):
+                coverage_rows.extend(
+                    row for row in fetch_drug_coverage_rows(candidate_rxcuis, plan_id_group, network["plan_year"])
+                    if str(row.get("rxcui")) in candidate_rxcuis and row.get("plan_id") in plan_ids
+                )
+        except (requests.RequestException, ValueError) as error:
+            return make_network_status(
+                "lookup_error",
+                "CMS Marketplace API",
+                f"Marketplace drug coverage lookup failed: {error}",
             )
-    except (requests.RequestException, ValueError) as error:
-        return make_network_status(
-            "lookup_error",
-            "CMS Marketplace API",
-            f"Marketplace drug coverage lookup failed: {error}",
-        )
 
     selected_rows = [
         row for row in coverage_rows
@@ -5059,26 +6992,40 @@ def check_marketplace_drug_status(prescription, network, place):
     )
 
 
-def check_network_statuses(provider_name, provider_type, npi_results, networks, place):
-    statuses = {}
-    for network in networks:
-        if provider_type == "not_found":
-            statuses[network["id"]] = make_network_status(
-                "not_found",
-                "NPI Registry",
-                "Provider was not found in the NPI Registry.",
-            )
-        elif network.get("marketplace_issuer"):
-            statuses[network["id"]] = check_marketplace_network_status(
-                provider_name, provider_type, npi_results, network, place
-            )
-        else:
-            statuses[network["id"]] = make_network_status(
-                "not_configured",
-                "Provider Finder",
-                "No public lookup is configured for this network.",
-            )
-    return statuses
+def check_network_status(provider_name, provider_type, npi_results, network, place, coverage_batch=None):
+    if provider_type == "not_found":
+        return make_network_status(
+            "not_found",
+            "NPI Registry",
+            "Provider was not found in the NPI Registry.",
+        )
+    if network.get("marketplace_issuer"):
+        return check_marketplace_network_status(
+            provider_name, provider_type, npi_results, network, place,
+            coverage_batch=coverage_batch,
+        )
+    return make_network_status(
+        "not_configured",
+        "Provider Finder",
+        "No public lookup is configured for this network.",
+    )
+
+
+def check_network_statuses(provider_name, provider_type, npi_results, networks, place, max_workers=None,
+                           coverage_batch=None):
+    workers = NETWORK_CHECK_WORKERS if max_workers is None else max_workers
+    statuses = map_concurrently(
+        lambda network: check_network_status(
+            provider_name, provider_type, npi_results, network, place,
+            coverage_batch=coverage_batch,
+        ),
+        networks,
+        workers,
+    )
+    return {
+        network["id"]: status
+        for network, status in zip(networks, statuses)
+    }
 
 
 def apply_confirmed_carrier_network_statuses(statuses, provider_name, networks, confirmed_network_ids):
@@ -5096,23 +7043,32 @@ def apply_confirmed_carrier_network_statuses(statuses, provider_name, networks,
     return statuses
 
 
-def check_prescription_statuses(prescription, networks, place):
-    statuses = {}
-    for network in networks:
-        if network.get("marketplace_issuer"):
-            status = check_marketplace_drug_status(
-                prescription, network, place
-            )
-            statuses[network["id"]] = enrich_status_with_formulary_tier(
-                status, prescription, network
-            )
-        else:
-            statuses[network["id"]] = make_network_status(
-                "not_configured",
-                "Provider Finder",
-                "No public lookup is configured for this network.",
-            )
-    return statuses
+def check_prescription_status(prescription, network, place, coverage_batch=None):
+    if not network.get("marketplace_issuer"):
+        return make_network_status(
+            "not_configured",
+            "Provider Finder",
+            "No public lookup is configured for this network.",
+        )
+    status = check_marketplace_drug_status(
+        prescription, network, place, coverage_batch=coverage_batch
+    )
+    return enrich_status_with_formulary_tier(status, prescription, network)
+
+
+def check_prescription_statuses(prescription, networks, place, max_workers=None, coverage_batch=None):
+    workers = NETWORK_CHECK_WORKERS if max_workers is None else max_workers
+    statuses = map_concurrently(
+        lambda network: check_prescription_status(
+            prescription, network, place, coverage_batch=coverage_batch
+        ),
+        networks,
+        workers,
+    )
+    return {
+        network["id"]: status
+        for network, status in zip(networks, statuses)
+    }
 
 
 def checked_formulary_matches_for_drugs(drugs, networks, place):
@@ -5125,6 +7081,7 @@ def checked_formulary_matches_for_drugs(drugs, networks, place):
     if not rxcuis:
         return matches_by_rxcui
 
+    coverage_batch = fetch_drug_coverage_batch(rxcuis, networks, place)
     for network in networks:
         if not network.get("marketplace_issuer"):
             continue
@@ -5134,38 +7091,26 @@ def checked_formulary_matches_for_drugs(drugs, networks, place):
             continue
         if not plan_ids:
             continue
-
-        coverage_rows = []
-        try:
-            for plan_id_group in chunked(plan_ids, 10):
-                for rxcui_group in chunked(rxcuis, 10):
-                    response = requests.get(
-                        f"{CMS_MARKETPLACE_API}/drugs/covered",
-                        params={
-                            "apikey": CMS_MARKETPLACE_API_KEY,
-                            "drugs": ",".join(rxcui_group),
-                            "planids": ",".join(plan_id_group),
-                            "year": network["plan_year"],
-                        },
-                        timeout=NETWORK_LOOKUP_TIMEOUT,
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                    coverage_rows.extend(
-                        row for row in data.get("coverage", [])
-                        if str(row.get("rxcui")) in rxcui_group
-                        and row.get("plan_id") in plan_ids
-                        and row.get("coverage") in {"Covered", "GenericCovered"}
-                    )
-        except (requests.RequestException, ValueError):
-            continue
+        coverage_rows = coverage_batch.rows_for(rxcuis, plan_ids, network["plan_year"])
+        if coverage_rows is None:
+            coverage_rows = []
+            try:
+                for plan_id_group in chunked(plan_ids, DRUG_COVERAGE_BATCH_SIZE):
+                    for rxcui_group in chunked(rxcuis, DRUG_COVERAGE_BATCH_SIZE):
+                        coverage_rows.extend(
+                            row for row in fetch_drug_coverage_rows(rxcui_group, plan_id_group, network["plan_year"])
+                            if row.get("plan_id") in plan_ids
+                        )
+            except (requests.RequestException, ValueError):
+                continue
+        covered_rxcuis = {
+            str(row.get("rxcui"))
+            for row in coverage_rows
+            if row.get("coverage") in {"Covered", "GenericCovered"}
+        }
 
         for rxcui in rxcuis:
-            matching_rows = [
-                row for row in coverage_rows
-                if str(row.get("rxcui")) == rxcui
-            ]
-            if not matching_rows:
+            if rxcui not in covered_rxcuis:
                 continue
             matches_by_rxcui[rxcui].append({
                 "carrier": network["carrier"],
@@ -5318,14 +7263,101 @@ def carrier_source_groups_for_selection(selected_carriers):
     ]
 
 
+def build_provider_result(doctor, provider_name, resolved_provider_type, provider_npi_results,
+                          bcbstx_urls, uhc_urls, networks, network_statuses):
+    confirmed_network_ids = [
+        *doctor.get("confirmed_network_ids", []),
+        *confirmed_carrier_network_ids_for_provider(
+            provider_name, resolved_provider_type, provider_npi_results
+        ),
+    ]
+    confirmed_network_ids = list(dict.fromkeys(confirmed_network_ids))
+    network_statuses = apply_confirmed_carrier_network_statuses(
+        network_statuses, provider_name, networks, confirmed_network_ids
+    )
+    return {
+        "provider": provider_name,
+        "doctor": provider_name,
+        "requested_provider": doctor["name"],
+        "provider_type": resolved_provider_type,
+        "requested_provider_type": doctor["provider_type"],
+        "provider_group": provider_result_group(doctor["provider_type"], resolved_provider_type),
+        "specialty_filter": doctor["specialty"],
+        "address": doctor.get("address", ""),
+        "location": doctor.get("location", ""),
+        "source": doctor.get("source", ""),
+        "source_detail": doctor.get("source_detail", ""),
+        "selection_type": doctor.get("selection_type", ""),
+        "confirmed_network_ids": confirmed_network_ids,
+        "npi_found": len(provider_npi_results) > 0,
+        "npi_count": len(provider_npi_results),
+        "npi_results": provider_npi_results[:5],
+        "bcbstx_urls": bcbstx_urls,
+        "uhc_urls": uhc_urls,
+        "networks": networks,
+        "network_statuses": network_statuses,
+    }
+
+
+def search_deadline_statuses(networks, deadline_seconds):
+    return {
+        network["id"]: make_network_status(
+            "lookup_error",
+            "Search deadline",
+            f"Lookup did not finish within {deadline_seconds:g} seconds. Run the search again for this row.",
+        )
+        for network in networks
+    }
+
+
+_index_page = None
+_index_page_lock = threading.Lock()
+
+
+def index_page_variants():
+    """Render HTML_TEMPLATE once and keep identity, gzip and (if available) brotli bodies.
+
+    The template has no per-request variables, so every response can reuse
+    the same bytes; each encoding gets its own strong ETag.
+    """
+    global _index_page
+    if _index_page is None:
+        with _index_page_lock:
+            if _index_page is None:
+                body = render_template_string(HTML_TEMPLATE).encode("utf-8")
+                digest = hashlib.sha256(body).hexdigest()[:32]
+                variants = {}
+                if brotli is not None:
+                    variants["br"] = (brotli.compress(body), f"{digest}-br")
+                variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f"{digest}-gz")
+                variants["identity"] = (body, digest)
+                _index_page = variants
+    return _index_page
+
+
 @app.route("/")
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    variants = index_page_variants()
+    encoding = request.accept_encodings.best_match(list(variants), default="identity")
+    body, etag = variants[encoding]
+    response = make_response(body)
+    response.content_type = "text/html; charset=utf-8"
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = INDEX_CACHE_MAX_AGE
+    return response.make_conditional(request)
 
 
 @app.route("/sources/status")
 def sources_status():
-    return jsonify(source_freshness_summary())
+    summary, etag = source_freshness_status()
+    response = jsonify(summary)
+    response.set_etag(etag, weak=True)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 
 @app.route("/drugs/search")
@@ -5341,9 +7373,7 @@ def drugs_search():
     )
     if formulary_only and not carrier_values:
         selected_carriers = set()
-    location = request.args.get("location", "dallas").lower()
-    lat, lon = TEXAS_LOCATIONS.get(location, TEXAS_LOCATIONS["dallas"])
-    place = TEXAS_MARKETPLACE_PLACES.get(location, TEXAS_MARKETPLACE_PLACES["dallas"])
+    lat, lon, place = resolve_texas_location(request_location(request.args))
     bcbstx_urls = generate_bcbstx_urls("", lat, lon, 25) if "bcbstx" in selected_carriers else {}
     uhc_urls = generate_uhc_urls() if "uhc" in selected_carriers else {}
     networks = build_networks(bcbstx_urls, uhc_urls)
@@ -5396,6 +7426,58 @@ def providers_search():
     return jsonify({"providers": providers})
 
 
+def check_provider_networks(doctor, provider_name, resolved_provider_type, provider_npi_results,
+                            lat, lon, radius, place, selected_carriers, coverage_batch=None, timed_out=False):
+    """Build one provider result row with its status on every selected network."""
+    carrier_query_name = carrier_search_name(provider_name, resolved_provider_type, provider_npi_results)
+    bcbstx_urls = generate_bcbstx_urls(carrier_query_name, lat, lon, radius) if "bcbstx" in selected_carriers else {}
+    uhc_urls = generate_uhc_urls() if "uhc" in selected_carriers else {}
+    networks = build_networks(bcbstx_urls, uhc_urls)
+    if timed_out:
+        network_statuses = search_deadline_statuses(networks, SEARCH_DEADLINE_SECONDS)
+    else:
+        network_statuses = check_network_statuses(
+            provider_name, resolved_provider_type, provider_npi_results, networks, place,
+            coverage_batch=coverage_batch,
+        )
+    return build_provider_result(
+        doctor, provider_name, resolved_provider_type, provider_npi_results,
+        bcbstx_urls, uhc_urls, networks, network_statuses,
+    )
+
+
+def lookup_provider(doctor, lat, lon, radius, place, city=None, selected_carriers=None):
+    """Resolve one provider and check every NPI match against the selected networks.
+
+    This is the /search provider path without Flask: NPI lookups share the
+    response cache and HTTP pool, and one /providers/covered batch serves
+    all of the provider's matches across networks. Returns the result rows
+    in the same shape /search does.
+    """
+    selected_carriers = set(DEFAULT_CARRIERS) if selected_carriers is None else selected_carriers
+    if "npi_results" in doctor:
+        npi_results = doctor["npi_results"]
+        resolved_provider_type = doctor["provider_type"] if npi_results else "not_found"
+    else:
+        npi_results, resolved_provider_type = resolve_provider_npi(
+            doctor["name"], state="TX", city=city, specialty=doctor["specialty"],
+            provider_type=doctor["provider_type"],
+        )
+    base_networks = build_networks(
+        generate_bcbstx_urls("", lat, lon, radius) if "bcbstx" in selected_carriers else {},
+        generate_uhc_urls() if "uhc" in selected_carriers else {},
+    )
+    npis = [str(result["npi"]) for result in npi_results if result.get("npi")]
+    coverage_batch = fetch_provider_coverage_batch(npis, base_networks, place) if npis else None
+    return [
+        check_provider_networks(
+            doctor, provider_name, resolved_provider_type, provider_npi_results,
+            lat, lon, radius, place, selected_carriers, coverage_batch=coverage_batch,
+        )
+        for provider_name, provider_npi_results in provider_result_matches(doctor["name"], npi_results)
+    ]
+
+
 @app.route("/search")
 def search():
     legacy_providers_input = request.args.get("providers", "")
@@ -5405,13 +7487,12 @@ def search():
     prescriptions_input = request.args.get("prescriptions", "")
     prescription_selections_input = request.args.get("prescription_selections", "")
     provider_type = normalize_provider_type(request.args.get("provider_type", "auto"))
-    location = request.args.get("location", "dallas").lower()
+    location = request_location(request.args)
     radius = int(request.args.get("radius", 25))
     city = request.args.get("city", "").strip() or None
     selected_carriers = selected_carriers_from_request(request.args)
 
-    lat, lon = TEXAS_LOCATIONS.get(location, TEXAS_LOCATIONS["dallas"])
-    marketplace_place = TEXAS_MARKETPLACE_PLACES.get(location, TEXAS_MARKETPLACE_PLACES["dallas"])
+    lat, lon, marketplace_place = resolve_texas_location(location)
 
     doctors = []
     doctors.extend(parse_doctors(doctors_input, provider_type="doctor"))
@@ -5456,78 +7537,156 @@ def search():
     base_uhc_urls = generate_uhc_urls() if "uhc" in selected_carriers else {}
     base_networks = build_networks(base_bcbstx_urls, base_uhc_urls)
 
-    results = []
-    for doctor in doctors:
-        if "npi_results" in doctor:
-            npi_results = doctor["npi_results"]
-            resolved_provider_type = doctor["provider_type"] if npi_results else "not_found"
-        else:
-            npi_results, resolved_provider_type = resolve_provider_npi(
-                doctor["name"], state="TX", city=city, specialty=doctor["specialty"],
-                provider_type=doctor["provider_type"]
-            )
+    def provider_row(doctor, provider_name, resolved_provider_type, provider_npi_results,
+                     coverage_batch=None, timed_out=False):
+        return check_provider_networks(
+            doctor, provider_name, resolved_provider_type, provider_npi_results,
+            lat, lon, radius, marketplace_place, selected_carriers,
+            coverage_batch=coverage_batch, timed_out=timed_out,
+        )
 
-        for provider_name, provider_npi_results in provider_result_matches(doctor["name"], npi_results):
-            carrier_query_name = carrier_search_name(provider_name, resolved_provider_type, provider_npi_results)
-            bcbstx_urls = generate_bcbstx_urls(carrier_query_name, lat, lon, radius) if "bcbstx" in selected_carriers else {}
-            uhc_urls = generate_uhc_urls() if "uhc" in selected_carriers else {}
-            networks = build_networks(bcbstx_urls, uhc_urls)
-            network_statuses = check_network_statuses(
-                provider_name, resolved_provider_type, provider_npi_results, networks, marketplace_place
-            )
-            confirmed_network_ids = [
-                *doctor.get("confirmed_network_ids", []),
-                *confirmed_carrier_network_ids_for_provider(
-                    provider_name, resolved_provider_type, provider_npi_results
-                ),
-            ]
-            confirmed_network_ids = list(dict.fromkeys(confirmed_network_ids))
-            network_statuses = apply_confirmed_carrier_network_statuses(
-                network_statuses, provider_name, networks, confirmed_network_ids
-            )
+    def prescription_row(prescription, coverage_batch):
+        prescription["network_statuses"] = check_prescription_statuses(
+            prescription, base_networks, marketplace_place, coverage_batch=coverage_batch
+        )
+        return prescription
 
-            results.append({
-                "provider": provider_name,
-                "doctor": provider_name,
-                "requested_provider": doctor["name"],
-                "provider_type": resolved_provider_type,
-                "requested_provider_type": doctor["provider_type"],
-                "provider_group": provider_result_group(doctor["provider_type"], resolved_provider_type),
-                "specialty_filter": doctor["specialty"],
-                "address": doctor.get("address", ""),
-                "location": doctor.get("location", ""),
-                "source": doctor.get("source", ""),
-                "source_detail": doctor.get("source_detail", ""),
-                "selection_type": doctor.get("selection_type", ""),
-                "confirmed_network_ids": confirmed_network_ids,
-                "npi_found": len(provider_npi_results) > 0,
-                "npi_count": len(provider_npi_results),
-                "npi_results": provider_npi_results[:5],
-                "bcbstx_urls": bcbstx_urls,
-                "uhc_urls": uhc_urls,
-                "networks": networks,
-                "network_statuses": network_statuses,
-            })
+    resolved_doctors = {}
+    for index, doctor in enumerate(doctors):
+        if "npi_results" in doctor:
+            npi_results = doctor["npi_results"]
+            resolved_doctors[index] = (npi_results, doctor["provider_type"] if npi_results else "not_found")
 
-    prescription_results = []
     selected_names = {
         (selection.get("display_name") or "").strip()
         for selection in prescription_selections
     }
-    for selection in prescription_selections:
-        prescription = resolve_selected_prescription(selection)
-        prescription["network_statuses"] = check_prescription_statuses(
-            prescription, base_networks, marketplace_place
-        )
-        prescription_results.append(prescription)
-    for prescription_name in prescription_names:
-        if prescription_name in selected_names:
+    prescription_jobs = [
+        (selection.get("display_name") or selection.get("prescription") or "", selection)
+        for selection in prescription_selections
+    ]
+    prescription_jobs.extend(
+        (prescription_name, None)
+        for prescription_name in prescription_names
+        if prescription_name not in selected_names
+    )
+    resolved_prescriptions = {}
+
+    # Scheduled pipeline: providers and prescriptions resolve concurrently.
+    # Each provider's batched /providers/covered lookup starts as soon as it
+    # has its NPIs, so one slow NPI lookup does not hold back the rows that
+    # are ready. Once every prescription has its RxCUI, one /drugs/covered
+    # batch serves all prescription x network cells. Work still running at
+    # the deadline is reported as a search-deadline lookup_error. Rows are
+    # reassembled in input order below.
+    deadline = time.monotonic() + SEARCH_DEADLINE_SECONDS
+    match_rows = {}
+    prescription_rows = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, SEARCH_WORKERS))
+    try:
+        pending = {}
+
+        def schedule_provider_batch(index):
+            npis = [str(result["npi"]) for result in resolved_doctors[index][0] if result.get("npi")]
+            future = executor.submit(fetch_provider_coverage_batch, npis, base_networks, marketplace_place)
+            pending[future] = ("provider_batch", index)
+
+        def schedule_drug_batch():
+            if len(resolved_prescriptions) < len(prescription_jobs):
+                return
+            rxcuis = [
+                rxcui
+                for prescription in resolved_prescriptions.values()
+                if prescription.get("drug_found") and prescription.get("rxcui")
+                for rxcui in prescription_candidate_rxcuis(prescription)
+            ]
+            future = executor.submit(fetch_drug_coverage_batch, rxcuis, base_networks, marketplace_place)
+            pending[future] = ("drug_batch", None)
+
+        for index, doctor in enumerate(doctors):
+            if index in resolved_doctors:
+                schedule_provider_batch(index)
+            else:
+                future = executor.submit(
+                    resolve_provider_npi,
+                    doctor["name"], state="TX", city=city, specialty=doctor["specialty"],
+                    provider_type=doctor["provider_type"],
+                )
+                pending[future] = ("doctor", index)
+        for index, (prescription_name, selection) in enumerate(prescription_jobs):
+            if selection is not None:
+                future = executor.submit(resolve_selected_prescription, selection)
+            else:
+                future = executor.submit(resolve_prescription, prescription_name)
+            pending[future] = ("prescription", index)
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, key = pending.pop(future)
+                if kind == "doctor":
+                    resolved_doctors[key] = future.result()
+                    schedule_provider_batch(key)
+                elif kind == "provider_batch":
+                    coverage_batch = future.result()
+                    npi_results, resolved_provider_type = resolved_doctors[key]
+                    for match_index, (provider_name, provider_npi_results) in enumerate(
+                        provider_result_matches(doctors[key]["name"], npi_results)
+                    ):
+                        future = executor.submit(
+                            provider_row, doctors[key], provider_name,
+                            resolved_provider_type, provider_npi_results, coverage_batch,
+                        )
+                        pending[future] = ("match", (key, match_index))
+                elif kind == "match":
+                    match_rows[key] = future.result()
+                elif kind == "prescription":
+                    resolved_prescriptions[key] = future.result()
+                    schedule_drug_batch()
+                elif kind == "drug_batch":
+                    coverage_batch = future.result()
+                    for index, prescription in resolved_prescriptions.items():
+                        future = executor.submit(prescription_row, prescription, coverage_batch)
+                        pending[future] = ("prescription_statuses", index)
+                else:
+                    prescription_rows[key] = future.result()
+        deadline_exceeded = bool(pending)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for index, doctor in enumerate(doctors):
+        if index not in resolved_doctors:
+            # The NPI lookup never answered, which is not the same as no match.
+            results.append(provider_row(doctor, doctor["name"], "lookup_error", [], timed_out=True))
             continue
-        prescription = resolve_prescription(prescription_name)
-        prescription["network_statuses"] = check_prescription_statuses(
-            prescription, base_networks, marketplace_place
-        )
-        prescription_results.append(prescription)
+        npi_results, resolved_provider_type = resolved_doctors[index]
+        for match_index, (provider_name, provider_npi_results) in enumerate(
+            provider_result_matches(doctor["name"], npi_results)
+        ):
+            row = match_rows.get((index, match_index))
+            if row is None:
+                row = provider_row(
+                    doctor, provider_name, resolved_provider_type, provider_npi_results,
+                    timed_out=True,
+                )
+            results.append(row)
+
+    prescription_results = []
+    for index, (prescription_name, _) in enumerate(prescription_jobs):
+        row = prescription_rows.get(index)
+        if row is None:
+            row = dict(resolved_prescriptions.get(index) or {
+                "prescription": prescription_name,
+                "drug_found": False,
+                "drug_match_count": 0,
+                "drug_results": [],
+            })
+            row["network_statuses"] = search_deadline_statuses(base_networks, SEARCH_DEADLINE_SECONDS)
+        prescription_results.append(row)
 
     return jsonify({
         "providers": results,
@@ -5535,6 +7694,7 @@ def search():
         "networks": base_networks,
         "sources": carrier_source_groups_for_selection(selected_carriers),
         "selected_carriers": sorted(selected_carriers),
+        "deadline_exceeded": deadline_exceeded,
     })
 
 
@@ -5551,6 +7711,73 @@ if __name__ == "__main__":
         )
         sys.exit(0)
 
+    if "--index-formularies" in sys.argv:
+        outcomes = ingest_formulary_sources()
+        print(
+            f"Updated {FORMULARY_INDEX_DIR}: "
+            f"{outcomes['indexed']} indexed, "
+            f"{outcomes['unchanged']} unchanged, "
+            f"{outcomes['failed']} failed."
+        )
+        sys.exit(0)
+
+    if "--build-zip-index" in sys.argv:
+        arguments = sys.argv[sys.argv.index("--build-zip-index") + 1:]
+        if len(arguments) < 2:
+            print(
+                "Usage: app.py --build-zip-index <tab_20_zcta520_county20_natl.txt> <2020_Gaz_zcta_national.txt>",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        count = write_zip_county_index(
+            zip_county_rows_from_census(arguments[0], arguments[1]),
+            ZIP_COUNTY_INDEX_PATH,
+        )
+        print(f"Updated {ZIP_COUNTY_INDEX_PATH}: {count} ZIP codes.")
+        sys.exit(0)
+
+    if "--build-place-index" in sys.argv:
+        arguments = sys.argv[sys.argv.index("--build-place-index") + 1:]
+        if not arguments:
+            print("Usage: app.py --build-place-index <2020_Gaz_place_national.txt>", file=sys.stderr)
+            sys.exit(1)
+        count = write_place_centroids(place_centroid_rows_from_census(arguments[0]), TEXAS_PLACE_CENTROIDS_PATH)
+        print(f"Updated {TEXAS_PLACE_CENTROIDS_PATH}: {count} places.")
+        sys.exit(0)
+
+    if "--ingest-puf" in sys.argv:
+        arguments = sys.argv[sys.argv.index("--ingest-puf") + 1:]
+        if arguments and len(arguments) < 3:
+            print(
+                "Usage: app.py --ingest-puf [<plan-attributes> <service-area> <network>] (paths or URLs)",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        sources = default_puf_sources()
+        if arguments:
+            sources = dict(zip(("plan_attributes", "service_area", "network"), arguments))
+        counts = ingest_puf_files(
+            sources["plan_attributes"], sources["service_area"], sources["network"],
+            puf_marker=plan_attributes_puf_marker(),
+        )
+        print(
+            f"Updated {PUF_STORE_PATH}: "
+            f"{counts['plans']} plans, {counts['service_areas']} service-area rows."
+        )
+        sys.exit(0)
+
+    if "--index-provider-directories" in sys.argv:
+        arguments = sys.argv[sys.argv.index("--index-provider-directories") + 1:]
+        mr_url_puf = arguments[0] if arguments else default_puf_sources()["machine_readable_url"]
+        outcomes = ingest_provider_directories(mr_url_puf)
+        print(
+            f"Updated {MR_DIRECTORY_INDEX_PATH}: "
+            f"{outcomes['indexed']} issuer directories indexed, "
+            f"{outcomes['failed']} failed, "
+            f"{outcomes['providers']} providers."
+        )
+        sys.exit(0)
+
     print("\n  Provider Network Checker")
     print("  Open http://127.0.0.1:5050 in your browser\n")
     app.run(debug=True, port=5050)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark the formulary line tokenizer against the per-call regex version.
+
+By default the BCBS formulary PDFs are downloaded and every line and 5-line
+window is scored by both implementations. The results must match exactly
+before any timing is reported.
+"""
+
+import argparse
+import re
+import sys
+import time
+
+import app
+
+
+SAMPLE_FORMULARY_TEXT = """
+minoxidil tab 2.5 mg, 10 mg 1
+olmesartan medoxomil tab 5 mg, 20 mg, 40 mg (Benicar) 1
+olmesartan medoxomil-hydrochlorothiazide tab 20-12.5 mg,
+40-12.5 mg, 40-25 mg (Benicar hct)
+1
+PERINDOPRIL ERBUMINE - perindopril erbumine tab 2 mg, 8 mg 3
+rosuvastatin calcium tab 5 mg, 10 mg, 20 mg, 40 mg (Crestor) 1
+ADEMPAS - riociguat tab 0.5 mg, 1 mg, 1.5 mg, 2 mg, 2.5 mg 4 LD, PA, QL
+MOUNJARO - tirzepatide soln auto-injector 2.5 mg/0.5ml 2 PA, QL (4 pens/180 days)
+MOUNJARO - tirzepatide soln auto-injector 5 mg/0.5ml,
+7.5 mg/0.5ml, 10 mg/0.5ml, 12.5 mg/0.5ml, 15 mg/0.5ml
+2 PA, QL
+atorvastatin calcium tab 10 mg, 20 mg, 40 mg, 80 mg (Lipitor) 1 AC
+"""
+
+
+def per_call_line_tier(line):
+    text = re.sub(r"\([^)]*\)", " ", line)
+    text = re.sub(r"\d+\.\d+", " ", text)
+    requirement_match = re.search(
+        r"(?<![\w.-])([1-6])(?![\w.-])\s+(?:LD,\s*)?(?:PA|ST|QL|AC|LD)\b",
+        text,
+        re.IGNORECASE,
+    )
+    if requirement_match:
+        return requirement_match.group(1)
+    matches = re.findall(r"(?<![\w.-])([1-6])(?![\w.-])", text)
+    return matches[-1] if matches else ""
+
+
+def per_call_line_requirements(line):
+    requirements = []
+    for label in ("PA", "ST", "QL", "AC"):
+        if re.search(rf"\b{label}\b", line, re.IGNORECASE):
+            requirements.append(label)
+    return " ".join(requirements)
+
+
+def per_call_tier_and_requirements(line):
+    return per_call_line_tier(line), per_call_line_requirements(line)
+
+
+def formulary_samples(text):
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    windows = [" ".join(lines[index:index + 5]) for index in range(len(lines))]
+    return lines + windows
+
+
+def bcbs_formulary_text():
+    texts = []
+    for group in app.CARRIER_SOURCE_GROUPS:
+        if group["carrier"] != "BCBS":
+            continue
+        for source in group.get("sources", []):
+            if source.get("kind") == app.FORMULARY and source.get("validation") == app.HTTP_200_PDF:
+                print(f"Downloading {source['name']}...", file=sys.stderr)
+                try:
+                    texts.append(app.formulary_pdf_text(source["url"]))
+                except app.requests.RequestException as error:
+                    print(f"Error: could not download {source['name']} ({error})", file=sys.stderr)
+                    sys.exit(1)
+    return "\n".join(texts)
+
+
+def time_per_sample(function, samples, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for sample in samples:
+            function(sample)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--text", help="Read formulary text from a file instead of downloading the BCBS PDFs")
+    source.add_argument("--sample", action="store_true", help="Use the built-in formulary excerpt")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per implementation (best is kept)")
+    args = parser.parse_args()
+
+    if args.sample:
+        text = SAMPLE_FORMULARY_TEXT * 200
+    elif args.text:
+        with open(args.text, "r", encoding="utf-8") as handle:
+            text = handle.read()
+    else:
+        if app.PdfReader is None:
+            print("Error: pypdf is not installed; use --text or --sample", file=sys.stderr)
+            sys.exit(1)
+        text = bcbs_formulary_text()
+
+    samples = formulary_samples(text)
+    if not samples:
+        print("Error: no formulary lines to benchmark", file=sys.stderr)
+        sys.exit(1)
+
+    mismatches = [
+        sample for sample in samples
+        if per_call_tier_and_requirements(sample) != app.formulary_line_tier_and_requirements(sample)
+    ]
+    if mismatches:
+        print(f"Error: {len(mismatches)} of {len(samples)} samples differ, e.g. {mismatches[0]!r}", file=sys.stderr)
+        sys.exit(1)
+
+    per_call = time_per_sample(per_call_tier_and_requirements, samples, args.repeat)
+    tokenizer = time_per_sample(app.formulary_line_tier_and_requirements, samples, args.repeat)
+    print(f"Samples:    {len(samples)} lines and windows, all equivalent")
+    print(f"Per-call:   {per_call * 1e6 / len(samples):.2f} us/sample")
+    print(f"Tokenizer:  {tokenizer * 1e6 / len(samples):.2f} us/sample")
+    print(f"Speedup:    {per_call / tokenizer:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,48 @@ Check provider availability using NPI Registry and generate BCBSTX network searc
 
 The NPI Registry is a public government database of all healthcare providers.
 For network-specific verification, this script generates direct links to BCBSTX's
-provider finder that you can open in your browser.
+provider finder that you can open in your browser. With --networks it runs the
+web app's lookup for each provider and reports Marketplace network statuses.
 """
 
 import requests
 import argparse
+from contextlib import closing
+import os
+import re
+import sqlite3
 import sys
+import tempfile
+import time
 from dataclasses import dataclass
 from typing import Optional
 import json
 from urllib.parse import quote
 
-# NPI Registry API
-NPI_API = "https://npiregistry.cms.hhs.gov/api/"
+from app import (
+    CARRIER_VALUES,
+    DEFAULT_CARRIERS,
+    HOST_RATE_LIMITER,
+    TEXAS_MARKETPLACE_PLACES,
+    http_get,
+    iter_concurrently,
+    lookup_provider,
+    lookup_texas_place,
+    lookup_zip_county,
+    resolve_provider_npi,
+    resolve_texas_location,
+)
+
+# Nominatim geocoding (used only when a location is not known offline)
+NOMINATIM_API = "https://nominatim.openstreetmap.org/search"
+GEOCODE_CACHE_PATH = os.environ.get(
+    "GEOCODE_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "provider-network-checker", "geocode.sqlite3"),
+)
+GEOCODE_CACHE_TTL_SECONDS = int(os.environ.get("GEOCODE_CACHE_TTL_SECONDS", str(90 * 24 * 60 * 60)))
+GEOCODE_CACHE_NEGATIVE_TTL_SECONDS = int(os.environ.get("GEOCODE_CACHE_NEGATIVE_TTL_SECONDS", str(24 * 60 * 60)))
+# Nominatim's usage policy allows at most one request per second.
+GEOCODE_MIN_INTERVAL_SECONDS = float(os.environ.get("GEOCODE_MIN_INTERVAL_SECONDS", "1.0"))
 
 # BCBSTX Provider Finder URL templates
 BCBSTX_SEARCH_URLS = {
@@ -80,183 +109,118 @@ class Doctor:
     provider_type: str = "auto"
 
 
-@dataclass
-class NPIResult:
-    npi: str
-    name: str
-    credential: str
-    specialty: str
-    address: str
-    city: str
-    state: str
-    zip_code: str
-    phone: str
-
-
 def normalize_provider_type(provider_type: str) -> str:
     if provider_type in {"doctor", "facility"}:
         return provider_type
     return "auto"
 
 
-def geocode_location(location: str) -> tuple[float, float]:
-    """Convert a location string to coordinates."""
+def normalize_location(location: str) -> str:
     loc_lower = location.lower().strip()
     loc_lower = loc_lower.replace(", tx", "").replace(",tx", "").replace(" tx", "")
     loc_lower = loc_lower.replace(", texas", "").replace(",texas", "").replace(" texas", "")
-    loc_lower = loc_lower.strip()
+    return loc_lower.strip()
+
 
+def offline_coordinates(loc_lower: str) -> Optional[tuple[float, float]]:
+    """Resolve Texas places and ZIP codes from the bundled tables without the network."""
     if loc_lower in TEXAS_LOCATIONS:
         return TEXAS_LOCATIONS[loc_lower]
+    if re.fullmatch(r"\d{5}(?:-\d{4})?", loc_lower):
+        zip_county = lookup_zip_county(loc_lower)
+        if zip_county and zip_county["state"] == "TX":
+            return zip_county["lat"], zip_county["lon"]
+        return None
+    return lookup_texas_place(loc_lower)
+
+
+def geocode_cache_connection() -> sqlite3.Connection:
+    directory = os.path.dirname(GEOCODE_CACHE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(GEOCODE_CACHE_PATH, timeout=10)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS geocodes ("
+        "query TEXT PRIMARY KEY, lat REAL, lon REAL, expires_at REAL NOT NULL)"
+    )
+    return connection
 
-    if "tx" not in location.lower() and "texas" not in location.lower():
-        location = f"{location}, TX"
-
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"q": location, "format": "json", "limit": 1, "countrycodes": "us"}
-    headers = {"User-Agent": "Doctor-Network-Checker/1.0"}
 
+def load_cached_geocode(query: str) -> tuple[bool, Optional[tuple[float, float]]]:
+    """Return (found, coordinates); a cached miss is (True, None)."""
     try:
-        resp = requests.get(url, params=params, headers=headers, timeout=10)
-        resp.raise_for_status()
-        results = resp.json()
-        if results:
-            return float(results[0]["lat"]), float(results[0]["lon"])
-    except requests.RequestException:
-        pass
-
-    raise ValueError(f"Could not geocode: {location}. Use --coords or a major Texas city.")
-
-
-def search_npi(
-    name: str,
-    state: str = "TX",
-    city: Optional[str] = None,
-    specialty: Optional[str] = None,
-    limit: int = 10,
-    provider_type: str = "doctor",
-) -> list[NPIResult]:
-    """Search the NPI Registry for providers."""
-    provider_type = "facility" if provider_type == "facility" else "doctor"
-
-    params = {
-        "version": "2.1",
-        "limit": limit,
-        "enumeration_type": "NPI-2" if provider_type == "facility" else "NPI-1",
-        "state": state,
-    }
-
-    if provider_type == "facility":
-        params["organization_name"] = name.strip()
-    else:
-        # Parse name (handle "Last, First" or "First Last")
-        name_parts = name.replace("Dr.", "").replace("Dr", "").strip()
-
-        if "," in name_parts:
-            last, first = [p.strip() for p in name_parts.split(",", 1)]
-        else:
-            parts = name_parts.split()
-            if len(parts) >= 2:
-                first = parts[0]
-                last = " ".join(parts[1:])
-            else:
-                first = ""
-                last = name_parts
-
-        if first:
-            params["first_name"] = first
-        if last:
-            params["last_name"] = last
-    if city:
-        params["city"] = city
-
+        with closing(geocode_cache_connection()) as connection:
+            row = connection.execute(
+                "SELECT lat, lon FROM geocodes WHERE query = ? AND expires_at > ?",
+                (query, time.time()),
+            ).fetchone()
+    except sqlite3.Error:
+        return False, None
+    if row is None:
+        return False, None
+    if row[0] is None:
+        return True, None
+    return True, (row[0], row[1])
+
+
+def store_cached_geocode(query: str, coordinates: Optional[tuple[float, float]]):
+    ttl_seconds = GEOCODE_CACHE_TTL_SECONDS if coordinates else GEOCODE_CACHE_NEGATIVE_TTL_SECONDS
+    lat, lon = coordinates or (None, None)
     try:
-        resp = requests.get(NPI_API, params=params, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
-
-        results = []
-        for r in data.get("results", []):
-            basic = r.get("basic", {})
-            addresses = r.get("addresses", [])
-            taxonomies = r.get("taxonomies", [])
-
-            # Get practice address (location_type == "primary")
-            practice_addr = next(
-                (a for a in addresses if a.get("address_purpose") == "LOCATION"),
-                addresses[0] if addresses else {},
+        with closing(geocode_cache_connection()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO geocodes (query, lat, lon, expires_at) VALUES (?, ?, ?, ?)",
+                (query, lat, lon, time.time() + ttl_seconds),
             )
+    except sqlite3.Error:
+        pass
 
-            # Get primary taxonomy (specialty)
-            primary_tax = next(
-                (t for t in taxonomies if t.get("primary")),
-                taxonomies[0] if taxonomies else {},
-            )
 
-            specialty_name = primary_tax.get("desc", "Unknown")
-
-            # Filter by specialty if provided
-            if specialty:
-                if specialty.lower() not in specialty_name.lower():
-                    continue
-
-            result_name = basic.get("organization_name", "").strip()
-            if provider_type == "doctor":
-                result_name = f"{basic.get('first_name', '')} {basic.get('last_name', '')}".strip()
-
-            results.append(
-                NPIResult(
-                    npi=r.get("number", ""),
-                    name=result_name,
-                    credential=basic.get("credential", ""),
-                    specialty=specialty_name,
-                    address=practice_addr.get("address_1", ""),
-                    city=practice_addr.get("city", ""),
-                    state=practice_addr.get("state", ""),
-                    zip_code=practice_addr.get("postal_code", "")[:5],
-                    phone=practice_addr.get("telephone_number", ""),
-                )
-            )
+def wait_for_geocode_slot():
+    """Space Nominatim requests at least GEOCODE_MIN_INTERVAL_SECONDS apart."""
+    HOST_RATE_LIMITER.wait(NOMINATIM_API, GEOCODE_MIN_INTERVAL_SECONDS)
 
-        return results
 
-    except requests.RequestException as e:
-        print(f"  Warning: NPI lookup error: {e}", file=sys.stderr)
-        return []
+def geocode_online(location: str) -> Optional[tuple[float, float]]:
+    params = {"q": location, "format": "json", "limit": 1, "countrycodes": "us"}
+    headers = {"User-Agent": "Doctor-Network-Checker/1.0"}
+    wait_for_geocode_slot()
+    resp = http_get(NOMINATIM_API, params=params, headers=headers, timeout=10)
+    resp.raise_for_status()
+    results = resp.json()
+    if results:
+        return float(results[0]["lat"]), float(results[0]["lon"])
+    return None
 
 
-def resolve_provider_npi(
-    name: str,
-    state: str = "TX",
-    city: Optional[str] = None,
-    specialty: Optional[str] = None,
-    limit: int = 10,
-    provider_type: str = "auto",
-) -> tuple[list[NPIResult], str]:
-    provider_type = normalize_provider_type(provider_type)
+def geocode_location(location: str) -> tuple[float, float]:
+    """Convert a location string to coordinates.
 
-    if provider_type in {"doctor", "facility"}:
-        results = search_npi(
-            name, state=state, city=city, specialty=specialty,
-            limit=limit, provider_type=provider_type
-        )
-        return results, provider_type if results else "not_found"
-
-    doctor_results = search_npi(
-        name, state=state, city=city, specialty=specialty,
-        limit=limit, provider_type="doctor"
-    )
-    if doctor_results:
-        return doctor_results, "doctor"
+    Bundled Texas places and indexed ZIPs resolve offline; other locations go
+    through a persistent cache (misses are cached briefly too) before a
+    rate-limited Nominatim request.
+    """
+    loc_lower = normalize_location(location)
+    coordinates = offline_coordinates(loc_lower)
+    if coordinates:
+        return coordinates
 
-    facility_results = search_npi(
-        name, state=state, city=city, specialty=specialty,
-        limit=limit, provider_type="facility"
-    )
-    if facility_results:
-        return facility_results, "facility"
+    if "tx" not in location.lower() and "texas" not in location.lower():
+        location = f"{location}, TX"
 
-    return [], "not_found"
+    query = " ".join(location.lower().split())
+    found, coordinates = load_cached_geocode(query)
+    if not found:
+        try:
+            coordinates = geocode_online(location)
+        except (requests.RequestException, ValueError, KeyError):
+            coordinates = None
+        else:
+            store_cached_geocode(query, coordinates)
+    if coordinates:
+        return coordinates
+
+    raise ValueError(f"Could not geocode: {location}. Use --coords, a Texas city or a ZIP code.")
 
 
 def generate_bcbstx_urls(name: str, lat: float, lon: float, radius: int) -> dict:
@@ -272,13 +236,17 @@ def generate_bcbstx_urls(name: str, lat: float, lon: float, radius: int) -> dict
     return urls
 
 
+def warn_npi_lookup_error(error: Exception):
+    print(f"  Warning: NPI lookup error: {error}", file=sys.stderr)
+
+
 def check_doctor(
     doctor: Doctor, lat: float, lon: float, radius: int, city: Optional[str] = None
 ) -> dict:
     """Check a provider in NPI Registry and generate BCBSTX links."""
     npi_results, resolved_provider_type = resolve_provider_npi(
         doctor.name, state="TX", city=city, specialty=doctor.specialty,
-        provider_type=doctor.provider_type
+        provider_type=doctor.provider_type, on_error=warn_npi_lookup_error
     )
 
     bcbstx_urls = generate_bcbstx_urls(doctor.name, lat, lon, radius)
@@ -291,20 +259,81 @@ def check_doctor(
         "npi_found": len(npi_results) > 0,
         "npi_count": len(npi_results),
         "npi_results": [
-            {
-                "npi": r.npi,
-                "name": r.name,
-                "credential": r.credential,
-                "specialty": r.specialty,
-                "location": f"{r.city}, {r.state} {r.zip_code}",
-                "phone": r.phone,
-            }
-            for r in npi_results[:5]
+            {key: result[key] for key in ("npi", "name", "credential", "specialty", "location", "phone")}
+            for result in npi_results[:5]
         ],
         "bcbstx_urls": bcbstx_urls,
     }
 
 
+def marketplace_place(location: Optional[str]) -> Optional[dict]:
+    """Return the Marketplace place for a known Texas city or indexed Texas ZIP."""
+    loc_lower = normalize_location(location or "dallas")
+    if loc_lower not in TEXAS_MARKETPLACE_PLACES:
+        if not re.fullmatch(r"\d{5}(?:-\d{4})?", loc_lower):
+            return None
+        zip_county = lookup_zip_county(loc_lower)
+        if not zip_county or zip_county["state"] != "TX":
+            return None
+    return resolve_texas_location(loc_lower)[2]
+
+
+def check_doctor_networks(
+    doctor: Doctor,
+    lat: float,
+    lon: float,
+    radius: int,
+    place: dict,
+    city: Optional[str] = None,
+    carriers: Optional[set[str]] = None,
+) -> dict:
+    """Check a provider's network status with the same lookup /search uses."""
+    rows = lookup_provider(
+        {"name": doctor.name, "specialty": doctor.specialty, "provider_type": doctor.provider_type},
+        lat, lon, radius, place, city=city, selected_carriers=carriers,
+    )
+    return {
+        "provider": doctor.name,
+        "specialty_filter": doctor.specialty,
+        "npi_found": any(row["npi_found"] for row in rows),
+        "results": rows,
+    }
+
+
+def print_network_results(results: list[dict]):
+    """Print network statuses for each provider match."""
+    print("\n" + "=" * 80)
+    print("PROVIDER NETWORK STATUS")
+    print("=" * 80)
+
+    for r in results:
+        print(f"\n{'─' * 80}")
+        print(f"SEARCH: {r['provider']}", end="")
+        if r["specialty_filter"]:
+            print(f" [{r['specialty_filter']}]", end="")
+        print()
+        print("─" * 80)
+
+        for row in r["results"]:
+            if not row["npi_found"]:
+                print("\n❌ No matches found in NPI Registry")
+            else:
+                npi = row["npi_results"][0]
+                print(f"\n  {row['provider']} ({row['provider_type']})")
+                print(f"     NPI: {npi['npi']}  {npi['location']}")
+            for network in row["networks"]:
+                status = row["network_statuses"].get(network["id"], {})
+                print(f"     {network['name']}: {status.get('status', 'unknown')}", end="")
+                if status.get("detail"):
+                    print(f" ({status['detail']})", end="")
+                print()
+
+    found = sum(1 for r in results if r["npi_found"])
+    print("\n" + "=" * 80)
+    print(f"  NPI matches: {found} of {len(results)} provider(s)")
+    print()
+
+
 def print_results(results: list[dict], show_urls: bool = True):
     """Print results in a readable format."""
     print("\n" + "=" * 80)
@@ -376,6 +405,117 @@ def parse_doctors(doctor_input: str, provider_type: str = "auto") -> list[Doctor
     return doctors
 
 
+def iter_doctors(lines, provider_type: str = "auto"):
+    """Parse providers lazily from an iterable of lines (a file or stdin)."""
+    for line in lines:
+        yield from parse_doctors(line, provider_type=provider_type)
+
+
+def doctor_checkpoint_key(
+    doctor: Doctor, lat: float, lon: float, radius: int, city: Optional[str], mode: str = "npi"
+) -> str:
+    return json.dumps([mode, doctor.name, doctor.specialty, doctor.provider_type, lat, lon, radius, city])
+
+
+def load_checkpoint(path: str) -> dict[str, int]:
+    """Map completed keys to the byte offset of their checkpoint line; a torn last line is ignored.
+
+    Results stay on disk until read_checkpoint_result needs one.
+    """
+    completed = {}
+    try:
+        with open(path, "rb") as handle:
+            offset = 0
+            for line in handle:
+                try:
+                    completed[json.loads(line)["key"]] = offset
+                except (ValueError, KeyError, TypeError):
+                    pass
+                offset += len(line)
+    except FileNotFoundError:
+        pass
+    return completed
+
+
+def read_checkpoint_result(path: str, offset: int) -> dict:
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        return json.loads(handle.readline())["result"]
+
+
+def open_checkpoint(path: str):
+    """Open a checkpoint for appending, starting on a fresh line after a torn write."""
+    with open(path, "a+b") as handle:
+        if handle.tell():
+            handle.seek(-1, os.SEEK_END)
+            if handle.read(1) != b"\n":
+                handle.write(b"\n")
+    return open(path, "a", encoding="utf-8")
+
+
+def iter_doctor_results(
+    doctors,
+    lat: float,
+    lon: float,
+    radius: int,
+    city: Optional[str] = None,
+    workers: int = 1,
+    checkpoint_path: Optional[str] = None,
+    announce=None,
+    place: Optional[dict] = None,
+    carriers: Optional[set[str]] = None,
+):
+    """Yield (doctor, result) in input order as providers are checked.
+
+    Providers already recorded in the checkpoint are read back from it
+    without an NPI lookup; new results are appended to it before they are
+    yielded, so an interrupted run picks up where it stopped. Passing a
+    Marketplace place checks network statuses instead of only the NPI.
+    """
+    completed = load_checkpoint(checkpoint_path) if checkpoint_path else {}
+    mode = "npi"
+    if place is not None:
+        mode = "networks:" + ",".join(sorted(DEFAULT_CARRIERS if carriers is None else carriers))
+
+    def check(doctor: Doctor):
+        key = doctor_checkpoint_key(doctor, lat, lon, radius, city, mode)
+        if key in completed:
+            return doctor, key, read_checkpoint_result(checkpoint_path, completed[key]), True
+        if announce:
+            announce(doctor)
+        if place is not None:
+            return doctor, key, check_doctor_networks(doctor, lat, lon, radius, place, city, carriers), False
+        return doctor, key, check_doctor(doctor, lat, lon, radius, city), False
+
+    checkpoint = open_checkpoint(checkpoint_path) if checkpoint_path else None
+    try:
+        with closing(iter_concurrently(check, doctors, workers)) as checks:
+            for doctor, key, result, resumed in checks:
+                if checkpoint and not resumed:
+                    checkpoint.write(json.dumps({"key": key, "result": result}) + "\n")
+                    checkpoint.flush()
+                yield doctor, result
+    finally:
+        if checkpoint:
+            checkpoint.close()
+
+
+def print_progress(done: int, total: Optional[int], name: str):
+    counter = f"{done}/{total}" if total is not None else str(done)
+    if sys.stderr.isatty():
+        print(f"\r  Checked {counter}: {name[:40]:<40}", end="", file=sys.stderr, flush=True)
+    elif done % 100 == 0:
+        print(f"  Checked {counter}", file=sys.stderr, flush=True)
+
+
+def finish_progress(done: int, total: Optional[int]):
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+    elif done % 100:
+        counter = f"{done}/{total}" if total is not None else str(done)
+        print(f"  Checked {counter}", file=sys.stderr, flush=True)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Check provider availability using NPI Registry and generate BCBSTX search links",
@@ -386,6 +526,7 @@ Examples:
   %(prog)s --doctors "John Smith (Cardiology)" --location 75201
   %(prog)s --file doctors.txt --location "Austin" --city "Austin"
   %(prog)s --doctors "Smith" --coords "32.7767,-96.7970" --json
+  %(prog)s --file roster.txt --location 77030 --networks --workers 8 --jsonl
         """,
     )
 
@@ -397,7 +538,7 @@ Examples:
     )
     input_group.add_argument(
         "--file", "-f",
-        help="File with one provider per line",
+        help="File with one provider per line ('-' reads stdin)",
     )
 
     parser.add_argument(
@@ -428,26 +569,70 @@ Examples:
     parser.add_argument(
         "--json",
         action="store_true",
-        help="Output results as JSON",
+        help="Output all results as one JSON array once the run finishes (use --jsonl to stream)",
     )
     parser.add_argument(
         "--no-urls",
         action="store_true",
         help="Don't show BCBSTX search URLs",
     )
+    parser.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="Stream one JSON object per provider as it is resolved (reads --file lazily)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="Append finished results to this file and skip providers already in it when resuming",
+    )
+    parser.add_argument(
+        "--networks",
+        action="store_true",
+        help="Check Marketplace network status for each provider (needs a Texas city or indexed ZIP --location)",
+    )
+    parser.add_argument(
+        "--carriers",
+        default=",".join(sorted(DEFAULT_CARRIERS)),
+        help="Comma-separated carriers for --networks (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=1,
+        help="Check this many providers concurrently; results keep input order (default: 1)",
+    )
 
     args = parser.parse_args()
 
     # Parse providers
+    streaming = args.jsonl
+    input_handle = None
     if args.doctors:
         doctors = parse_doctors(args.doctors, provider_type=args.provider_type)
     else:
-        with open(args.file, "r") as f:
-            doctors = parse_doctors(f.read().replace("\n", ","), provider_type=args.provider_type)
+        input_handle = sys.stdin if args.file == "-" else open(args.file, "r")
+        doctors = iter_doctors(input_handle, provider_type=args.provider_type)
+    if not streaming:
+        doctors = list(doctors)
+        if not doctors:
+            print("Error: No providers specified", file=sys.stderr)
+            sys.exit(1)
 
-    if not doctors:
-        print("Error: No providers specified", file=sys.stderr)
-        sys.exit(1)
+    place = None
+    carriers = None
+    if args.networks:
+        place = marketplace_place(args.location)
+        if place is None:
+            print(
+                f"Error: --networks needs a Texas ZIP or one of: {', '.join(sorted(TEXAS_MARKETPLACE_PLACES))}",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        carriers = {carrier.strip().lower() for carrier in args.carriers.split(",") if carrier.strip()}
+        unknown = carriers - CARRIER_VALUES
+        if unknown:
+            print(f"Error: unknown carrier(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+            sys.exit(1)
 
     # Get coordinates
     if args.coords:
@@ -466,22 +651,50 @@ Examples:
         # Default to Dallas
         lat, lon = TEXAS_LOCATIONS["dallas"]
 
-    if not args.json:
+    if not args.json and not streaming:
         print(f"Location: {lat:.4f}, {lon:.4f}")
         print(f"Checking {len(doctors)} provider(s)...")
 
+    def announce(doctor: Doctor):
+        specialty_note = f" [{doctor.specialty}]" if doctor.specialty else ""
+        print(f"  Searching: {doctor.name}{specialty_note}")
+
     # Check each provider
+    show_progress = streaming or args.workers > 1
+    total = len(doctors) if isinstance(doctors, list) else None
     results = []
-    for doctor in doctors:
-        if not args.json:
-            specialty_note = f" [{doctor.specialty}]" if doctor.specialty else ""
-            print(f"  Searching: {doctor.name}{specialty_note}")
-        result = check_doctor(doctor, lat, lon, args.radius, args.city)
-        results.append(result)
+    done = 0
+    checks = iter_doctor_results(
+        doctors, lat, lon, args.radius, args.city,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint,
+        announce=announce if not (args.json or streaming) and args.workers <= 1 else None,
+        place=place,
+        carriers=carriers,
+    )
+    with closing(checks):
+        for doctor, result in checks:
+            done += 1
+            if streaming:
+                print(json.dumps(result), flush=True)
+            else:
+                results.append(result)
+            if show_progress:
+                print_progress(done, total, doctor.name)
+    if input_handle not in (None, sys.stdin):
+        input_handle.close()
+    if show_progress and done:
+        finish_progress(done, total)
 
     # Output
-    if args.json:
+    if streaming:
+        if not done:
+            print("Error: No providers specified", file=sys.stderr)
+            sys.exit(1)
+    elif args.json:
         print(json.dumps(results, indent=2))
+    elif args.networks:
+        print_network_results(results)
     else:
         print_results(results, show_urls=not args.no_urls)
 
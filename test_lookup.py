@@ -1,11 +1,20 @@
+import contextlib
+import gzip
+import io
 import json
 import os
+import sqlite3
+import sys
 import tempfile
+import threading
+import time
 import unittest
+import zipfile
 from urllib.parse import quote
 from unittest.mock import patch
 
 import app as web_app
+import bench_formulary
 import check_doctors
 
 
@@ -55,8 +64,27 @@ FACILITY_PAYLOAD = {
 
 
 class LookupTests(unittest.TestCase):
+    def setUp(self):
+        web_app.NPI_RESPONSE_CACHE.clear()
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+        plan_store = patch.object(web_app, "PLAN_ID_CACHE_PATH", os.path.join(store_dir.name, "plan_ids.sqlite3"))
+        plan_store.start()
+        self.addCleanup(plan_store.stop)
+        formulary_index = patch.object(web_app, "FORMULARY_INDEX_DIR", os.path.join(store_dir.name, "formulary_index"))
+        formulary_index.start()
+        self.addCleanup(formulary_index.stop)
+        puf_store = patch.object(web_app, "PUF_STORE_PATH", os.path.join(store_dir.name, "cms_puf.sqlite3"))
+        puf_store.start()
+        self.addCleanup(puf_store.stop)
+        directory_index = patch.object(
+            web_app, "MR_DIRECTORY_INDEX_PATH", os.path.join(store_dir.name, "mr_directory.sqlite3")
+        )
+        directory_index.start()
+        self.addCleanup(directory_index.stop)
+
     def test_web_search_npi_uses_type_two_for_facilities(self):
-        with patch.object(web_app.requests, "get") as mock_get:
+        with patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(FACILITY_PAYLOAD)
 
             results = web_app.search_npi("Baylor Hospital", provider_type="facility")
@@ -69,6 +97,49 @@ class LookupTests(unittest.TestCase):
         self.assertEqual(results[0]["name"], "BAYLOR HOSPITAL")
         self.assertEqual(results[0]["address"], "3500 Gaston Ave, DALLAS, TX 75201")
 
+    def test_web_search_npi_serves_repeat_queries_from_cache(self):
+        with patch.object(web_app, "http_get") as mock_get:
+            mock_get.return_value = FakeResponse(FACILITY_PAYLOAD)
+
+            first = web_app.search_npi("Baylor Hospital", city="Dallas", provider_type="facility")
+            second = web_app.search_npi("  baylor   HOSPITAL ", city="DALLAS", provider_type="facility")
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(web_app.NPI_RESPONSE_CACHE.stats()["hits"], 1)
+        self.assertEqual(web_app.NPI_RESPONSE_CACHE.stats()["misses"], 1)
+
+    def test_web_search_npi_expires_empty_results_sooner(self):
+        now = [1000.0]
+        cache = web_app.TTLCache(8, ttl_seconds=600, clock=lambda: now[0])
+
+        with patch.object(web_app, "NPI_RESPONSE_CACHE", cache), \
+             patch.object(web_app, "NPI_CACHE_TTL_SECONDS", 600), \
+             patch.object(web_app, "NPI_CACHE_NEGATIVE_TTL_SECONDS", 60), \
+             patch.object(web_app, "http_get") as mock_get:
+            mock_get.side_effect = lambda url, params, timeout: FakeResponse(
+                FACILITY_PAYLOAD if params.get("organization_name") else {"results": []}
+            )
+            web_app.search_npi("Baylor Hospital", provider_type="facility")
+            web_app.search_npi("Nobody", provider_type="doctor")
+            now[0] += 120
+            web_app.search_npi("Baylor Hospital", provider_type="facility")
+            web_app.search_npi("Nobody", provider_type="doctor")
+
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_ttl_cache_evicts_least_recently_used_entry(self):
+        cache = web_app.TTLCache(2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIs(cache.get("b"), web_app.TTLCache.MISSING)
+        self.assertEqual(cache.get("c"), 3)
+
     def test_web_route_auto_resolves_mixed_provider_types(self):
         def fake_search(name, **kwargs):
             if name == "John Smith" and kwargs["provider_type"] == "doctor":
@@ -78,6 +149,7 @@ class LookupTests(unittest.TestCase):
             return []
 
         with patch.object(web_app, "search_npi", side_effect=fake_search), \
+             patch.object(web_app, "fetch_provider_coverage_batch", return_value=web_app.CoverageBatch("npi")), \
              patch.object(web_app, "check_network_statuses", return_value={}):
             client = web_app.app.test_client()
             response = client.get("/search?providers=John+Smith,Baylor+Hospital")
@@ -100,6 +172,7 @@ class LookupTests(unittest.TestCase):
         prescription = {"prescription": "Ozempic", "drug_found": False}
 
         with patch.object(web_app, "search_npi", side_effect=fake_search), \
+             patch.object(web_app, "fetch_provider_coverage_batch", return_value=web_app.CoverageBatch("npi")), \
              patch.object(web_app, "check_network_statuses", return_value={}), \
              patch.object(web_app, "resolve_prescription", return_value=prescription), \
              patch.object(web_app, "check_prescription_statuses", return_value={}):
@@ -118,7 +191,7 @@ class LookupTests(unittest.TestCase):
         self.assertEqual(providers[1]["provider_group"], "facility")
 
     def test_provider_search_route_returns_facility_picker_candidates(self):
-        with patch.object(web_app.requests, "get") as mock_get:
+        with patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(FACILITY_PAYLOAD)
             client = web_app.app.test_client()
             response = client.get("/providers/search?q=Baylor&type=facility&city=Dallas")
@@ -142,6 +215,7 @@ class LookupTests(unittest.TestCase):
         }]
 
         with patch.object(web_app, "search_npi", return_value=[]), \
+             patch.object(web_app, "fetch_provider_coverage_batch", return_value=web_app.CoverageBatch("npi")), \
              patch.object(web_app, "check_network_statuses", return_value={}):
             client = web_app.app.test_client()
             response = client.get(
@@ -167,6 +241,7 @@ class LookupTests(unittest.TestCase):
         }]
 
         with patch.object(web_app, "search_npi", return_value=[]), \
+             patch.object(web_app, "fetch_provider_coverage_batch", return_value=web_app.CoverageBatch("npi")), \
              patch.object(web_app, "check_network_statuses", return_value={}):
             client = web_app.app.test_client()
             response = client.get(
@@ -298,6 +373,47 @@ class LookupTests(unittest.TestCase):
         self.assertEqual(provider_type, "facility")
         self.assertEqual(results[0]["name"], "BAYLOR UNIVERSITY MEDICAL CENTER")
 
+    def test_auto_mode_queries_doctor_and_facility_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fake_search(name, **kwargs):
+            barrier.wait()
+            if kwargs["provider_type"] == "doctor":
+                return [{"npi": "1", "name": "John Smith"}]
+            return [{"npi": "2", "name": "JOHN SMITH CLINIC"}]
+
+        with patch.object(web_app, "search_npi", side_effect=fake_search):
+            results, provider_type = web_app.resolve_provider_npi("John Smith")
+
+        self.assertEqual(provider_type, "doctor")
+        self.assertEqual(results[0]["npi"], "1")
+
+    def test_facility_alias_queries_keep_query_order_and_stop_at_limit(self):
+        release = threading.Event()
+
+        def fake_search(name, **kwargs):
+            if name == "Baylor Scott White":
+                time.sleep(0.05)
+                return [{"npi": "2", "name": "BAYLOR SCOTT WHITE"}, {"npi": "3", "name": "BSW"}]
+            if name == "Baylor Scott and White":
+                return [{"npi": "2", "name": "BAYLOR SCOTT WHITE"}, {"npi": "4", "name": "BSW 2"}]
+            if name == "Baylor University Medical Center":
+                release.wait(timeout=5)
+            return []
+
+        try:
+            with patch.object(web_app, "search_npi", side_effect=fake_search):
+                started = time.monotonic()
+                results = web_app.search_provider_npi(
+                    "scott white", limit=3, provider_type="facility"
+                )
+                elapsed = time.monotonic() - started
+        finally:
+            release.set()
+
+        self.assertEqual([result["npi"] for result in results], ["2", "3", "4"])
+        self.assertLess(elapsed, 2)
+
     def test_web_route_tags_unresolved_provider_as_not_found(self):
         with patch.object(web_app, "search_npi", return_value=[]):
             client = web_app.app.test_client()
@@ -351,6 +467,7 @@ class LookupTests(unittest.TestCase):
         }
 
         with patch.object(web_app, "search_npi", return_value=[{"npi": "1", "name": "John Smith"}]), \
+             patch.object(web_app, "fetch_provider_coverage_batch", return_value=web_app.CoverageBatch("npi")), \
              patch.object(web_app, "check_network_statuses", return_value=statuses):
             client = web_app.app.test_client()
             response = client.get("/search?providers=John+Smith")
@@ -375,7 +492,7 @@ class LookupTests(unittest.TestCase):
         ]
         checked_npis = []
 
-        def fake_check(provider_name, provider_type, provider_npis, networks, place):
+        def fake_check(provider_name, provider_type, provider_npis, networks, place, **kwargs):
             checked_npis.append((provider_name, [result["npi"] for result in provider_npis]))
             return {
                 "bcbstx:blue_advantage_hmo": {
@@ -386,6 +503,7 @@ class LookupTests(unittest.TestCase):
             }
 
         with patch.object(web_app, "search_npi", return_value=npi_results), \
+             patch.object(web_app, "fetch_provider_coverage_batch", return_value=web_app.CoverageBatch("npi")), \
              patch.object(web_app, "check_network_statuses", side_effect=fake_check):
             client = web_app.app.test_client()
             response = client.get("/search?doctors=Dr.+Alexander+McWilliams")
@@ -412,11 +530,111 @@ class LookupTests(unittest.TestCase):
             "DALLAS, TX 75201",
             "DALLAS, TX 75201",
         ])
-        self.assertEqual(checked_npis, [
+        self.assertCountEqual(checked_npis, [
             ("Alexandra McWilliams", ["1111111111"]),
             ("Alexis McWilliams", ["2222222222"]),
         ])
 
+    def test_web_route_keeps_input_order_when_lookups_finish_out_of_order(self):
+        first_started = threading.Event()
+
+        def fake_search(name, **kwargs):
+            if name == "Slow Doctor":
+                first_started.set()
+                time.sleep(0.2)
+            return [{"npi": name[:4], "name": name}]
+
+        def fake_resolve(name):
+            if name == "Ibuprofen":
+                first_started.wait(timeout=5)
+                time.sleep(0.1)
+            return {"prescription": name, "drug_found": False}
+
+        with patch.object(web_app, "search_npi", side_effect=fake_search), \
+             patch.object(web_app, "fetch_provider_coverage_batch", return_value=web_app.CoverageBatch("npi")), \
+             patch.object(web_app, "check_network_statuses", return_value={}), \
+             patch.object(web_app, "resolve_prescription", side_effect=fake_resolve), \
+             patch.object(web_app, "check_prescription_statuses", return_value={}):
+            client = web_app.app.test_client()
+            response = client.get(
+                "/search?doctors=Slow+Doctor,Fast+Doctor&prescriptions=Ibuprofen,Lisinopril"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json["deadline_exceeded"])
+        self.assertEqual(
+            [provider["provider"] for provider in response.json["providers"]],
+            ["Slow Doctor", "Fast Doctor"],
+        )
+        self.assertEqual(
+            [prescription["prescription"] for prescription in response.json["prescriptions"]],
+            ["Ibuprofen", "Lisinopril"],
+        )
+
+    def test_web_route_marks_rows_lookup_error_after_search_deadline(self):
+        release = threading.Event()
+
+        def slow_statuses(provider_name, *args, **kwargs):
+            if provider_name == "Slow Doctor":
+                release.wait(timeout=5)
+            return {}
+
+        try:
+            with patch.object(web_app, "SEARCH_DEADLINE_SECONDS", 0.2), \
+                 patch.object(web_app, "search_npi", side_effect=lambda name, **kwargs: [{"npi": "1", "name": name}]), \
+                 patch.object(web_app, "fetch_provider_coverage_batch", return_value=web_app.CoverageBatch("npi")), \
+                 patch.object(web_app, "check_network_statuses", side_effect=slow_statuses):
+                client = web_app.app.test_client()
+                response = client.get("/search?doctors=Slow+Doctor,Fast+Doctor")
+        finally:
+            release.set()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json["deadline_exceeded"])
+        slow, fast = response.json["providers"]
+        self.assertEqual(slow["provider"], "Slow Doctor")
+        self.assertEqual(
+            {status["status"] for status in slow["network_statuses"].values()},
+            {"lookup_error"},
+        )
+        self.assertIn("did not finish", slow["network_statuses"]["bcbstx:blue_advantage_hmo"]["detail"])
+        self.assertEqual(fast["network_statuses"], {})
+
+    def test_web_route_resolves_picker_selections_under_the_deadline(self):
+        release = threading.Event()
+
+        def slow_resolve(selection):
+            release.wait(timeout=5)
+            return {"prescription": selection["display_name"], "drug_found": False}
+
+        def slow_search(name, **kwargs):
+            release.wait(timeout=5)
+            return []
+
+        selections = quote(json.dumps([{"display_name": "Ozempic", "rxcui": "2200644"}]))
+        try:
+            with patch.object(web_app, "SEARCH_DEADLINE_SECONDS", 0.2), \
+                 patch.object(web_app, "search_npi", side_effect=slow_search), \
+                 patch.object(web_app, "resolve_selected_prescription", side_effect=slow_resolve):
+                client = web_app.app.test_client()
+                started = time.monotonic()
+                response = client.get(f"/search?doctors=Slow+Doctor&prescription_selections={selections}")
+                elapsed = time.monotonic() - started
+        finally:
+            release.set()
+
+        self.assertLess(elapsed, 2)
+        self.assertTrue(response.json["deadline_exceeded"])
+        provider = response.json["providers"][0]
+        self.assertEqual(provider["provider_type"], "lookup_error")
+        self.assertEqual({status["status"] for status in provider["network_statuses"].values()}, {"lookup_error"})
+        prescription = response.json["prescriptions"][0]
+        self.assertEqual(prescription["prescription"], "Ozempic")
+        self.assertEqual(
+            {status["status"] for status in prescription["network_statuses"].values()},
+            {"lookup_error"},
+        )
+
     def test_web_route_returns_carrier_source_map(self):
         with patch.object(web_app, "search_npi", return_value=[]):
             client = web_app.app.test_client()
@@ -505,6 +723,7 @@ class LookupTests(unittest.TestCase):
         }]
 
         with patch.object(web_app, "search_npi", return_value=npi_results), \
+             patch.object(web_app, "fetch_provider_coverage_batch", return_value=web_app.CoverageBatch("npi")), \
              patch.object(web_app, "check_network_statuses", return_value=out_statuses):
             client = web_app.app.test_client()
             response = client.get(
@@ -552,8 +771,8 @@ class LookupTests(unittest.TestCase):
         with tempfile.TemporaryDirectory() as tmpdir, \
              patch.object(web_app, "SOURCE_FRESHNESS_CACHE_PATH", os.path.join(tmpdir, "sources.json")), \
              patch.object(web_app, "CARRIER_SOURCE_GROUPS", source_groups), \
-             patch.object(web_app.requests, "head") as mock_head, \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_head") as mock_head, \
+             patch.object(web_app, "http_get") as mock_get:
             mock_head.return_value = FakeResponse(
                 status_code=200,
                 headers={
@@ -576,8 +795,100 @@ class LookupTests(unittest.TestCase):
         self.assertEqual(cache["puf"]["updates"]["Network PUF"], "May 2, 2026")
         self.assertEqual(mock_head.call_args.args[0], "https://example.com/directory")
 
+    def test_url_metadata_revalidates_with_cached_validators(self):
+        previous = {
+            "ok": True,
+            "url": "https://example.com/directory",
+            "etag": '"abc"',
+            "last_modified": "Wed, 01 May 2026 12:00:00 GMT",
+            "content_length": "1234",
+            "content_type": "text/html",
+            "content_hash": "",
+        }
+
+        with patch.object(web_app, "http_head", return_value=FakeResponse(status_code=304, url="")) as mock_head, \
+             patch.object(web_app, "http_get") as mock_get:
+            metadata = web_app.check_url_metadata("https://example.com/directory", previous)
+
+        self.assertEqual(mock_head.call_args.kwargs["headers"], {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Wed, 01 May 2026 12:00:00 GMT",
+        })
+        mock_get.assert_not_called()
+        self.assertTrue(metadata["ok"])
+        self.assertTrue(metadata["not_modified"])
+        self.assertEqual(metadata["status_code"], 304)
+        self.assertEqual(metadata["etag"], '"abc"')
+        self.assertEqual(metadata["content_length"], "1234")
+        self.assertEqual(web_app.source_status_from_metadata(previous, metadata), "ok")
+
+    def test_url_metadata_hashes_byte_range_sample_without_validators(self):
+        sample = b"x" * 1024
+        partial = FakeResponse(
+            status_code=206,
+            content=sample,
+            headers={"Content-Length": "1024", "Content-Range": "bytes 0-1023/987654"},
+        )
+
+        with patch.object(web_app, "http_head", return_value=FakeResponse(status_code=200)), \
+             patch.object(web_app, "SOURCE_HASH_SAMPLE_BYTES", 1024), \
+             patch.object(web_app, "http_get", return_value=partial) as mock_get:
+            metadata = web_app.check_url_metadata("https://example.com/formulary.pdf")
+
+        self.assertEqual(mock_get.call_args.kwargs["headers"]["Range"], "bytes=0-1023")
+        self.assertEqual(metadata["status_code"], 206)
+        self.assertEqual(metadata["content_length"], "987654")
+        self.assertEqual(metadata["content_hash"], web_app.hashlib.sha256(sample).hexdigest())
+
+    def test_source_freshness_check_runs_sources_concurrently_in_order(self):
+        source_groups = [{
+            "carrier": "Test Carrier",
+            "sources": [
+                web_app.provider_source(name, name.lower(), url, web_app.CMS_PRIMARY_ROLE, "Test note.")
+                for name, url in [
+                    ("First", "https://a.example.com/first"),
+                    ("Second", "https://b.example.com/second"),
+                    ("Shared", "https://a.example.com/first"),
+                    ("Third", "https://c.example.com/third"),
+                ]
+            ],
+            "open_questions": [],
+        }]
+        checked_urls = []
+
+        def fake_metadata(url, previous=None):
+            time.sleep(0.1)
+            checked_urls.append(url)
+            return {"ok": True, "etag": url, "url": url}
+
+        def fake_puf(previous_cache):
+            time.sleep(0.1)
+            return {"status": "ok", "updates": {}}
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             patch.object(web_app, "SOURCE_FRESHNESS_CACHE_PATH", os.path.join(tmpdir, "sources.json")), \
+             patch.object(web_app, "SOURCE_FRESHNESS_WORKERS", 4), \
+             patch.object(web_app, "CARRIER_SOURCE_GROUPS", source_groups), \
+             patch.object(web_app, "check_url_metadata", side_effect=fake_metadata), \
+             patch.object(web_app, "check_cms_puf_page", side_effect=fake_puf):
+            started = time.perf_counter()
+            cache = web_app.check_source_freshness({})
+            elapsed = time.perf_counter() - started
+            written_files = os.listdir(tmpdir)
+
+        self.assertLess(elapsed, 0.3)
+        self.assertCountEqual(checked_urls, [
+            "https://a.example.com/first",
+            "https://b.example.com/second",
+            "https://c.example.com/third",
+        ])
+        self.assertEqual([source["name"] for source in cache["sources"]], ["First", "Second", "Shared", "Third"])
+        self.assertEqual(cache["sources"][2]["etag"], "https://a.example.com/first")
+        self.assertEqual(written_files, ["sources.json"])
+
     def test_search_route_does_not_trigger_source_freshness_check(self):
         with patch.object(web_app, "search_npi", return_value=[]), \
+             patch.object(web_app, "fetch_provider_coverage_batch", return_value=web_app.CoverageBatch("npi")), \
              patch.object(web_app, "check_network_statuses", return_value={}), \
              patch.object(web_app, "check_source_freshness") as mock_check:
             client = web_app.app.test_client()
@@ -608,6 +919,171 @@ class LookupTests(unittest.TestCase):
         self.assertFalse(response.json["in_progress"])
         mock_check.assert_not_called()
 
+    def test_source_status_route_memoizes_summary_until_file_changes(self):
+        cache = {
+            "last_checked": web_app.utc_now_iso(),
+            "ttl_seconds": web_app.SOURCE_FRESHNESS_TTL_SECONDS,
+            "puf": {"status": "ok"},
+            "sources": [{"status": "ok"}],
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             patch.object(web_app, "SOURCE_FRESHNESS_CACHE_PATH", os.path.join(tmpdir, "sources.json")):
+            with open(web_app.SOURCE_FRESHNESS_CACHE_PATH, "w", encoding="utf-8") as handle:
+                json.dump(cache, handle)
+            client = web_app.app.test_client()
+            first = client.get("/sources/status")
+            with patch.object(web_app, "load_source_freshness_cache") as mock_load:
+                revalidated = client.get("/sources/status", headers={"If-None-Match": first.headers["ETag"]})
+            mock_load.assert_not_called()
+
+            cache["sources"].append({"status": "missing"})
+            with open(web_app.SOURCE_FRESHNESS_CACHE_PATH, "w", encoding="utf-8") as handle:
+                json.dump(cache, handle)
+            updated = client.get("/sources/status", headers={"If-None-Match": first.headers["ETag"]})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("no-cache", first.headers["Cache-Control"])
+        self.assertTrue(first.headers["ETag"].startswith('W/"'))
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(updated.status_code, 200)
+        self.assertNotEqual(updated.headers["ETag"], first.headers["ETag"])
+        self.assertEqual(updated.json["counts"]["missing"], 1)
+
+    def test_source_status_route_refreshes_stale_snapshot_once_in_background(self):
+        stale_cache = {
+            "last_checked": "2026-01-01T00:00:00+00:00",
+            "ttl_seconds": web_app.SOURCE_FRESHNESS_TTL_SECONDS,
+            "puf": {"status": "ok"},
+            "sources": [{"status": "ok"}],
+        }
+        refreshed_cache = {
+            **stale_cache,
+            "last_checked": web_app.utc_now_iso(),
+            "sources": [{"status": "ok"}, {"status": "changed"}],
+        }
+        release = threading.Event()
+
+        def slow_refresh(previous_cache, save=True):
+            release.wait(5)
+            return refreshed_cache
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             patch.object(web_app, "SOURCE_FRESHNESS_CACHE_PATH", os.path.join(tmpdir, "sources.json")), \
+             patch.object(web_app, "check_source_freshness", side_effect=slow_refresh) as mock_check:
+            with open(web_app.SOURCE_FRESHNESS_CACHE_PATH, "w", encoding="utf-8") as handle:
+                json.dump(stale_cache, handle)
+            client = web_app.app.test_client()
+            first = client.get("/sources/status")
+            second = client.get("/sources/status")
+            release.set()
+            web_app._source_freshness_refresh["thread"].join(5)
+            third = client.get("/sources/status")
+
+        self.assertTrue(first.json["in_progress"])
+        self.assertEqual(first.json["last_checked"], stale_cache["last_checked"])
+        self.assertTrue(second.json["in_progress"])
+        mock_check.assert_called_once_with(stale_cache, save=False)
+        self.assertFalse(third.json["in_progress"])
+        self.assertEqual(third.json["status"], "changed")
+        self.assertEqual(third.json["counts"]["total"], 2)
+
+    def test_background_refresh_serves_result_when_cache_path_is_read_only(self):
+        refreshed_cache = {
+            "last_checked": web_app.utc_now_iso(),
+            "ttl_seconds": web_app.SOURCE_FRESHNESS_TTL_SECONDS,
+            "puf": {"status": "ok"},
+            "sources": [{"status": "ok"}],
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             patch.object(web_app, "SOURCE_FRESHNESS_CACHE_PATH", os.path.join(tmpdir, "sources.json")), \
+             patch.object(web_app, "check_source_freshness", return_value=refreshed_cache), \
+             patch.object(web_app, "save_source_freshness_cache", side_effect=PermissionError("read-only")), \
+             contextlib.redirect_stderr(io.StringIO()) as stderr:
+            web_app.run_source_freshness_refresh(web_app.SOURCE_FRESHNESS_CACHE_PATH, {})
+            summary, _ = web_app.source_freshness_status()
+
+        self.assertIn("Warning: could not write", stderr.getvalue())
+        self.assertIsNone(web_app._source_freshness_refresh["failed_at"])
+        self.assertEqual(summary["last_checked"], refreshed_cache["last_checked"])
+        self.assertFalse(summary["in_progress"])
+
+    def test_zip_county_index_resolves_any_texas_zip_from_census_files(self):
+        relationship = "\n".join([
+            "OID_ZCTA5_20|GEOID_ZCTA5_20|GEOID_COUNTY_20|AREALAND_PART",
+            "1|79901|48141|2000000",
+            "2|75001|48113|100",
+            "2|75001|48085|9000",
+            "3|73301|40109|500",
+            "4||48301|800",
+        ])
+        gazetteer = "\n".join([
+            "GEOID\tALAND\tAWATER\tINTPTLAT\tINTPTLONG                                                                ",
+            "79901\t2000000\t0\t31.758641\t-106.478305",
+            "75001\t9100\t0\t32.960092\t-96.838517",
+            "73301\t500\t0\t35.467000\t-97.516000",
+        ])
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+        relationship_path = os.path.join(store_dir.name, "relationship.txt")
+        gazetteer_path = os.path.join(store_dir.name, "gazetteer.txt")
+        index_path = os.path.join(store_dir.name, "zip_county_index.bin")
+        with open(relationship_path, "w", encoding="utf-8") as handle:
+            handle.write("\ufeff" + relationship)
+        with open(gazetteer_path, "w", encoding="utf-8") as handle:
+            handle.write(gazetteer)
+
+        rows = web_app.zip_county_rows_from_census(relationship_path, gazetteer_path)
+        self.assertEqual(web_app.write_zip_county_index(rows, index_path), 2)
+
+        with patch.object(web_app, "ZIP_COUNTY_INDEX_PATH", index_path):
+            el_paso = web_app.resolve_texas_location("79901")
+            split_county = web_app.lookup_zip_county("75001-1234")
+            unknown = web_app.resolve_texas_location("79999")
+            with patch.object(web_app, "search_drugs", return_value=[]), \
+                 patch.object(web_app, "checked_formulary_matches_for_drugs", return_value={}) as mock_matches:
+                client = web_app.app.test_client()
+                client.get("/drugs/search?q=metformin&formulary_only=true&carriers=bcbstx&zipcode=79901")
+
+        self.assertEqual(el_paso[2], {"zipcode": "79901", "countyfips": "48141", "state": "TX"})
+        self.assertAlmostEqual(el_paso[0], 31.758641)
+        self.assertAlmostEqual(el_paso[1], -106.478305)
+        self.assertEqual(split_county["countyfips"], "48085")
+        self.assertEqual(unknown[2], web_app.TEXAS_MARKETPLACE_PLACES["dallas"])
+        self.assertEqual(mock_matches.call_args.args[2]["countyfips"], "48141")
+        self.assertEqual(web_app.resolve_texas_location("houston")[2]["countyfips"], "48201")
+
+    def test_place_centroids_are_built_from_census_place_gazetteer(self):
+        gazetteer = "\n".join([
+            "USPS\tGEOID\tANSICODE\tNAME\tLSAD\tFUNCSTAT\tALAND\tAWATER\tINTPTLAT\tINTPTLONG     ",
+            "TX\t4819000\t02410288\tDallas city\t25\tA\t1\t0\t32.794176\t-96.765503",
+            "TX\t4872656\t02409388\tThe Woodlands CDP\t57\tS\t1\t0\t30.183280\t-95.503960",
+            "OK\t4055000\t02411311\tOklahoma City city\t25\tA\t1\t0\t35.467000\t-97.516000",
+        ])
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+        gazetteer_path = os.path.join(store_dir.name, "places.txt")
+        centroids_path = os.path.join(store_dir.name, "places.csv")
+        with open(gazetteer_path, "w", encoding="utf-8") as handle:
+            handle.write("\ufeff" + gazetteer)
+
+        rows = web_app.place_centroid_rows_from_census(gazetteer_path)
+        self.assertEqual(web_app.write_place_centroids(rows, centroids_path), 2)
+
+        with patch.object(web_app, "TEXAS_PLACE_CENTROIDS_PATH", centroids_path):
+            self.assertEqual(web_app.lookup_texas_place("The  Woodlands"), (30.1833, -95.504))
+            self.assertEqual(web_app.lookup_texas_place("dallas"), (32.7942, -96.7655))
+            self.assertIsNone(web_app.lookup_texas_place("oklahoma city"))
+
+    def test_bundled_zip_county_index_covers_texas_zip_codes(self):
+        index = web_app.zip_county_index()
+
+        self.assertGreater(index.count, 2000)
+        self.assertEqual(web_app.lookup_zip_county("79901")["countyfips"], "48141")
+        self.assertEqual(web_app.lookup_zip_county("77002")["countyfips"], "48201")
+        self.assertEqual(web_app.resolve_texas_location("78418")[2]["countyfips"], "48355")
+
     def test_marketplace_plan_lookup_filters_matching_plan_ids(self):
         web_app.get_marketplace_plan_ids.cache_clear()
         first_page = {
@@ -637,7 +1113,7 @@ class LookupTests(unittest.TestCase):
             ]
         }
 
-        with patch.object(web_app.requests, "post") as mock_post:
+        with patch.object(web_app, "http_post") as mock_post:
             mock_post.side_effect = [FakeResponse(first_page), FakeResponse(second_page)]
             plan_ids = web_app.get_marketplace_plan_ids(
                 "Blue Cross and Blue Shield of Texas",
@@ -653,6 +1129,373 @@ class LookupTests(unittest.TestCase):
         self.assertEqual(plan_ids, ("match-1", "match-2"))
         self.assertEqual(offsets, [0, 10])
 
+    def test_marketplace_plan_lookup_fetches_remaining_pages_concurrently_from_total(self):
+        def plan_page(offset, count):
+            return {
+                "total": 35,
+                "plans": [
+                    {"id": f"plan-{offset + index}", "name": "Blue Advantage HMO", "network_url": ""}
+                    for index in range(count)
+                ],
+            }
+
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fake_post(url, params, json, timeout):
+            offset = json["offset"]
+            if offset:
+                barrier.wait()
+            return FakeResponse(plan_page(offset, 5 if offset == 30 else 10))
+
+        with patch.object(web_app, "http_post", side_effect=fake_post) as mock_post:
+            plan_ids = web_app.fetch_marketplace_plan_ids(
+                "Blue Cross and Blue Shield of Texas", 2026, "75201", "48113", "TX",
+                ("blue advantage",), "",
+            )
+
+        offsets = sorted(call.kwargs["json"]["offset"] for call in mock_post.call_args_list)
+        self.assertEqual(offsets, [0, 10, 20, 30])
+        self.assertEqual(plan_ids, tuple(f"plan-{index}" for index in range(35)))
+
+    def test_marketplace_plan_lookup_keeps_walking_when_total_is_stale(self):
+        def fake_post(url, params, json, timeout):
+            offset = json["offset"]
+            count = 10 if offset < 20 else 3
+            return FakeResponse({
+                "total": 15,
+                "plans": [
+                    {"id": f"plan-{offset + index}", "name": "Blue Advantage HMO", "network_url": ""}
+                    for index in range(count)
+                ],
+            })
+
+        with patch.object(web_app, "http_post", side_effect=fake_post) as mock_post:
+            plan_ids = web_app.fetch_marketplace_plan_ids(
+                "Blue Cross and Blue Shield of Texas", 2026, "75201", "48113", "TX",
+                ("blue advantage",), "",
+            )
+
+        offsets = [call.kwargs["json"]["offset"] for call in mock_post.call_args_list]
+        self.assertEqual(offsets, [0, 10, 20])
+        self.assertEqual(len(plan_ids), 23)
+
+    def test_marketplace_plan_ids_persist_across_process_cache_resets(self):
+        web_app.get_marketplace_plan_ids.cache_clear()
+        page = {"plans": [{"id": "match-1", "name": "Blue Advantage HMO", "network_url": ""}]}
+        lookup_args = (
+            "Blue Cross and Blue Shield of Texas", 2026, "77030", "48201", "TX",
+            ("blue advantage",), "",
+        )
+        marker = ["April 28, 2026"]
+
+        with patch.object(web_app, "plan_attributes_puf_marker", side_effect=lambda: marker[0]), \
+             patch.object(web_app, "http_post", return_value=FakeResponse(page)) as mock_post:
+            first = web_app.get_marketplace_plan_ids(*lookup_args)
+            web_app.get_marketplace_plan_ids.cache_clear()
+            second = web_app.get_marketplace_plan_ids(*lookup_args)
+            calls_before_puf_change = mock_post.call_count
+            marker[0] = "October 1, 2026"
+            web_app.get_marketplace_plan_ids.cache_clear()
+            web_app.get_marketplace_plan_ids(*lookup_args)
+
+        web_app.get_marketplace_plan_ids.cache_clear()
+        self.assertEqual(first, ("match-1",))
+        self.assertEqual(second, ("match-1",))
+        self.assertEqual(calls_before_puf_change, 1)
+        self.assertEqual(mock_post.call_count, 2)
+
+    def test_stored_plan_ids_expire_after_ttl(self):
+        web_app.store_plan_ids("key", ("plan-1",), "marker")
+
+        self.assertEqual(web_app.load_stored_plan_ids("key", "marker"), ("plan-1",))
+        with patch.object(web_app, "PLAN_ID_CACHE_TTL_SECONDS", -1):
+            self.assertIsNone(web_app.load_stored_plan_ids("key", "marker"))
+
+    def write_puf_fixtures(self, directory):
+        plan_attributes = (
+            "BusinessYear,StateCode,IssuerId,IssuerMarketPlaceMarketingName,StandardComponentId,PlanId,"
+            "PlanMarketingName,NetworkId,ServiceAreaId,MarketCoverage,DentalOnlyPlan\n"
+            "2026,TX,33602,Blue Cross and Blue Shield of Texas,33602TX0460001,33602TX0460001-01,"
+            "Blue Advantage Gold HMO,TXN001,TXS001,Individual,No\n"
+            "2026,TX,33602,Blue Cross and Blue Shield of Texas,33602TX0460001,33602TX0460001-04,"
+            "Blue Advantage Gold HMO,TXN001,TXS001,Individual,No\n"
+            "2026,TX,33602,Blue Cross and Blue Shield of Texas,33602TX0460002,33602TX0460002-01,"
+            "Blue Advantage Silver HMO,TXN001,TXS002,Individual,No\n"
+            "2026,TX,33602,Blue Cross and Blue Shield of Texas,33602TX0460003,33602TX0460003-01,"
+            "Blue Advantage Bronze HMO,TXN001,TXS003,Individual,No\n"
+            "2026,TX,33602,Blue Cross and Blue Shield of Texas,33602TX0470001,33602TX0470001-01,"
+            "MyBlue Health Gold,TXN002,TXS001,Individual,No\n"
+            "2026,TX,33602,Blue Cross and Blue Shield of Texas,33602TX0480001,33602TX0480001-01,"
+            "Blue Advantage Dental,TXN001,TXS001,Individual,Yes\n"
+            "2026,TX,33602,Blue Cross and Blue Shield of Texas,33602TX0490001,33602TX0490001-01,"
+            "Blue Advantage Group HMO,TXN001,TXS001,SHOP (Small Group),No\n"
+            "2025,TX,33602,Blue Cross and Blue Shield of Texas,33602TX0450001,33602TX0450001-01,"
+            "Blue Advantage Gold HMO,TXN001,TXS001,Individual,No\n"
+        )
+        service_area = (
+            "BusinessYear,StateCode,IssuerId,ServiceAreaId,CoverEntireState,County,PartialCounty,"
+            "ZipCodes,MarketCoverage,DentalOnlyPlan\n"
+            "2026,TX,33602,TXS001,No,48201,No,,Individual,No\n"
+            "2026,TX,33602,TXS002,No,48201,Yes,\"77001, 77002\",Individual,No\n"
+            "2026,TX,33602,TXS003,Yes,,No,,Individual,No\n"
+        )
+        network = (
+            "BusinessYear,StateCode,IssuerId,NetworkName,NetworkId,NetworkURL,MarketCoverage,DentalOnlyPlan\n"
+            "2026,TX,33602,Blue Advantage HMO,TXN001,https://www.bcbstx.com/find-care/blue-advantage,Individual,No\n"
+            "2026,TX,33602,MyBlue Health,TXN002,https://www.bcbstx.com/find-care/myblue,Individual,No\n"
+        )
+        plan_attributes_path = os.path.join(directory, "plan-attributes-puf.zip")
+        with zipfile.ZipFile(plan_attributes_path, "w") as archive:
+            archive.writestr("Plan_Attributes_PUF.csv", plan_attributes)
+        paths = [plan_attributes_path]
+        for name, text in (("service-area-puf.csv", service_area), ("network-puf.csv", network)):
+            paths.append(os.path.join(directory, name))
+            with open(paths[-1], "w", encoding="utf-8") as handle:
+                handle.write(text)
+        return paths
+
+    def test_plan_ids_resolve_from_ingested_puf_store_without_plan_search(self):
+        web_app.get_marketplace_plan_ids.cache_clear()
+        self.addCleanup(web_app.get_marketplace_plan_ids.cache_clear)
+        fixture_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(fixture_dir.cleanup)
+
+        counts = web_app.ingest_puf_files(*self.write_puf_fixtures(fixture_dir.name), plan_year=2026, states=["TX"])
+
+        self.assertEqual(counts, {"plans": 4, "service_areas": 3})
+        with patch.object(web_app, "http_post", side_effect=AssertionError("plan search called")):
+            houston = web_app.get_marketplace_plan_ids(
+                "Blue Cross and Blue Shield of Texas", 2026, "77030", "48201", "TX", ("blue advantage",), "",
+            )
+            partial_zip = web_app.get_marketplace_plan_ids(
+                "Blue Cross and Blue Shield of Texas", 2026, "77002", "48201", "TX", ("blue advantage",), "",
+            )
+            dallas = web_app.get_marketplace_plan_ids(
+                "blue cross and blue shield of texas", 2026, "75201", "48113", "TX", (), "myblue",
+            )
+        self.assertEqual(houston, ("33602TX0460001", "33602TX0460003"))
+        self.assertEqual(partial_zip, ("33602TX0460001", "33602TX0460002", "33602TX0460003"))
+        self.assertEqual(dallas, ())
+
+        page = {"plans": [{"id": "live-1", "name": "Blue Advantage HMO", "network_url": ""}]}
+        with patch.object(web_app, "http_post", return_value=FakeResponse(page)) as mock_post:
+            other_year = web_app.get_marketplace_plan_ids(
+                "Blue Cross and Blue Shield of Texas", 2027, "77030", "48201", "TX", ("blue advantage",), "",
+            )
+            other_issuer = web_app.get_marketplace_plan_ids(
+                "BlueCross BlueShield of Texas", 2026, "77030", "48201", "TX", ("blue advantage",), "",
+            )
+        self.assertEqual(other_year, ("live-1",))
+        self.assertEqual(other_issuer, ("live-1",))
+        self.assertEqual(mock_post.call_count, 2)
+
+    def test_puf_zip_without_csv_member_is_rejected(self):
+        fixture_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(fixture_dir.cleanup)
+        empty_zip = os.path.join(fixture_dir.name, "plan-attributes-puf.zip")
+        with zipfile.ZipFile(empty_zip, "w") as archive:
+            archive.writestr("README.txt", "no data")
+
+        with self.assertRaises(ValueError):
+            with web_app.open_puf_csv(empty_zip):
+                pass
+
+    def test_changed_plan_attributes_file_reingests_an_existing_puf_store(self):
+        with open(web_app.PUF_STORE_PATH, "w", encoding="utf-8"):
+            pass
+        previous_cache = {"puf": {"plan_attributes_file": {"ok": True, "etag": '"old"'}}}
+
+        def freshness(file_etag):
+            with tempfile.TemporaryDirectory() as tmpdir, \
+                 patch.object(web_app, "SOURCE_FRESHNESS_CACHE_PATH", os.path.join(tmpdir, "sources.json")), \
+                 patch.object(web_app, "CARRIER_SOURCE_GROUPS", []), \
+                 patch.object(web_app, "check_cms_puf_page", return_value={
+                     "status": "changed", "updates": {"Plan Attributes PUF": "May 1, 2026"},
+                 }), \
+                 patch.object(web_app, "check_url_metadata", return_value={"ok": True, "etag": file_etag}) as mock_metadata, \
+                 patch.object(web_app, "PUF_AUTO_INGEST", True), \
+                 patch.object(web_app, "ingest_puf_files") as mock_ingest:
+                cache = web_app.check_source_freshness(previous_cache)
+            return cache, mock_metadata, mock_ingest
+
+        sources = web_app.default_puf_sources()
+        cache, mock_metadata, mock_ingest = freshness('"old"')
+        mock_metadata.assert_called_once_with(sources["plan_attributes"], {"ok": True, "etag": '"old"'})
+        mock_ingest.assert_not_called()
+
+        cache, mock_metadata, mock_ingest = freshness('"new"')
+        mock_ingest.assert_called_once_with(
+            sources["plan_attributes"], sources["service_area"], sources["network"],
+            puf_marker="May 1, 2026",
+        )
+        self.assertEqual(cache["puf"]["plan_attributes_file"]["etag"], '"new"')
+
+    def test_json_array_is_streamed_across_chunk_boundaries(self):
+        document = ' [ {"npi": 1234567890, "name": "Ann \\"A\\" Lee"}, 12345 ,\n{"npi": "2"}, [1, 2] ] '
+
+        items = list(web_app.iter_json_array(io.StringIO(document), chunk_size=3))
+
+        self.assertEqual(items, [{"npi": 1234567890, "name": 'Ann "A" Lee'}, 12345, {"npi": "2"}, [1, 2]])
+        with self.assertRaises(ValueError):
+            list(web_app.iter_json_array(io.StringIO('[{"npi": 1}, {"npi"'), chunk_size=4))
+        with self.assertRaises(ValueError):
+            list(web_app.iter_json_array(io.StringIO('{"npi": 1}')))
+        self.assertEqual(list(web_app.iter_json_array(io.StringIO(" [ ] "))), [])
+        for malformed in ("[1,,2]", "[1 2]", "[,1]", "[1,]", '[{"a": 1} {"b": 2}]'):
+            with self.assertRaises(ValueError, msg=malformed):
+                list(web_app.iter_json_array(io.StringIO(malformed), chunk_size=2))
+
+    def write_directory_fixtures(self, mirror_dir):
+        issuer_dir = os.path.join(mirror_dir, "directory.issuer.example.com", "mr")
+        os.makedirs(issuer_dir)
+        files = {
+            "index.json": {
+                "provider_urls": ["providers-1.json", "https://directory.issuer.example.com/mr/providers-2.json.gz"],
+                "plan_urls": ["plans.json"],
+                "formulary_urls": [],
+            },
+            "plans.json": [
+                {
+                    "plan_id_type": "HIOS-PLAN-ID",
+                    "plan_id": "33602TX0460001",
+                    "marketing_name": "Blue Advantage Gold HMO",
+                    "network": [{"network_tier": "PREFERRED"}],
+                    "years": [2026],
+                },
+                {
+                    "plan_id_type": "HIOS-PLAN-ID",
+                    "plan_id": "33602TX0460003",
+                    "marketing_name": "Blue Advantage Bronze HMO",
+                    "network": [{"network_tier": "PREFERRED"}],
+                    "years": [2025],
+                },
+            ],
+            "providers-1.json": [
+                {
+                    "npi": 1548387418,
+                    "type": "INDIVIDUAL",
+                    "plans": [
+                        {"plan_id_type": "HIOS-PLAN-ID", "plan_id": "33602TX0460001",
+                         "network_tier": "PREFERRED", "years": [2026]},
+                        {"plan_id_type": "HIOS-PLAN-ID", "plan_id": "33602TX0460002",
+                         "network_tier": "PREFERRED", "years": [2025]},
+                    ],
+                    "addresses": [
+                        {"address": "6565 Fannin St", "city": "Houston", "state": "TX",
+                         "zip": "77030-2707", "phone": "7135551000"},
+                        {"address": "6565 Fannin St", "city": "Houston", "state": "TX",
+                         "zip": "77030", "phone": "7135551000"},
+                    ],
+                },
+                {"npi": "", "plans": []},
+            ],
+        }
+        for name, payload in files.items():
+            with open(os.path.join(issuer_dir, name), "w", encoding="utf-8") as handle:
+                json.dump(payload, handle)
+        with gzip.open(os.path.join(issuer_dir, "providers-2.json.gz"), "wt", encoding="utf-8") as handle:
+            json.dump([{
+                "npi": "1999999999",
+                "type": "FACILITY",
+                "plans": [{"plan_id_type": "HIOS-PLAN-ID", "plan_id": "33602TX0460002", "network_tier": "PREFERRED"}],
+                "addresses": [],
+            }], handle)
+
+        mr_url_puf = os.path.join(mirror_dir, "machine-readable-url-puf.csv")
+        with open(mr_url_puf, "w", encoding="utf-8") as handle:
+            handle.write(
+                "State,Issuer ID,Issuer Name,URL Submitted\n"
+                "TX,33602,Blue Cross and Blue Shield of Texas,https://directory.issuer.example.com/mr/index.json\n"
+                "TX,79888,UnitedHealthcare of Texas,https://missing.issuer.example.com/index.json\n"
+                "OK,87571,Out Of State Issuer,https://other.issuer.example.com/index.json\n"
+            )
+        return mr_url_puf
+
+    def test_provider_directory_index_answers_coverage_before_the_api(self):
+        mirror_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(mirror_dir.cleanup)
+        mr_url_puf = self.write_directory_fixtures(mirror_dir.name)
+
+        with patch.object(web_app, "MR_DIRECTORY_CHUNK_SIZE", 16), \
+             patch.object(web_app, "http_get", side_effect=AssertionError("issuer host contacted")):
+            outcomes = web_app.ingest_provider_directories(mr_url_puf, states=["TX"], mirror_dir=mirror_dir.name)
+
+        self.assertEqual(outcomes, {"indexed": 1, "failed": 1, "providers": 2})
+        with contextlib.closing(sqlite3.connect(web_app.MR_DIRECTORY_INDEX_PATH)) as connection:
+            plans = connection.execute(
+                "SELECT plan_id, network_tier, years FROM mr_provider_plans WHERE npi = '1548387418' ORDER BY plan_id"
+            ).fetchall()
+            addresses = connection.execute(
+                "SELECT address, city, state, zip, phone FROM mr_provider_addresses WHERE npi = '1548387418'"
+            ).fetchall()
+        self.assertEqual(plans, [("33602TX0460001", "PREFERRED", ",2026,"), ("33602TX0460002", "PREFERRED", ",2025,")])
+        self.assertEqual(addresses, [("6565 Fannin St", "Houston", "TX", "77030", "7135551000")])
+
+        network = {
+            "id": "bcbstx:blue_advantage_hmo",
+            "name": "Blue Advantage HMO",
+            "marketplace_issuer": "Blue Cross and Blue Shield of Texas",
+            "plan_year": 2026,
+        }
+        place = {"zipcode": "77030", "countyfips": "48201", "state": "TX"}
+        npi_results = [{"npi": "1548387418", "name": "ANN LEE"}]
+        with patch.object(web_app, "get_network_plan_ids", return_value=("33602TX0460001",)), \
+             patch.object(web_app, "http_get", side_effect=AssertionError("coverage API called")):
+            directory_status = web_app.check_marketplace_network_status("Ann Lee", "doctor", npi_results, network, place)
+        self.assertEqual(directory_status["status"], "in")
+        self.assertEqual(directory_status["source"], "Issuer provider directory")
+        self.assertTrue(directory_status["detail"].startswith("The issuer's provider directory shows"))
+
+        unlisted_payload = {"coverage": [{"npi": "1548387418", "plan_id": "33602TX0460002", "coverage": "NotCovered"}]}
+        with patch.object(web_app, "get_network_plan_ids", return_value=("33602TX0460001", "33602TX0460002")), \
+             patch.object(web_app, "http_get", return_value=FakeResponse(unlisted_payload)) as mock_get:
+            status = web_app.check_marketplace_network_status("Ann Lee", "doctor", npi_results, network, place)
+        self.assertEqual(status["status"], "partial_coverage")
+        self.assertEqual(status["source"], "CMS Marketplace API + issuer provider directory")
+        self.assertEqual(mock_get.call_args.kwargs["params"]["planids"], "33602TX0460002")
+
+        absent_payload = {"coverage": [{"npi": "1000000000", "plan_id": "33602TX0460001", "coverage": "Covered"}]}
+        with patch.object(web_app, "get_network_plan_ids", return_value=("33602TX0460001",)), \
+             patch.object(web_app, "http_get", return_value=FakeResponse(absent_payload)) as mock_get:
+            absent_status = web_app.check_marketplace_network_status(
+                "Bo Day", "doctor", [{"npi": "1000000000", "name": "BO DAY"}], network, place,
+            )
+        self.assertEqual(mock_get.call_args.kwargs["params"]["planids"], "33602TX0460001")
+        self.assertEqual((absent_status["status"], absent_status["source"]), ("in", "CMS Marketplace API"))
+
+        api_payload = {"coverage": [
+            {"npi": "1548387418", "plan_id": "33602TX0460003", "coverage": "NotCovered"},
+            {"npi": "1548387418", "plan_id": "79888TX0010001", "coverage": "Covered"},
+        ]}
+        with patch.object(web_app, "http_get", return_value=FakeResponse(api_payload)) as mock_get:
+            rows = web_app.fetch_provider_coverage_rows(
+                ["1548387418"], ["33602TX0460001", "33602TX0460003", "79888TX0010001"], 2026
+            )
+        self.assertEqual(mock_get.call_args.kwargs["params"]["planids"], "33602TX0460003,79888TX0010001")
+        self.assertEqual(
+            [(row["plan_id"], row["coverage"]) for row in rows],
+            [("33602TX0460001", "Covered"), ("33602TX0460003", "NotCovered"), ("79888TX0010001", "Covered")],
+        )
+
+    def test_json_array_stops_at_a_malformed_element_without_reading_the_tail(self):
+        class CountingReader(io.StringIO):
+            reads = 0
+
+            def read(self, size=-1):
+                CountingReader.reads += 1
+                return super().read(size)
+
+        tail = ", ".join(f'{{"npi": "{index}"}}' for index in range(50000))
+        handle = CountingReader('[{"npi": "1"}, {"npi" "2"}, ' + tail + "]")
+
+        with self.assertRaises(ValueError):
+            list(web_app.iter_json_array(handle, chunk_size=64))
+        self.assertEqual(CountingReader.reads, 1)
+        self.assertEqual(
+            list(web_app.iter_json_array(io.StringIO('[1.5, -2e3, "\\u00e9", true, null]'), chunk_size=1)),
+            [1.5, -2e3, "\u00e9", True, None],
+        )
+
     def test_marketplace_lookup_matches_npi_and_marks_in_network(self):
         marketplace_payload = {
             "coverage": [
@@ -673,7 +1516,7 @@ class LookupTests(unittest.TestCase):
         place = {"zipcode": "77030", "countyfips": "48201", "state": "TX"}
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=("33602TX0461041",)), \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(marketplace_payload)
             status = web_app.check_marketplace_network_status(
                 "Houston Methodist Hospital",
@@ -714,7 +1557,7 @@ class LookupTests(unittest.TestCase):
         place = {"zipcode": "77030", "countyfips": "48201", "state": "TX"}
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=("plan-1", "plan-2")), \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(marketplace_payload)
             status = web_app.check_marketplace_network_status(
                 "Houston Methodist Hospital",
@@ -747,7 +1590,7 @@ class LookupTests(unittest.TestCase):
         place = {"zipcode": "77030", "countyfips": "48201", "state": "TX"}
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=("plan-1",)), \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(marketplace_payload)
             status = web_app.check_marketplace_network_status(
                 "Methodist Hospital",
@@ -771,7 +1614,7 @@ class LookupTests(unittest.TestCase):
         place = {"zipcode": "78205", "countyfips": "48029", "state": "TX"}
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=plan_ids), \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_get") as mock_get:
             mock_get.side_effect = [
                 FakeResponse({"coverage": []}),
                 FakeResponse({
@@ -826,7 +1669,7 @@ class LookupTests(unittest.TestCase):
         place = {"zipcode": "78205", "countyfips": "48029", "state": "TX"}
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=("plan-1",)), \
-             patch.object(web_app.requests, "get", side_effect=web_app.requests.RequestException("timeout")):
+             patch.object(web_app, "http_get", side_effect=web_app.requests.RequestException("timeout")):
             status = web_app.check_marketplace_network_status(
                 "Methodist Hospital",
                 "facility",
@@ -838,6 +1681,77 @@ class LookupTests(unittest.TestCase):
         self.assertEqual(status["status"], "lookup_error")
         self.assertIn("coverage lookup failed", status["detail"])
 
+    def test_network_statuses_check_networks_concurrently_in_order(self):
+        networks = web_app.build_networks(
+            web_app.generate_bcbstx_urls("", 0, 0, 25),
+            web_app.generate_uhc_urls(),
+        )
+        barrier = threading.Barrier(len(networks), timeout=5)
+
+        def fake_status(provider_name, provider_type, npi_results, network, place, **kwargs):
+            barrier.wait()
+            return {"status": "in", "network": network["id"]}
+
+        with patch.object(web_app, "check_marketplace_network_status", side_effect=fake_status):
+            statuses = web_app.check_network_statuses(
+                "John Smith", "doctor", [{"npi": "1"}], networks, {}
+            )
+
+        self.assertEqual(list(statuses), [network["id"] for network in networks])
+        for network_id, status in statuses.items():
+            self.assertEqual(status["network"], network_id)
+
+    def test_prescription_statuses_respect_serial_worker_setting(self):
+        networks = web_app.build_networks({}, web_app.generate_uhc_urls())
+        calls = []
+
+        def fake_status(prescription, network, place, **kwargs):
+            calls.append(threading.current_thread())
+            return {"status": "drug_covered"}
+
+        with patch.object(web_app, "check_marketplace_drug_status", side_effect=fake_status), \
+             patch.object(web_app, "enrich_status_with_formulary_tier", side_effect=lambda status, *args: status):
+            statuses = web_app.check_prescription_statuses(
+                {"prescription": "Ibuprofen"}, networks, {}, max_workers=1
+            )
+
+        self.assertEqual(list(statuses), [network["id"] for network in networks])
+        self.assertEqual(set(calls), {threading.current_thread()})
+
+    def test_host_semaphore_caps_requests_per_host(self):
+        with patch.object(web_app, "_host_semaphores", {}), \
+             patch.object(web_app, "HTTP_PER_HOST_CONCURRENCY", 2):
+            npi_slot = web_app.host_semaphore(web_app.NPI_API)
+            self.assertIs(web_app.host_semaphore(web_app.NPI_API + "?version=2.1"), npi_slot)
+            self.assertIsNot(web_app.host_semaphore(web_app.CMS_MARKETPLACE_API), npi_slot)
+            self.assertTrue(npi_slot.acquire(blocking=False))
+            self.assertTrue(npi_slot.acquire(blocking=False))
+            self.assertFalse(npi_slot.acquire(blocking=False))
+
+    def test_outbound_calls_share_one_pooled_session_with_retries(self):
+        with patch.object(web_app, "_http_session", None):
+            session = web_app.http_session()
+            self.assertIs(web_app.http_session(), session)
+
+        adapter = session.get_adapter(web_app.NPI_API)
+        self.assertIs(session.get_adapter(web_app.CMS_MARKETPLACE_API), adapter)
+        self.assertEqual(adapter._pool_connections, web_app.HTTP_POOL_CONNECTIONS)
+        self.assertEqual(adapter._pool_maxsize, web_app.HTTP_POOL_MAXSIZE)
+        self.assertEqual(adapter.max_retries.total, web_app.HTTP_MAX_RETRIES)
+        self.assertEqual(adapter.max_retries.read, 0)
+        self.assertIn("POST", adapter.max_retries.allowed_methods)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+
+        with patch.object(web_app, "http_session") as mock_session:
+            web_app.http_get(web_app.NPI_API, timeout=web_app.NPI_LOOKUP_TIMEOUT)
+            web_app.http_head(web_app.NPI_API, timeout=(1, 4))
+
+        self.assertEqual(
+            mock_session.return_value.get.call_args.kwargs["timeout"],
+            (web_app.HTTP_CONNECT_TIMEOUT, web_app.NPI_LOOKUP_TIMEOUT),
+        )
+        self.assertEqual(mock_session.return_value.head.call_args.kwargs["timeout"], (1, 4))
+
     def test_drug_search_resolves_rxcui_from_marketplace_autocomplete(self):
         drug_payload = [
             {
@@ -849,7 +1763,7 @@ class LookupTests(unittest.TestCase):
             }
         ]
 
-        with patch.object(web_app.requests, "get") as mock_get:
+        with patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(drug_payload)
             result = web_app.resolve_prescription("Ibuprofen")
 
@@ -878,7 +1792,7 @@ class LookupTests(unittest.TestCase):
             },
         ]
 
-        with patch.object(web_app.requests, "get") as mock_get:
+        with patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(drug_payload)
             client = web_app.app.test_client()
             response = client.get("/drugs/search?q=atorvastatin")
@@ -923,7 +1837,7 @@ class LookupTests(unittest.TestCase):
 
         with patch.object(web_app, "search_drugs", return_value=drug_payload), \
              patch.object(web_app, "get_marketplace_plan_ids", return_value=("plan-1",)), \
-             patch.object(web_app.requests, "get", side_effect=coverage_response), \
+             patch.object(web_app, "http_get", side_effect=coverage_response), \
              patch.object(web_app, "formulary_pdf_text") as mock_formulary_pdf_text:
             client = web_app.app.test_client()
             response = client.get(
@@ -1066,6 +1980,162 @@ class LookupTests(unittest.TestCase):
             "Tier 2",
         )
 
+    def test_formulary_line_tokenizer_matches_per_call_regexes(self):
+        samples = bench_formulary.formulary_samples(bench_formulary.SAMPLE_FORMULARY_TEXT) + [
+            "",
+            "tab 2.(3) 5 st",
+            "drug (2 PA) 3 ld, ql 1",
+            "drug 1.5 2 pa3 QL-4 6",
+            "drug (unclosed 2.5 4 AC",
+            "ql PA st Ac",
+        ]
+
+        for sample in samples:
+            self.assertEqual(
+                web_app.formulary_line_tier_and_requirements(sample),
+                bench_formulary.per_call_tier_and_requirements(sample),
+                sample,
+            )
+
+    def test_formulary_text_index_keeps_substring_and_window_semantics(self):
+        text = """
+        hydrochlorothiazide cap 12.5 mg 1
+        losartan potassium-hydrochlorothiazide tab 50-12.5 mg,
+        100-25 mg (Hyzaar)
+        2 QL
+        PERINDOPRIL ERBUMINE - perindopril erbumine tab 2 mg, 8 mg 3
+        """
+
+        search = web_app.search_formulary_text_for_tier
+        self.assertEqual(search(text, ["Chlorothiazide"])["tier_label"], "Tier 1")
+        self.assertEqual(search(text, ["potassium-hydro"])["tier_label"], "Tier 2")
+        self.assertEqual(search(text, ["potassium-hydro"])["restriction_label"], "QL")
+        self.assertEqual(search(text, ["ERBUMINE tab"])["tier_label"], "Tier 3")
+        self.assertEqual(search(text, ["pril erbumine - peri"])["tier_label"], "Tier 3")
+        self.assertEqual(search(text, ["Perindopril", "Losartan"])["tier_label"], "Tier 2")
+        self.assertEqual(search(text, ["erbumine losartan"]), {})
+        self.assertEqual(search(text, ["", "Lisinopril"]), {})
+        self.assertIs(web_app.formulary_text_index(text), web_app.formulary_text_index(text))
+
+    def test_formulary_text_index_lookups_match_a_full_line_scan(self):
+        index = web_app.FormularyTextIndex(bench_formulary.SAMPLE_FORMULARY_TEXT)
+        index.add_text("VALSARTAN tab 40 mg (Diovan) 1")
+        lines = index.normalized_lines
+        terms = {"benicar", "(benicar", "sartan", "tan medoxomil tab", "mg, 10", "ozempic", "pril erbumine - per"}
+        for line in lines[:6]:
+            tokens = line.split()
+            terms.update(" ".join(tokens[start:start + 3])[1:-1] for start in range(len(tokens)))
+
+        self.assertEqual(index.tokens_with_prefix("olmesartan"), [
+            "olmesartan",
+        ])
+        self.assertEqual(index.tokens_with_suffix("(diovan)"), {"(diovan)"})
+        for term in sorted(term for term in terms if term.strip()):
+            term = web_app.normalize_search_text(term)
+            expected = {offset for offset, line in enumerate(lines) if term in line}
+            self.assertEqual(index.matching_offsets(term), expected, term)
+
+    def test_streaming_formulary_pdf_stops_reading_once_match_is_settled(self):
+        pages = [
+            "minoxidil tab 2.5 mg, 10 mg 1\nolmesartan medoxomil tab 5 mg (Benicar) 1",
+            "rosuvastatin calcium tab (Crestor)\n1",
+            "PERINDOPRIL ERBUMINE - perindopril erbumine tab 2 mg, 8 mg 3",
+            "ADEMPAS - riociguat tab 0.5 mg, 1 mg 4 LD, PA, QL",
+        ]
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+        pdf_path = os.path.join(store_dir.name, "formulary.pdf")
+        extracted = []
+
+        def fake_download(url, suffix=""):
+            with open(pdf_path, "wb") as handle:
+                handle.write(b"%PDF")
+            return pdf_path
+
+        def fake_extract(path, start, stop):
+            extracted.append((start, stop))
+            return pages[start:stop]
+
+        document = web_app.FormularyPdfDocument("https://example.com/6T.pdf")
+        with patch.object(web_app, "FORMULARY_PDF_WORKERS", 1), \
+             patch.object(web_app, "FORMULARY_PDF_PAGES_PER_WORKER", 1), \
+             patch.object(web_app, "download_to_temporary_file", side_effect=fake_download), \
+             patch.object(web_app, "pdf_page_count", return_value=len(pages)), \
+             patch.object(web_app, "extract_pdf_pages", side_effect=fake_extract):
+            first = document.search_for_tier(["Minoxidil"])
+            read_after_first = document.pages_read
+            second = document.search_for_tier(["Rosuvastatin"])
+            third = document.search_for_tier(["Lisinopril"])
+
+        self.assertEqual(first["tier_label"], "Tier 1")
+        self.assertLess(read_after_first, len(pages))
+        self.assertEqual(second, web_app.search_formulary_text_for_tier("\n".join(pages), ["Rosuvastatin"]))
+        self.assertEqual(second["tier_label"], "Tier 4")
+        self.assertEqual(third, {})
+        self.assertEqual(extracted, [(0, 1), (1, 2), (2, 3), (3, 4)])
+        self.assertTrue(document.complete)
+        self.assertFalse(os.path.exists(pdf_path))
+
+    def test_formulary_lookup_uses_streaming_pdf_search_when_enabled(self):
+        network = {"id": "bcbstx:blue_advantage_hmo", "carrier": "BCBSTX", "name": "Blue Advantage HMO"}
+        source = {"name": "6-Tier", "url": "https://example.com/6T.pdf"}
+        match = {"tier_label": "Tier 2", "tier_detail": "Drug Tier: 2", "restriction_label": "PA"}
+
+        with patch.object(web_app, "FORMULARY_PDF_STREAMING", True), \
+             patch.object(web_app, "formulary_sources_for_network", return_value=[source]), \
+             patch.object(web_app, "search_formulary_pdf_for_tier", return_value=match) as mock_search, \
+             patch.object(web_app, "formulary_pdf_text") as mock_pdf_text:
+            tiers = web_app.lookup_formulary_tiers({"drug_name": "Mounjaro"}, network)
+
+        mock_search.assert_called_once_with(source["url"], ["Mounjaro"])
+        mock_pdf_text.assert_not_called()
+        self.assertEqual(tiers[0]["tier_label"], "Tier 2")
+
+    def test_formulary_index_matches_text_search_and_skips_pdf_parsing(self):
+        url = "https://example.com/4T.pdf"
+        pages = [
+            "minoxidil tab 2.5 mg, 10 mg 1\nolmesartan medoxomil tab 5 mg (Benicar) 1",
+            "MOUNJARO - tirzepatide soln auto-injector 2.5 mg/0.5ml 2 PA, QL (4 pens/180 days)",
+        ]
+
+        with patch.object(web_app, "check_url_metadata", return_value={"etag": '"v1"'}), \
+             patch.object(web_app, "http_get", return_value=FakeResponse(content=b"%PDF v1", headers={"ETag": '"v1"'})), \
+             patch.object(web_app, "formulary_pdf_pages", return_value=pages):
+            index, outcome = web_app.ingest_formulary_source(url)
+
+        self.assertEqual(outcome, "indexed")
+        self.assertEqual(index["etag"], '"v1"')
+        for term in ("Olmesartan", "Mounjaro", "Minoxidil", "Lisinopril"):
+            expected = web_app.search_formulary_text_for_tier("\n".join(pages), [term])
+            match = web_app.search_formulary_index_for_tier(web_app.load_formulary_index(url), [term])
+            match.pop("formulary_page", None)
+            self.assertEqual(match, expected)
+        self.assertEqual(
+            web_app.search_formulary_index_for_tier(index, ["Mounjaro"])["formulary_page"],
+            2,
+        )
+
+        network = {"id": "bcbstx:blue_advantage_hmo", "carrier": "BCBSTX", "name": "Blue Advantage HMO"}
+        source = {"name": "4-Tier", "url": url}
+        with patch.object(web_app, "formulary_sources_for_network", return_value=[source]), \
+             patch.object(web_app, "formulary_pdf_text") as mock_pdf_text:
+            tiers = web_app.lookup_formulary_tiers({"drug_name": "Mounjaro"}, network)
+
+        mock_pdf_text.assert_not_called()
+        self.assertEqual(tiers[0]["tier_label"], "Tier 2")
+        self.assertEqual(tiers[0]["restriction_label"], "PA QL")
+
+    def test_formulary_ingestion_skips_download_when_etag_is_unchanged(self):
+        url = "https://example.com/6T.pdf"
+        web_app.save_formulary_index({"url": url, "etag": '"v1"', "content_hash": "abc", "rows": []})
+
+        with patch.object(web_app, "check_url_metadata", return_value={"etag": '"v1"'}), \
+             patch.object(web_app, "http_get") as mock_get:
+            _, outcome = web_app.ingest_formulary_source(url)
+
+        self.assertEqual(outcome, "unchanged")
+        mock_get.assert_not_called()
+
     def test_route_uses_exact_prescription_selection_rxcui(self):
         selection = [{
             "rxcui": "259255",
@@ -1079,6 +2149,7 @@ class LookupTests(unittest.TestCase):
         }]
 
         with patch.object(web_app, "search_npi", return_value=[]), \
+             patch.object(web_app, "fetch_drug_coverage_batch", return_value=web_app.CoverageBatch("rxcui")), \
              patch.object(web_app, "check_prescription_statuses", return_value={}):
             client = web_app.app.test_client()
             response = client.get(
@@ -1103,7 +2174,7 @@ class LookupTests(unittest.TestCase):
             }
         ]
 
-        with patch.object(web_app.requests, "get") as mock_get:
+        with patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(drug_payload)
             result = web_app.resolve_prescription("Metformin")
 
@@ -1121,7 +2192,7 @@ class LookupTests(unittest.TestCase):
             }
         ]
 
-        with patch.object(web_app.requests, "get") as mock_get:
+        with patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(drug_payload)
             result = web_app.resolve_prescription("Ozempic")
 
@@ -1154,7 +2225,7 @@ class LookupTests(unittest.TestCase):
         }
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=("plan-1",)), \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(coverage_payload)
             status = web_app.check_marketplace_drug_status(
                 prescription, network, place
@@ -1187,7 +2258,7 @@ class LookupTests(unittest.TestCase):
         }
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=("plan-1",)), \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(coverage_payload)
             status = web_app.check_marketplace_drug_status(
                 prescription, network, place
@@ -1218,7 +2289,7 @@ class LookupTests(unittest.TestCase):
         }
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=("plan-1",)), \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(coverage_payload)
             status = web_app.check_marketplace_drug_status(
                 prescription, network, place
@@ -1256,7 +2327,7 @@ class LookupTests(unittest.TestCase):
         }
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=("plan-1",)), \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(coverage_payload)
             status = web_app.check_marketplace_drug_status(
                 prescription, network, place
@@ -1295,7 +2366,7 @@ class LookupTests(unittest.TestCase):
         }
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=("plan-1",)), \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(coverage_payload)
             status = web_app.check_marketplace_drug_status(
                 prescription, network, place
@@ -1327,7 +2398,7 @@ class LookupTests(unittest.TestCase):
         }
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=("plan-1",)), \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse({"coverage": []})
             status = web_app.check_marketplace_drug_status(
                 prescription, network, place
@@ -1359,7 +2430,7 @@ class LookupTests(unittest.TestCase):
         }
 
         with patch.object(web_app, "get_marketplace_plan_ids", return_value=("plan-1", "plan-2")), \
-             patch.object(web_app.requests, "get") as mock_get:
+             patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(coverage_payload)
             status = web_app.check_marketplace_drug_status(
                 prescription, network, place
@@ -1368,6 +2439,203 @@ class LookupTests(unittest.TestCase):
         self.assertEqual(status["status"], "partial_coverage")
         self.assertIn("1 of 2 matching plan IDs", status["detail"])
 
+    def test_search_route_batches_drug_coverage_across_prescriptions_and_networks(self):
+        prescriptions = {
+            "Ibuprofen": {"prescription": "Ibuprofen", "drug_found": True, "rxcui": "111", "drug_name": "Ibuprofen"},
+            "Lisinopril": {"prescription": "Lisinopril", "drug_found": True, "rxcui": "222", "drug_name": "Lisinopril"},
+        }
+        plan_ids_by_network = {
+            "Blue Advantage HMO": ("blue-1", "blue-2"),
+            "My Blue Health": ("myblue-1",),
+        }
+
+        def fake_plan_ids(network, place):
+            for fragment, plan_ids in plan_ids_by_network.items():
+                if fragment.lower() in network["name"].lower():
+                    return plan_ids
+            return ()
+
+        def fake_coverage(url, params, timeout):
+            return FakeResponse({"coverage": [
+                {"rxcui": rxcui, "plan_id": plan_id, "coverage": "Covered"}
+                for rxcui in params["drugs"].split(",")
+                for plan_id in params["planids"].split(",")
+            ]})
+
+        with patch.object(web_app, "resolve_prescription", side_effect=lambda name: dict(prescriptions[name])), \
+             patch.object(web_app, "get_network_plan_ids", side_effect=fake_plan_ids), \
+             patch.object(web_app, "enrich_status_with_formulary_tier", side_effect=lambda status, *args: status), \
+             patch.object(web_app, "http_get", side_effect=fake_coverage) as mock_get:
+            client = web_app.app.test_client()
+            response = client.get("/search?prescriptions=Ibuprofen,Lisinopril&carriers=bcbstx&carrier_filter_submitted=true")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(call.kwargs["params"]["drugs"], call.kwargs["params"]["planids"]) for call in mock_get.call_args_list],
+            [("111,222", "blue-1,blue-2,myblue-1")],
+        )
+        ibuprofen, lisinopril = response.json["prescriptions"]
+        self.assertEqual(ibuprofen["network_statuses"]["bcbstx:blue_advantage_hmo"]["status"], "drug_covered")
+        self.assertIn("2 of 2 matching plan IDs", ibuprofen["network_statuses"]["bcbstx:blue_advantage_hmo"]["detail"])
+        self.assertIn("1 of 1 matching plan IDs", lisinopril["network_statuses"]["bcbstx:my_blue_health"]["detail"])
+
+    def test_search_route_marks_drugs_whose_batch_misses_deadline_without_late_lookups(self):
+        release = threading.Event()
+        prescription = {"prescription": "Ibuprofen", "drug_found": True, "rxcui": "111", "drug_name": "Ibuprofen"}
+
+        def stuck_batch(*args):
+            release.wait(timeout=5)
+            return web_app.CoverageBatch("rxcui")
+
+        try:
+            with patch.object(web_app, "SEARCH_DEADLINE_SECONDS", 0.2), \
+                 patch.object(web_app, "resolve_prescription", return_value=prescription), \
+                 patch.object(web_app, "fetch_drug_coverage_batch", side_effect=stuck_batch), \
+                 patch.object(web_app, "check_prescription_statuses") as mock_statuses:
+                client = web_app.app.test_client()
+                started = time.monotonic()
+                response = client.get("/search?prescriptions=Ibuprofen")
+                elapsed = time.monotonic() - started
+        finally:
+            release.set()
+
+        self.assertTrue(response.json["deadline_exceeded"])
+        self.assertLess(elapsed, 1.0)
+        mock_statuses.assert_not_called()
+        statuses = response.json["prescriptions"][0]["network_statuses"].values()
+        self.assertTrue(statuses)
+        self.assertTrue(all(status["status"] == "lookup_error" for status in statuses))
+
+    def test_formulary_matches_fall_back_per_network_when_drug_batch_fails(self):
+        networks = web_app.build_networks(web_app.generate_bcbstx_urls("", 32.7767, -96.797, 25), {})
+
+        def fake_coverage(url, params, timeout):
+            if "," in params["planids"]:
+                raise web_app.requests.ConnectionError("batch failed")
+            return FakeResponse({"coverage": [
+                {"rxcui": "111", "plan_id": params["planids"], "coverage": "Covered"},
+            ]})
+
+        with patch.object(web_app, "get_network_plan_ids", side_effect=lambda network, place: (
+                 ("blue-1",) if "Advantage" in network["name"] else ("myblue-1",)
+             )), \
+             patch.object(web_app, "http_get", side_effect=fake_coverage):
+            matches = web_app.checked_formulary_matches_for_drugs(
+                [{"rxcui": "111"}], networks, web_app.TEXAS_MARKETPLACE_PLACES["dallas"]
+            )
+
+        self.assertEqual(
+            [match["network_id"] for match in matches["111"]],
+            ["bcbstx:blue_advantage_hmo", "bcbstx:my_blue_health"],
+        )
+
+    def test_search_route_batches_provider_coverage_across_each_providers_npi_matches(self):
+        def fake_search(name, **kwargs):
+            if kwargs["provider_type"] == "facility":
+                return [
+                    {"npi": "201", "name": "METHODIST HOSPITAL"},
+                    {"npi": "202", "name": "METHODIST CLINIC"},
+                    {"npi": "203", "name": "METHODIST WEST"},
+                ]
+            return [{"npi": "101", "name": name}]
+
+        def fake_coverage(url, params, timeout):
+            return FakeResponse({"coverage": [
+                {"npi": npi, "plan_id": plan_id, "coverage": "Covered" if npi != "203" else "NotCovered"}
+                for npi in params["providerids"].split(",")
+                for plan_id in params["planids"].split(",")
+            ]})
+
+        with patch.object(web_app, "search_npi", side_effect=fake_search), \
+             patch.object(web_app, "get_network_plan_ids", return_value=("plan-1", "plan-2")), \
+             patch.object(web_app, "http_get", side_effect=fake_coverage) as mock_get:
+            client = web_app.app.test_client()
+            response = client.get(
+                "/search?doctors=Maria+Garcia&facilities=Methodist"
+                "&carriers=bcbstx&carrier_filter_submitted=true"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(
+            [call.kwargs["params"]["providerids"] for call in mock_get.call_args_list],
+            ["101", "201,202,203"],
+        )
+        statuses = [
+            provider["network_statuses"]["bcbstx:blue_advantage_hmo"]["status"]
+            for provider in response.json["providers"]
+        ]
+        self.assertEqual(statuses, ["in", "in", "in", "out"])
+
+    def test_search_route_checks_resolved_providers_while_another_lookup_is_slow(self):
+        release = threading.Event()
+
+        def fake_search(name, **kwargs):
+            if name == "Slow Doctor":
+                release.wait(timeout=5)
+            return [{"npi": "101", "name": name}]
+
+        def fake_coverage(url, params, timeout):
+            return FakeResponse({"coverage": [
+                {"npi": "101", "plan_id": plan_id, "coverage": "Covered"}
+                for plan_id in params["planids"].split(",")
+            ]})
+
+        try:
+            with patch.object(web_app, "SEARCH_DEADLINE_SECONDS", 0.3), \
+                 patch.object(web_app, "search_npi", side_effect=fake_search), \
+                 patch.object(web_app, "get_network_plan_ids", return_value=("plan-1",)), \
+                 patch.object(web_app, "http_get", side_effect=fake_coverage):
+                client = web_app.app.test_client()
+                response = client.get(
+                    "/search?doctors=Slow+Doctor,Fast+Doctor&carriers=bcbstx&carrier_filter_submitted=true"
+                )
+        finally:
+            release.set()
+
+        self.assertTrue(response.json["deadline_exceeded"])
+        slow, fast = response.json["providers"]
+        self.assertEqual(slow["provider_type"], "lookup_error")
+        self.assertTrue(fast["npi_found"])
+        self.assertEqual(
+            {status["status"] for status in fast["network_statuses"].values()},
+            {"in"},
+        )
+
+    def test_search_route_marks_providers_whose_batch_misses_deadline_without_late_lookups(self):
+        release = threading.Event()
+
+        def stuck_batch(*args):
+            release.wait(timeout=5)
+            return web_app.CoverageBatch("npi")
+
+        try:
+            with patch.object(web_app, "SEARCH_DEADLINE_SECONDS", 0.2), \
+                 patch.object(web_app, "search_npi", return_value=[{"npi": "101", "name": "Ann Lee"}]), \
+                 patch.object(web_app, "fetch_provider_coverage_batch", side_effect=stuck_batch), \
+                 patch.object(web_app, "check_network_statuses") as mock_statuses:
+                client = web_app.app.test_client()
+                started = time.monotonic()
+                response = client.get("/search?doctors=Ann+Lee")
+                elapsed = time.monotonic() - started
+        finally:
+            release.set()
+
+        self.assertTrue(response.json["deadline_exceeded"])
+        self.assertLess(elapsed, 1.0)
+        mock_statuses.assert_not_called()
+        statuses = response.json["providers"][0]["network_statuses"].values()
+        self.assertTrue(statuses)
+        self.assertTrue(all(status["status"] == "lookup_error" for status in statuses))
+
+    def test_drug_coverage_batch_declines_pairs_it_did_not_query(self):
+        batch = web_app.CoverageBatch("rxcui")
+        batch.add(2026, ["111"], ["plan-1"], [{"rxcui": "111", "plan_id": "plan-1", "coverage": "Covered"}])
+
+        self.assertEqual(len(batch.rows_for(("111",), ("plan-1",), 2026)), 1)
+        self.assertIsNone(batch.rows_for(("111", "999"), ("plan-1",), 2026))
+        self.assertIsNone(batch.rows_for(("111",), ("plan-2",), 2026))
+        self.assertIsNone(batch.rows_for(("111",), ("plan-1",), 2027))
+
     def test_route_returns_prescription_results_and_network_statuses(self):
         prescription = {
             "prescription": "Ibuprofen",
@@ -1378,6 +2646,7 @@ class LookupTests(unittest.TestCase):
 
         with patch.object(web_app, "search_npi", return_value=[]), \
              patch.object(web_app, "resolve_prescription", return_value=prescription), \
+             patch.object(web_app, "fetch_drug_coverage_batch", return_value=web_app.CoverageBatch("rxcui")), \
              patch.object(web_app, "check_prescription_statuses", return_value={"bcbstx:blue_advantage_hmo": {"status": "drug_covered"}}):
             client = web_app.app.test_client()
             response = client.get("/search?prescriptions=Ibuprofen")
@@ -1509,6 +2778,24 @@ class LookupTests(unittest.TestCase):
         self.assertNotIn("providerNetworkStatuses", html)
         self.assertNotIn('label for="provider_type"', html)
 
+    def test_home_page_is_rendered_once_and_served_with_validators(self):
+        with patch.object(web_app, "_index_page", None), \
+             patch.object(web_app, "render_template_string", wraps=web_app.render_template_string) as mock_render:
+            client = web_app.app.test_client()
+            plain = client.get("/")
+            compressed = client.get("/", headers={"Accept-Encoding": "gzip"})
+            revalidated = client.get("/", headers={"If-None-Match": plain.headers["ETag"]})
+
+        self.assertEqual(mock_render.call_count, 1)
+        self.assertEqual(plain.status_code, 200)
+        self.assertIn("Run check", plain.get_data(as_text=True))
+        self.assertIn("max-age", plain.headers["Cache-Control"])
+        self.assertIn("Accept-Encoding", plain.headers["Vary"])
+        self.assertEqual(compressed.headers["Content-Encoding"], "gzip")
+        self.assertNotEqual(compressed.headers["ETag"], plain.headers["ETag"])
+        self.assertEqual(gzip.decompress(compressed.get_data()), plain.get_data())
+        self.assertEqual(revalidated.status_code, 304)
+
     def test_home_page_has_real_sample_scenarios(self):
         client = web_app.app.test_client()
         response = client.get("/")
@@ -1530,40 +2817,281 @@ class LookupTests(unittest.TestCase):
         self.assertIn("Humira, Albuterol", html)
         self.assertIn("Atorvastatin, Lisinopril", html)
 
+    def test_cli_check_doctor_uses_shared_resolver_for_facility_after_doctor_miss(self):
+        payloads = {"NPI-1": {"results": []}, "NPI-2": FACILITY_PAYLOAD}
+
+        def fake_get(url, params=None, timeout=None):
+            return FakeResponse(payloads[params["enumeration_type"]])
+
+        doctor = check_doctors.Doctor("Baylor Hospital")
+        with patch.object(web_app, "http_get", side_effect=fake_get) as mock_get, \
+             patch.object(web_app, "NPI_MIN_INTERVAL_SECONDS", 0):
+            result = check_doctors.check_doctor(doctor, 32.7767, -96.7970, 25)
+
+        facility_params = [
+            call.kwargs["params"] for call in mock_get.call_args_list
+            if call.kwargs["params"]["enumeration_type"] == "NPI-2"
+        ]
+        self.assertEqual(facility_params[0]["organization_name"], "Baylor Hospital")
+        self.assertEqual(result["provider_type"], "facility")
+        self.assertEqual(result["npi_results"][0]["name"], "BAYLOR HOSPITAL")
+        self.assertEqual(
+            set(result["npi_results"][0]),
+            {"npi", "name", "credential", "specialty", "location", "phone"},
+        )
+
+    def test_npi_rate_limiter_waits_only_for_registry_requests(self):
+        params = web_app.npi_search_params("Baylor Hospital", provider_type="facility")
+        with patch.object(web_app, "http_get", return_value=FakeResponse(FACILITY_PAYLOAD)) as mock_get, \
+             patch.object(web_app.HOST_RATE_LIMITER, "wait") as mock_wait:
+            web_app.fetch_npi_registry(params)
+            web_app.fetch_npi_registry(params)
+
+        self.assertEqual(mock_get.call_count, 1)
+        mock_wait.assert_called_once_with(web_app.NPI_API, web_app.NPI_MIN_INTERVAL_SECONDS)
+
+    def test_cli_geocode_caches_results_and_resolves_bundled_places_offline(self):
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+
+        with patch.object(check_doctors, "GEOCODE_CACHE_PATH", os.path.join(store_dir.name, "geocode.sqlite3")), \
+             patch.object(check_doctors, "GEOCODE_MIN_INTERVAL_SECONDS", 0), \
+             patch.object(check_doctors, "http_get") as mock_get:
+            mock_get.side_effect = [
+                FakeResponse([{"lat": "31.7619", "lon": "-106.485"}]),
+                FakeResponse([]),
+            ]
+
+            first = check_doctors.geocode_location("Cedar Hollow Ranch")
+            second = check_doctors.geocode_location("cedar hollow ranch")
+            with self.assertRaises(ValueError):
+                check_doctors.geocode_location("Nowhere Special")
+            with self.assertRaises(ValueError):
+                check_doctors.geocode_location("Nowhere Special")
+            houston_zip = check_doctors.geocode_location("77030-1234")
+            socorro = check_doctors.geocode_location("Socorro, TX")
+            woodlands = check_doctors.geocode_location("The Woodlands")
+
+        self.assertEqual(first, (31.7619, -106.485))
+        self.assertEqual(second, first)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args_list[0].args[0], check_doctors.NOMINATIM_API)
+        self.assertEqual(mock_get.call_args_list[0].kwargs["params"]["q"], "Cedar Hollow Ranch, TX")
+        zip_county = web_app.lookup_zip_county("77030")
+        self.assertEqual(houston_zip, (zip_county["lat"], zip_county["lon"]))
+        self.assertEqual(socorro, web_app.lookup_texas_place("socorro"))
+        self.assertAlmostEqual(socorro[0], 31.65, places=1)
+        self.assertEqual(woodlands, check_doctors.TEXAS_LOCATIONS["the woodlands"])
+        self.assertGreater(len(web_app.texas_place_centroids()), 1000)
+
+    def test_cli_geocode_requests_are_spaced_by_min_interval(self):
+        with patch.object(check_doctors, "GEOCODE_MIN_INTERVAL_SECONDS", 0.1):
+            started = time.monotonic()
+            check_doctors.wait_for_geocode_slot()
+            check_doctors.wait_for_geocode_slot()
+            elapsed = time.monotonic() - started
+
+        self.assertGreaterEqual(elapsed, 0.09)
+
+    def test_cli_workers_keep_input_order_for_json_and_json_lines(self):
+        delays = {"Slow Provider": 0.2, "Medium Provider": 0.1, "Fast Provider": 0.0}
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_check_doctor(doctor, lat, lon, radius, city=None):
+            with lock:
+                active.append(doctor.name)
+                peak.append(len(active))
+            time.sleep(delays[doctor.name])
+            with lock:
+                active.remove(doctor.name)
+            return {"provider": doctor.name, "npi_found": False}
+
+        def run(output_flag):
+            stdout = io.StringIO()
+            stderr = io.StringIO()
+            argv = [
+                "check_doctors.py",
+                "--providers", "Slow Provider, Medium Provider, Fast Provider",
+                "--workers", "3",
+                output_flag,
+            ]
+            with patch.object(sys, "argv", argv), \
+                 patch.object(check_doctors, "check_doctor", side_effect=fake_check_doctor), \
+                 contextlib.redirect_stdout(stdout), \
+                 contextlib.redirect_stderr(stderr):
+                check_doctors.main()
+            return stdout.getvalue(), stderr.getvalue()
+
+        json_output, json_progress = run("--json")
+        jsonl_output, jsonl_progress = run("--jsonl")
+
+        expected = ["Slow Provider", "Medium Provider", "Fast Provider"]
+        self.assertTrue(json_output.startswith("[\n"))
+        self.assertEqual([result["provider"] for result in json.loads(json_output)], expected)
+        self.assertEqual(
+            [json.loads(line)["provider"] for line in jsonl_output.splitlines()],
+            expected,
+        )
+        self.assertEqual(max(peak), 3)
+        self.assertIn("Checked 3/3", json_progress)
+        self.assertIn("Checked 3/3", jsonl_progress)
+
+    def test_cli_host_rate_limiter_spaces_request_starts_per_host(self):
+        limiter = web_app.HostRateLimiter()
+        started = time.monotonic()
+        limiter.wait("https://npiregistry.cms.hhs.gov/api/", 0.05)
+        limiter.wait("https://npiregistry.cms.hhs.gov/api/", 0.05)
+        limiter.wait("https://nominatim.openstreetmap.org/search", 0.05)
+        limiter.wait("https://npiregistry.cms.hhs.gov/api/", 0.05)
+        elapsed = time.monotonic() - started
+
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 0.5)
+
+    def test_cli_jsonl_streams_stdin_and_resumes_from_checkpoint(self):
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+        checkpoint_path = os.path.join(store_dir.name, "roster.checkpoint")
+        roster = "Ann Lee\nBob Ray (Cardiology), Cy Day\n\nDee Fox\n"
+        checked = []
+
+        def fake_check_doctor(doctor, lat, lon, radius, city=None):
+            if doctor.name == "Cy Day" and not checked.count("Cy Day"):
+                checked.append(doctor.name)
+                raise KeyboardInterrupt
+            checked.append(doctor.name)
+            return {"provider": doctor.name, "specialty_filter": doctor.specialty}
+
+        def run_cli():
+            stdout = io.StringIO()
+            argv = ["check_doctors.py", "--file", "-", "--jsonl", "--checkpoint", checkpoint_path]
+            with patch.object(sys, "argv", argv), \
+                 patch.object(sys, "stdin", io.StringIO(roster)), \
+                 patch.object(check_doctors, "check_doctor", side_effect=fake_check_doctor), \
+                 contextlib.redirect_stdout(stdout), \
+                 contextlib.redirect_stderr(io.StringIO()):
+                check_doctors.main()
+            return stdout.getvalue()
+
+        with self.assertRaises(KeyboardInterrupt):
+            run_cli()
+        with open(checkpoint_path, "a", encoding="utf-8") as handle:
+            handle.write('{"key": "torn')
+        output = run_cli()
+
+        self.assertEqual(checked, ["Ann Lee", "Bob Ray", "Cy Day", "Cy Day", "Dee Fox"])
+        lines = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([line["provider"] for line in lines], ["Ann Lee", "Bob Ray", "Cy Day", "Dee Fox"])
+        self.assertEqual(lines[1]["specialty_filter"], "Cardiology")
+        completed = check_doctors.load_checkpoint(checkpoint_path)
+        self.assertEqual(len(completed), 4)
+        self.assertTrue(all(isinstance(offset, int) for offset in completed.values()))
+        self.assertEqual(
+            [check_doctors.read_checkpoint_result(checkpoint_path, offset)["provider"] for offset in completed.values()],
+            ["Ann Lee", "Bob Ray", "Cy Day", "Dee Fox"],
+        )
+
+    def test_cli_networks_mode_uses_shared_lookup_with_one_batch_per_provider(self):
+        npi_result = {
+            "npi": "1234567890",
+            "name": "ANN LEE",
+            "credential": "MD",
+            "specialty": "Family Medicine",
+            "address": "6565 FANNIN ST, HOUSTON, TX 77030",
+            "location": "HOUSTON, TX 77030",
+            "phone": "",
+        }
+        coverage_batch = object()
+        seen = {}
+
+        def fake_statuses(provider_name, provider_type, npi_results, networks, place,
+                          max_workers=None, coverage_batch=None):
+            seen["place"] = place
+            seen["coverage_batch"] = coverage_batch
+            return {
+                network["id"]: web_app.make_network_status("in_network", "Marketplace", "Listed")
+                for network in networks
+            }
+
+        stdout = io.StringIO()
+        argv = [
+            "check_doctors.py",
+            "--providers", "Ann Lee",
+            "--location", "77030",
+            "--networks",
+            "--carriers", "bcbstx",
+            "--json",
+        ]
+        with patch.object(sys, "argv", argv), \
+             patch.object(web_app, "search_npi", return_value=[npi_result]), \
+             patch.object(web_app, "fetch_provider_coverage_batch", return_value=coverage_batch) as mock_batch, \
+             patch.object(web_app, "check_network_statuses", side_effect=fake_statuses), \
+             contextlib.redirect_stdout(stdout):
+            check_doctors.main()
+
+        results = json.loads(stdout.getvalue())
+        row = results[0]["results"][0]
+        self.assertTrue(results[0]["npi_found"])
+        self.assertEqual(row["provider"], "Ann Lee")
+        self.assertEqual(row["provider_type"], "doctor")
+        self.assertEqual(
+            set(row["network_statuses"]),
+            {"bcbstx:blue_advantage_hmo", "bcbstx:my_blue_health"},
+        )
+        self.assertEqual(mock_batch.call_count, 1)
+        self.assertEqual(mock_batch.call_args.args[0], ["1234567890"])
+        self.assertIs(seen["coverage_batch"], coverage_batch)
+        self.assertEqual(seen["place"]["zipcode"], "77030")
+
+    def test_cli_networks_mode_rejects_unknown_place(self):
+        argv = ["check_doctors.py", "--providers", "Ann Lee", "--location", "Socorro", "--networks"]
+        with patch.object(sys, "argv", argv), \
+             contextlib.redirect_stdout(io.StringIO()), \
+             contextlib.redirect_stderr(io.StringIO()) as stderr, \
+             self.assertRaises(SystemExit):
+            check_doctors.main()
+
+        self.assertIn("--networks needs a Texas ZIP", stderr.getvalue())
+
     def test_cli_search_npi_uses_type_two_for_facilities(self):
-        with patch.object(check_doctors.requests, "get") as mock_get:
+        with patch.object(web_app, "http_get") as mock_get:
             mock_get.return_value = FakeResponse(FACILITY_PAYLOAD)
 
-            results = check_doctors.search_npi(
-                "Baylor Hospital", provider_type="facility"
+            result = check_doctors.check_doctor(
+                check_doctors.Doctor("Baylor Hospital", provider_type="facility"), 32.7767, -96.797, 10
             )
 
         params = mock_get.call_args.kwargs["params"]
         self.assertEqual(params["enumeration_type"], "NPI-2")
         self.assertEqual(params["organization_name"], "Baylor Hospital")
-        self.assertEqual(results[0].name, "BAYLOR HOSPITAL")
+        self.assertEqual(result["provider_type"], "facility")
+        self.assertEqual(result["npi_results"][0]["name"], "BAYLOR HOSPITAL")
 
     def test_cli_auto_resolves_facility_after_doctor_miss(self):
-        with patch.object(check_doctors, "search_npi") as mock_search:
-            mock_search.side_effect = [
-                [],
-                [check_doctors.NPIResult(
-                    npi="2",
-                    name="BAYLOR HOSPITAL",
-                    credential="",
-                    specialty="General Acute Care Hospital",
-                    address="",
-                    city="DALLAS",
-                    state="TX",
-                    zip_code="75201",
-                    phone="",
-                )],
-            ]
+        def search(name, provider_type="doctor", **kwargs):
+            if provider_type == "facility":
+                return [{"npi": "2", "name": "BAYLOR HOSPITAL", "credential": "",
+                         "specialty": "General Acute Care Hospital", "address": "",
+                         "location": "DALLAS, TX 75201", "phone": ""}]
+            return []
 
-            results, provider_type = check_doctors.resolve_provider_npi("Baylor Hospital")
+        with patch.object(web_app, "search_npi", side_effect=search):
+            result = check_doctors.check_doctor(check_doctors.Doctor("Baylor Hospital"), 32.7767, -96.797, 10)
 
-        self.assertEqual(provider_type, "facility")
-        self.assertEqual(results[0].name, "BAYLOR HOSPITAL")
+        self.assertEqual(result["provider_type"], "facility")
+        self.assertEqual(result["npi_results"][0]["name"], "BAYLOR HOSPITAL")
+
+    def test_cli_warns_when_npi_registry_lookup_fails(self):
+        with patch.object(web_app, "http_get", side_effect=web_app.requests.ConnectionError("registry down")), \
+             contextlib.redirect_stderr(io.StringIO()) as stderr:
+            result = check_doctors.check_doctor(
+                check_doctors.Doctor("Jane Smith", provider_type="doctor"), 32.7767, -96.797, 10
+            )
+
+        self.assertFalse(result["npi_found"])
+        self.assertIn("Warning: NPI lookup error: registry down", stderr.getvalue())
 
 
 if __name__ == "__main__":